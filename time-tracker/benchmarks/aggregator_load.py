@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Load test for the team aggregation server.
+
+Starts a server on a temporary directory (or targets a running one with
+--url), then simulates many trackers pushing synthetic activity batches
+concurrently and reports ingest throughput, request latency percentiles,
+errors and the latency of team summaries over the ingested data.
+
+Usage:
+    python -m benchmarks.aggregator_load --trackers 200 --batches 10
+    python -m benchmarks.aggregator_load --url http://localhost:8765 --output load.json
+"""
+
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from benchmarks.run import percentiles
+from src.server.aggregator import Aggregator, AggregationServer
+from src.server.client import AggregatorClient
+from src.utils.synthetic import generate_activities
+
+START = datetime(2024, 1, 1)
+
+def simulate_tracker(index, url, args, barrier):
+    """Push ``args.batches`` batches as one user and return request latencies."""
+    client = AggregatorClient(url, f'user-{index:04d}', timeout=args.timeout)
+    history = list(generate_activities(
+        days=args.days,
+        switches_per_hour=args.switch_rate,
+        seed=index,
+        start=START
+    ))
+    size = max(1, len(history) // args.batches)
+    latencies, errors, sent = [], 0, 0
+    barrier.wait()
+    for number in range(args.batches):
+        batch = history[number * size:(number + 1) * size]
+        if not batch:
+            break
+        started = time.perf_counter()
+        try:
+            sent += client.push(batch, batch_id=f'{index}-{number}')
+        except Exception:
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - started)
+    return latencies, errors, sent
+
+def run(args):
+    with tempfile.TemporaryDirectory() as directory:
+        server = None
+        url = args.url
+        if not url:
+            server = AggregationServer(Aggregator(Path(directory)), port=0)
+            server.start()
+            url = server.url
+        try:
+            barrier = threading.Barrier(args.trackers)
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.trackers) as pool:
+                results = list(pool.map(
+                    lambda i: simulate_tracker(i, url, args, barrier),
+                    range(args.trackers)
+                ))
+            seconds = time.perf_counter() - started
+
+            latencies = [latency for result in results for latency in result[0]]
+            errors = sum(result[1] for result in results)
+            activities = sum(result[2] for result in results)
+
+            client = AggregatorClient(url, 'load-test', timeout=args.timeout)
+            summary_samples = []
+            for _ in range(args.repeat):
+                sample_started = time.perf_counter()
+                summary = client.summary(START.date(), (START + timedelta(days=args.days)).date())
+                summary_samples.append(time.perf_counter() - sample_started)
+        finally:
+            if server:
+                server.stop()
+
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'trackers': args.trackers,
+            'batches': args.batches,
+            'days': args.days,
+        },
+        'results': {
+            'requests': len(latencies),
+            'errors': errors,
+            'activities': activities,
+            'seconds': round(seconds, 3),
+            'requests_per_sec': round(len(latencies) / seconds, 1),
+            'activities_per_sec': round(activities / seconds, 1),
+            'request_ms': percentiles(latencies) if latencies else {},
+            'summary_ms': round(statistics.median(summary_samples) * 1000, 3),
+            'summary_users': len(summary['users']),
+        },
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--url', help='target a running server instead of starting one')
+    parser.add_argument('--trackers', type=int, default=100, help='concurrent simulated trackers')
+    parser.add_argument('--batches', type=int, default=5, help='batches pushed per tracker')
+    parser.add_argument('--days', type=int, default=5, help='days of history per tracker')
+    parser.add_argument('--switch-rate', type=float, default=30.0,
+                        help='activity switches per hour')
+    parser.add_argument('--timeout', type=float, default=60.0, help='request timeout in seconds')
+    parser.add_argument('--repeat', type=int, default=10, help='team summary repetitions')
+    parser.add_argument('--output', type=Path, help='write the JSON report here')
+    args = parser.parse_args()
+
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text + '\n')
+    print(text)
+    sys.exit(1 if report['results']['errors'] else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the storage backends and tracker hot paths.
+
+Populates each backend with a reproducible synthetic history, then measures
+save throughput, size on disk, range-query and search latency percentiles,
+daily summary time, peak memory of a full load and the cost of one
+recent-activities UI refresh, plus tracking tick latency with file logging.
+
+Usage:
+    python -m benchmarks.run --days 90 --output results.json
+    python -m benchmarks.run --days 90 --compare baseline.json
+"""
+
+import sys
+import json
+import random
+import argparse
+import platform
+import tempfile
+import statistics
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.core.compressed import CompressedStorage
+from src.core.storage import JSONStorage, SQLiteStorage
+from src.utils.synthetic import generate_activities
+
+BACKENDS = {
+    'json': lambda directory: JSONStorage(directory / 'activities.json'),
+    'sqlite': lambda directory: SQLiteStorage(directory / 'activities.db'),
+    'compressed': lambda directory: CompressedStorage(directory / 'activities.tz'),
+}
+
+def percentiles(samples):
+    """Return p50/p90/p99 of ``samples`` in milliseconds."""
+    ordered = sorted(samples)
+    def pick(q):
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 3)
+    return {'p50': pick(0.50), 'p90': pick(0.90), 'p99': pick(0.99)}
+
+def timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - started, result
+
+class _HeadlessTree:
+    """Stand-in for ttk.Treeview when no display is available."""
+
+    def __init__(self):
+        self._items = []
+
+    def get_children(self):
+        return list(self._items)
+
+    def delete(self, item):
+        self._items.remove(item)
+
+    def item(self, item, values=()):
+        pass
+
+    def insert(self, parent, index, values=()):
+        item = f"I{len(self._items)}"
+        self._items.append(item)
+        return item
+
+def _make_tree():
+    """Return a real Treeview when Tk can open a display, else a stand-in."""
+    try:
+        import tkinter as tk
+        from tkinter import ttk
+        root = tk.Tk()
+        root.withdraw()
+        return ttk.Treeview(root, columns=("Duration", "Application"), show="headings"), 'tk'
+    except Exception:
+        return _HeadlessTree(), 'headless'
+
+def bench_backend(name, directory, history, args, rng):
+    storage = BACKENDS[name](directory)
+    results = {}
+
+    bulk_seconds, _ = timed(storage.save_activities, history)
+    results['bulk_load_s'] = round(bulk_seconds, 3)
+
+    # Individual saves on top of the populated store, as the tracker does
+    last_end = history[-1].end_time
+    extra = list(generate_activities(days=1, switches_per_hour=args.switch_rate,
+                                     app_count=args.apps, seed=args.seed + 1,
+                                     start=last_end + timedelta(days=1)))[:args.saves]
+    save_seconds, _ = timed(lambda: [storage.save_activity(a) for a in extra])
+    storage.flush()
+    results['save_per_sec'] = round(len(extra) / save_seconds, 1)
+    # Everything the backend keeps on disk, sidecars included
+    disk_bytes = sum(path.stat().st_size for path in directory.iterdir() if path.is_file())
+    results['disk_mb'] = round(disk_bytes / 2**20, 2)
+
+    # Random one-hour and one-day windows across the history
+    first_day = history[0].start_time
+    latencies = []
+    for _ in range(args.queries):
+        window = timedelta(hours=1) if rng.random() < 0.5 else timedelta(days=1)
+        offset = timedelta(days=rng.randrange(args.days), hours=rng.randrange(24))
+        start = first_day + offset
+        seconds, _ = timed(storage.get_activities, start, start + window)
+        latencies.append(seconds)
+    results['query_ms'] = percentiles(latencies)
+
+    # Prefix searches over the whole history, half of them time-bounded
+    apps = sorted({a.process_name for a in history[:1000]})
+    search_latencies = []
+    for _ in range(args.queries):
+        query = f"{rng.choice(apps)} doc*"
+        start = first_day + timedelta(days=rng.randrange(args.days)) if rng.random() < 0.5 else None
+        seconds, _ = timed(storage.search, query, start)
+        search_latencies.append(seconds)
+    results['search_ms'] = percentiles(search_latencies)
+    
+    # ActivityTracker.get_daily_summary only needs get_overlapping on self
+    from src.core.tracker import ActivityTracker
+    tracker = SimpleNamespace(get_overlapping=storage.get_overlapping)
+    day = first_day + timedelta(days=args.days // 2)
+    summary_samples = [
+        timed(ActivityTracker.get_daily_summary, tracker, day)[0]
+        for _ in range(args.repeat)
+    ]
+    results['summary_ms'] = round(statistics.median(summary_samples) * 1000, 3)
+
+    # MainWindow._update_recent_activities against a Treeview
+    from src.ui.main_window import MainWindow
+    tree, tree_kind = _make_tree()
+    window = SimpleNamespace(
+        tracker=SimpleNamespace(get_page=storage.get_page),
+        config={'ui': {'recent_activities_count': 10}},
+        activities_tree=tree
+    )
+    refresh_samples = [
+        timed(MainWindow._update_recent_activities, window)[0]
+        for _ in range(args.repeat)
+    ]
+    results['ui_refresh_ms'] = round(statistics.median(refresh_samples) * 1000, 3)
+    results['ui_tree'] = tree_kind
+
+    tracemalloc.start()
+    storage.get_activities()
+    results['peak_memory_mb'] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+    tracemalloc.stop()
+
+    storage.close()
+    return results
+
+def bench_logging(directory, args):
+    """Tracking tick latency with DEBUG logging to a rotating file.
+
+    Every tick switches activity, so each one saves an activity and logs
+    twice; measured with the file handler called inline and behind the
+    queue that ``setup_logging`` installs, each on a fresh store.
+    """
+    import logging
+    from logging.handlers import RotatingFileHandler
+    from src.core.clock import SimulatedClock
+    from src.core.tracker import ActivityTracker
+    from src.utils.log_queue import LogPipeline
+
+    monitor = SimpleNamespace(get_current_activity=lambda: None, is_active=lambda: True)
+    # Small enough to rotate a few times per run
+    handler = RotatingFileHandler(directory / 'timetracker.log', maxBytes=64 * 1024, backupCount=3)
+    handler.setFormatter(logging.Formatter('%(asctime)s [%(levelname)s] %(name)s: %(message)s'))
+    package_logger = logging.getLogger('src')
+    package_logger.addHandler(handler)
+    package_logger.setLevel(logging.DEBUG)
+    package_logger.propagate = False
+
+    def ticks(name):
+        clock = SimulatedClock(datetime(2024, 1, 1))
+        config = {
+            'monitoring': {'inactivity_threshold': 300, 'polling_interval': 1.0,
+                           'input_threshold': 2.0, 'checkpoint_interval': 0},
+            'storage': {'type': 'sqlite', 'path': str(directory), 'filename': f'{name}.db'},
+        }
+        tracker = ActivityTracker(config, clock=clock, system_monitor=monitor,
+                                  input_monitor=monitor)
+        samples = []
+        for i in range(args.saves * 5):
+            clock.advance(61)
+            sample = {'process_name': f"App{i % args.apps}", 'window_title': f"doc {i}"}
+            seconds, _ = timed(tracker._apply_sample, sample, True)
+            samples.append(seconds)
+        tracker.storage.close()
+        return percentiles(samples)
+
+    results = {}
+    try:
+        results['tick_sync_ms'] = ticks('sync')
+        pipeline = LogPipeline()
+        pipeline.install()
+        try:
+            results['tick_queued_ms'] = ticks('queued')
+        finally:
+            pipeline.stop()
+        results['log_records_dropped'] = pipeline.dropped
+    finally:
+        package_logger.removeHandler(handler)
+        package_logger.propagate = True
+        package_logger.setLevel(logging.NOTSET)
+        handler.close()
+    return results
+
+def run(args):
+    history = list(generate_activities(
+        days=args.days,
+        switches_per_hour=args.switch_rate,
+        app_count=args.apps,
+        seed=args.seed
+    ))
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'days': args.days,
+            'switch_rate': args.switch_rate,
+            'apps': args.apps,
+            'seed': args.seed,
+            'activities': len(history),
+        },
+        'results': {},
+    }
+    for name in args.backends:
+        with tempfile.TemporaryDirectory() as directory:
+            rng = random.Random(args.seed)
+            report['results'][name] = bench_backend(name, Path(directory), history, args, rng)
+    with tempfile.TemporaryDirectory() as directory:
+        report['results']['logging'] = bench_logging(Path(directory), args)
+    return report
+
+def _flatten(results, prefix=''):
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, path + '.'))
+        elif isinstance(value, (int, float)):
+            flat[path] = value
+    return flat
+
+def compare(current, baseline, threshold):
+    """Return ``(metric, baseline, current, change)`` rows that regressed."""
+    now = _flatten(current['results'])
+    before = _flatten(baseline['results'])
+    regressions = []
+    for metric, old in sorted(before.items()):
+        new = now.get(metric)
+        if new is None or not old:
+            continue
+        change = (new - old) / old
+        higher_is_better = metric.endswith('per_sec')
+        if (-change if higher_is_better else change) > threshold:
+            regressions.append((metric, old, new, change))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--days', type=int, default=30, help='days of synthetic history')
+    parser.add_argument('--switch-rate', type=float, default=30.0,
+                        help='activity switches per hour')
+    parser.add_argument('--apps', type=int, default=20, help='distinct applications')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--saves', type=int, default=200,
+                        help='individual saves timed per backend')
+    parser.add_argument('--queries', type=int, default=200,
+                        help='range queries timed per backend')
+    parser.add_argument('--repeat', type=int, default=20,
+                        help='repetitions of summary and UI refresh timings')
+    parser.add_argument('--backends', nargs='+', choices=sorted(BACKENDS),
+                        default=sorted(BACKENDS))
+    parser.add_argument('--output', type=Path, help='write the JSON report here')
+    parser.add_argument('--compare', type=Path, help='baseline JSON report to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='relative change counted as a regression (default: 0.2)')
+    args = parser.parse_args()
+
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text + '\n')
+    print(text)
+
+    if args.compare:
+        regressions = compare(report, json.loads(args.compare.read_text()), args.threshold)
+        for metric, old, new, change in regressions:
+            print(f"REGRESSION {metric}: {old} -> {new} ({change:+.0%})", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Multi-process contention harness for the storage backends.
+
+For each backend several writer processes save uniquely named activities
+into one shared store while reader processes query it in a loop, as a
+tracker, the UI and a CLI export would. The parent then checks that every
+acknowledged save is stored exactly once and reports write and read
+throughput under contention, the slowest lock waits and SQLite busy
+retries.
+"""
+
+import sys
+import json
+import time
+import argparse
+import tempfile
+import multiprocessing
+from datetime import datetime, timedelta
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.core.activity import Activity
+from src.core.compressed import CompressedStorage
+from src.core.metrics import Metrics
+from src.core.storage import JSONStorage, SQLiteStorage
+
+BACKENDS = {
+    'json': lambda directory: JSONStorage(directory / 'activities.json'),
+    'sqlite': lambda directory: SQLiteStorage(directory / 'activities.db'),
+    'compressed': lambda directory: CompressedStorage(directory / 'activities.tz',
+                                                      chunk_records=100),
+}
+
+START = datetime(2024, 1, 1)
+
+def _open(backend, directory):
+    storage = BACKENDS[backend](Path(directory))
+    storage.metrics = Metrics(enabled=True)
+    return storage
+
+def _counters(storage):
+    stats = storage.metrics.stats()
+    return {
+        'busy_retries': stats['counters'].get('storage.busy_retries', 0),
+        'lock_wait_p99_ms': stats['latency'].get('storage.lock_wait', {}).get('p99_ms', 0.0),
+    }
+
+def writer(backend, directory, worker, saves, results):
+    storage = _open(backend, directory)
+    started = time.perf_counter()
+    for i in range(saves):
+        moment = START + timedelta(minutes=worker * saves + i)
+        storage.save_activity(Activity(
+            name=f"w{worker} #{i}",
+            start_time=moment,
+            end_time=moment + timedelta(seconds=30),
+            process_name=f"worker{worker}",
+            window_title=f"w{worker} #{i}"
+        ))
+    elapsed = time.perf_counter() - started
+    results.put(dict(_counters(storage), role='writer', operations=saves, seconds=elapsed))
+    storage.close()
+
+def reader(backend, directory, stop, results):
+    storage = _open(backend, directory)
+    reads = 0
+    started = time.perf_counter()
+    while not stop.is_set():
+        storage.get_activities(START, START + timedelta(days=365))
+        reads += 1
+    elapsed = time.perf_counter() - started
+    results.put(dict(_counters(storage), role='reader', operations=reads, seconds=elapsed))
+    storage.close()
+
+def run_trial(backend, workdir, writers, readers, saves):
+    """Run writers and readers against one store and verify what was stored."""
+    directory = Path(workdir) / backend
+    directory.mkdir()
+    _open(backend, directory).close()
+
+    results = multiprocessing.Queue()
+    stop = multiprocessing.Event()
+    reading = [multiprocessing.Process(target=reader, args=(backend, directory, stop, results))
+               for _ in range(readers)]
+    writing = [multiprocessing.Process(target=writer,
+                                       args=(backend, directory, worker, saves, results))
+               for worker in range(writers)]
+    started = time.perf_counter()
+    for process in reading + writing:
+        process.start()
+    reports = [results.get() for _ in writing]
+    elapsed = time.perf_counter() - started
+    stop.set()
+    reports.extend(results.get() for _ in reading)
+    for process in reading + writing:
+        process.join()
+
+    storage = _open(backend, directory)
+    names = [activity.name for activity in storage.get_activities()]
+    storage.close()
+    expected = {f"w{worker} #{i}" for worker in range(writers) for i in range(saves)}
+    read_reports = [report for report in reports if report['role'] == 'reader']
+    return {
+        'backend': backend,
+        'expected': len(expected),
+        'stored': len(names),
+        'lost': len(expected - set(names)),
+        'duplicated': len(names) - len(set(names)),
+        'ok': set(names) == expected and len(names) == len(expected),
+        'saves_per_sec': round(writers * saves / elapsed, 1),
+        'reads_per_sec': round(sum(r['operations'] / r['seconds'] for r in read_reports), 1),
+        'lock_wait_p99_ms': max(report['lock_wait_p99_ms'] for report in reports),
+        'busy_retries': sum(report['busy_retries'] for report in reports),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--writers', type=int, default=4, help='writer processes')
+    parser.add_argument('--readers', type=int, default=2, help='reader processes')
+    parser.add_argument('--saves', type=int, default=200, help='saves per writer')
+    parser.add_argument('--backends', nargs='+', choices=sorted(BACKENDS),
+                        default=sorted(BACKENDS))
+    args = parser.parse_args()
+
+    failures = 0
+    with tempfile.TemporaryDirectory() as workdir:
+        for backend in args.backends:
+            result = run_trial(backend, workdir, args.writers, args.readers, args.saves)
+            failures += not result['ok']
+            print(json.dumps(result))
+
+    sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Long-running memory and resource soak test for the tracker.
+
+Runs the real tracking thread on a simulated clock against replay monitors
+for a given number of ticks (a million one-second ticks is about twelve
+days of use), while the main thread refreshes the recent-activities list
+and the timeline as the UI timers do. RSS, Python heap (tracemalloc), open
+file descriptors and thread count are sampled along the way. The run fails when
+any of them grows beyond its budget between the end of the warm-up and the
+last sample, or when stopping the tracker leaves threads behind; the
+allocation sites that grew the most are printed to point at the leak.
+"""
+
+import gc
+import sys
+import json
+import math
+import time
+import argparse
+import tempfile
+import threading
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+import psutil
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from benchmarks.run import _make_tree
+from src.core.config import load_config
+from src.core.timeline import Timeline
+from src.core.tracker import ActivityTracker
+from src.monitors.replay_monitor import ReplayInputMonitor, ReplaySystemMonitor, ReplayTrace
+from src.ui.main_window import MainWindow
+from src.utils.synthetic import generate_activities
+
+PROCESS = psutil.Process()
+
+def open_fds():
+    """Open file descriptors (handles on Windows) of this process."""
+    return PROCESS.num_fds() if hasattr(PROCESS, 'num_fds') else PROCESS.num_handles()
+
+def sample(tick):
+    gc.collect()
+    return {
+        'tick': tick,
+        'rss_mb': round(PROCESS.memory_info().rss / 2**20, 2),
+        'traced_mb': round(tracemalloc.get_traced_memory()[0] / 2**20, 2)
+                     if tracemalloc.is_tracing() else None,
+        'fds': open_fds(),
+        'threads': threading.active_count(),
+    }
+
+def make_tracker(args, workdir):
+    config = load_config(PROJECT_ROOT / 'config' / 'default_config.yaml')
+    config['storage'].update(type=args.backend, path=str(workdir))
+    config['monitoring']['polling_interval'] = args.polling_interval
+    config['coalescing']['enabled'] = args.coalescing
+    config['metrics']['enabled'] = True
+
+    # Enough synthetic days to cover every tick, starting now so the
+    # recent-activities refresh keeps showing rows
+    days = math.ceil(args.ticks * args.polling_interval / 86400) + 1
+    trace = ReplayTrace.from_activities(generate_activities(
+        days=days, switches_per_hour=args.switch_rate, titles_per_app=args.titles,
+        seed=args.seed, start=datetime.now()
+    ))
+    return ActivityTracker(config, clock=trace.clock,
+                           system_monitor=ReplaySystemMonitor(trace),
+                           input_monitor=ReplayInputMonitor(trace))
+
+def top_allocators(baseline, limit):
+    growth = tracemalloc.take_snapshot().compare_to(baseline, 'lineno')
+    return [
+        {'site': str(stat.traceback), 'growth_kb': round(stat.size_diff / 1024, 1),
+         'count_growth': stat.count_diff}
+        for stat in growth[:limit] if stat.size_diff > 0
+    ]
+
+def run_soak(args, workdir):
+    if args.tracemalloc:
+        tracemalloc.start(args.frames)
+    tracker = make_tracker(args, workdir)
+    window = SimpleNamespace(tracker=tracker, config=tracker.config,
+                             activities_tree=_make_tree()[0])
+    timeline = Timeline(tracker.storage, max_days=tracker.config['ui']['timeline_cache_days'])
+    tracker.add_activity_listener(timeline.add)
+    threads_before = threading.active_count()
+
+    def ticks():
+        return round(tracker.clock.monotonic() / args.polling_interval)
+
+    warmup = int(args.ticks * args.warmup)
+    samples, baseline, snapshot = [], None, None
+    next_sample = warmup
+    started = time.perf_counter()
+    tracker.start()
+    try:
+        while ticks() < args.ticks:
+            # The UI timers read the store while the tracking thread writes it
+            MainWindow._update_recent_activities(window)
+            now = tracker.clock.now()
+            timeline.segments(now - timedelta(days=1), now, max_bins=900)
+            time.sleep(args.refresh_interval)
+            if ticks() < next_sample:
+                continue
+            samples.append(sample(ticks()))
+            print(json.dumps(samples[-1]), flush=True)
+            if baseline is None:
+                baseline = samples[-1]
+                snapshot = tracemalloc.take_snapshot() if args.tracemalloc else None
+            next_sample += (args.ticks - warmup) / args.samples
+    finally:
+        tracker.stop()
+        tracker.storage.close()
+    elapsed = time.perf_counter() - started
+
+    budgets = {'rss_mb': args.max_rss_growth, 'traced_mb': args.max_heap_growth,
+               'fds': args.max_fd_growth, 'threads': args.max_thread_growth}
+    final = samples[-1]
+    growth = {key: round(final[key] - baseline[key], 2) for key in budgets
+              if final[key] is not None}
+    failures = [f"{key} grew by {growth[key]} (budget {budget})"
+                for key, budget in budgets.items() if growth.get(key, 0) > budget]
+    # The tracking thread and any background jobs must be gone after stop()
+    leftover = threading.active_count() - threads_before
+    if leftover > 0:
+        failures.append(f"{leftover} threads still running after stop()")
+
+    return {
+        'backend': args.backend,
+        'ticks': ticks(),
+        'tick_rate': round(ticks() / elapsed),
+        'baseline': baseline,
+        'final': final,
+        'growth': growth,
+        'top_allocators': top_allocators(snapshot, args.top) if snapshot else [],
+        'failures': failures,
+        'ok': not failures,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--ticks', type=int, default=1_000_000, help='tracking loop ticks')
+    parser.add_argument('--backend', choices=('json', 'sqlite', 'compressed'), default='sqlite',
+                        help='storage backend (json keeps the history in memory, '
+                             'so its RSS grows with the data)')
+    parser.add_argument('--polling-interval', type=float, default=1.0,
+                        help='simulated seconds per tick')
+    parser.add_argument('--switch-rate', type=float, default=30.0,
+                        help='window switches per active hour')
+    parser.add_argument('--titles', type=int, default=1000,
+                        help='distinct window titles per app (enough to fill the '
+                             'bounded string and categorization caches)')
+    parser.add_argument('--coalescing', action='store_true', help='enable coalescing')
+    parser.add_argument('--refresh-interval', type=float, default=0.01,
+                        help='wall seconds between recent-activities refreshes')
+    parser.add_argument('--samples', type=int, default=20, help='samples after warm-up')
+    parser.add_argument('--warmup', type=float, default=0.1,
+                        help='fraction of ticks before the baseline sample')
+    parser.add_argument('--no-tracemalloc', dest='tracemalloc', action='store_false',
+                        help='skip heap tracing (faster, no allocator report)')
+    parser.add_argument('--frames', type=int, default=1, help='traceback depth traced')
+    parser.add_argument('--top', type=int, default=10, help='allocation sites reported')
+    parser.add_argument('--max-rss-growth', type=float, default=20.0, help='MB')
+    parser.add_argument('--max-heap-growth', type=float, default=5.0,
+                        help='MB of traced Python allocations')
+    parser.add_argument('--max-fd-growth', type=int, default=0)
+    parser.add_argument('--max-thread-growth', type=int, default=0)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        result = run_soak(args, Path(workdir))
+    print(json.dumps(result, indent=2))
+    sys.exit(0 if result['ok'] else 1)
+
+if __name__ == '__main__':
+    main()
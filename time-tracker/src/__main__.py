@@ -1,35 +1,333 @@
 import sys
+import atexit
+import argparse
 import logging.config
 import yaml
+from datetime import date, datetime, timedelta
 from pathlib import Path
-from ui.main_window import MainWindow
+
+def config_path(app_dir: Path) -> Path:
+    """Return the application configuration file."""
+    return app_dir / 'config' / 'default_config.yaml'
+
+def setup_logging(app_dir: Path) -> None:
+    """Configure logging from the logging configuration file.
+    
+    Handlers run on a background thread behind a bounded queue, so the
+    tracking loop never waits on console or log file writes.
+    """
+    from .utils.log_queue import LogPipeline
+    
+    logging_config_path = app_dir / 'config' / 'logging_config.yaml'
+    with logging_config_path.open('r') as f:
+        logging_config = yaml.safe_load(f)
+        # Expand ~ in log file path
+        if 'file' in logging_config['handlers']:
+            logging_config['handlers']['file']['filename'] = \
+                str(Path(logging_config['handlers']['file']['filename']).expanduser())
+        queue_size = logging_config.pop('queue_size', 10000)
+        logging.config.dictConfig(logging_config)
+    if queue_size:
+        pipeline = LogPipeline(queue_size)
+        pipeline.install()
+        atexit.register(pipeline.stop)
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command line parser."""
+    from .core.transfer import FORMATS
+    
+    parser = argparse.ArgumentParser(
+        prog='timetracker',
+        description='Track time spent in applications. Runs the UI when no command is given.'
+    )
+    subparsers = parser.add_subparsers(dest='command')
+    
+    export_parser = subparsers.add_parser(
+        'export', help='stream activities from a store into a file or another store'
+    )
+    export_parser.add_argument('destination', type=Path,
+                               help='output file (.csv, .jsonl, .tcol, .json or .db)')
+    export_parser.add_argument('--from', dest='source', type=Path,
+                               help='source store (default: the configured store)')
+    
+    import_parser = subparsers.add_parser(
+        'import', help='stream activities from a file or store into a store'
+    )
+    import_parser.add_argument('source', type=Path,
+                               help='input file or store (.csv, .jsonl, .tcol, .json or .db)')
+    import_parser.add_argument('--to', dest='destination', type=Path,
+                               help='destination store (default: the configured store)')
+    import_parser.add_argument('--resume', action='store_true',
+                               help='continue an interrupted import')
+    
+    sync_parser = subparsers.add_parser(
+        'sync', help='exchange activities with other devices through the shared directory'
+    )
+    sync_parser.add_argument('--shared-dir', type=Path,
+                             help='shared directory (default: sync.shared_dir from the config)')
+    sync_parser.add_argument('--device-id',
+                             help='this device\'s id (default: sync.device_id or the hostname)')
+    
+    search_parser = subparsers.add_parser(
+        'search', help='find activities by application or window title'
+    )
+    search_parser.add_argument('query', help='words to match; end a word with * for a prefix')
+    search_parser.add_argument('--start', type=datetime.fromisoformat,
+                               help='only include activities starting at or after this ISO time')
+    search_parser.add_argument('--end', type=datetime.fromisoformat,
+                               help='only include activities ending at or before this ISO time')
+    search_parser.add_argument('--limit', type=int, default=50,
+                               help='maximum number of results (default: 50)')
+    
+    at_parser = subparsers.add_parser(
+        'at', help='show what was being done at a moment'
+    )
+    at_parser.add_argument('moment', type=datetime.fromisoformat, help='ISO date and time')
+    
+    recategorize_parser = subparsers.add_parser(
+        'recategorize', help='re-apply the category rules to all stored activities'
+    )
+    recategorize_parser.add_argument('--rules', type=Path,
+                                     help='rules file (default: categorization.rules_file)')
+    recategorize_parser.add_argument('--batch-size', type=int, default=1000,
+                                     help='activities updated per transaction (default: 1000)')
+    
+    report_parser = subparsers.add_parser(
+        'report', help='print a daily, weekly or monthly report, or one for any date range'
+    )
+    report_parser.add_argument('period', nargs='?', choices=('daily', 'weekly', 'monthly'),
+                               default='daily', help='period containing --date (default: daily)')
+    report_parser.add_argument('--date', type=date.fromisoformat,
+                               help='a day in the period to report (default: today)')
+    report_parser.add_argument('--start', type=date.fromisoformat,
+                               help='first day of a custom range (overrides the period)')
+    report_parser.add_argument('--end', type=date.fromisoformat,
+                               help='last day of a custom range, inclusive (default: today)')
+    report_parser.add_argument('--format', choices=('text', 'markdown'),
+                               help='output format (default: reporting.report_format)')
+    report_parser.add_argument('--workers', type=int,
+                               help='processes for ranges spanning several months')
+    report_parser.add_argument('--output', type=Path,
+                               help='write the report here instead of printing it')
+    
+    serve_parser = subparsers.add_parser(
+        'serve', help='run the team aggregation server'
+    )
+    serve_parser.add_argument('--root', type=Path, default=Path('~/.timetracker/server'),
+                              help='directory holding the per-user databases')
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8765)
+    
+    for subparser in (export_parser, import_parser):
+        subparser.add_argument('--source-format', choices=FORMATS,
+                               help='override the format inferred from the source suffix')
+        subparser.add_argument('--destination-format', choices=FORMATS,
+                               help='override the format inferred from the destination suffix')
+        subparser.add_argument('--start', type=datetime.fromisoformat,
+                               help='only include activities starting at or after this ISO time')
+        subparser.add_argument('--end', type=datetime.fromisoformat,
+                               help='only include activities ending at or before this ISO time')
+        subparser.add_argument('--batch-size', type=int, default=5000,
+                               help='activities per batch (default: 5000)')
+    return parser
+
+def run_transfer(args: argparse.Namespace, config: dict) -> None:
+    """Run an export or import command."""
+    from .core.storage import storage_location
+    from .core.transfer import transfer
+    
+    configured_store = storage_location(config['storage'])
+    source = args.source or configured_store
+    destination = args.destination or configured_store
+    
+    def report(stats):
+        print(
+            f"\r{stats.skipped + stats.rows} rows "
+            f"({stats.rows_per_second:,.0f} rows/s)",
+            end='', file=sys.stderr, flush=True
+        )
+    
+    stats = transfer(
+        source,
+        destination,
+        source_format=args.source_format,
+        destination_format=args.destination_format,
+        start_time=args.start,
+        end_time=args.end,
+        batch_size=args.batch_size,
+        resume=getattr(args, 'resume', False),
+        progress=report
+    )
+    print(file=sys.stderr)
+    print(
+        f"{args.command.capitalize()}ed {stats.rows} activities "
+        f"in {stats.seconds:.2f}s ({stats.rows_per_second:,.0f} rows/s)"
+    )
+
+def run_sync(args: argparse.Namespace, config: dict) -> None:
+    """Run one sync round with the shared directory."""
+    from .core.storage import create_storage
+    from .core.sync import SyncManager
+    
+    sync_config = config.get('sync', {})
+    shared_dir = args.shared_dir or sync_config.get('shared_dir')
+    if not shared_dir:
+        raise ValueError("No shared directory configured; pass --shared-dir")
+    
+    sync = SyncManager(
+        local_dir=config['storage']['path'],
+        shared_dir=shared_dir,
+        device_id=args.device_id or sync_config.get('device_id')
+    )
+    storage = create_storage(config['storage'])
+    try:
+        seeded = sync.seed_from(storage)
+    finally:
+        storage.close()
+    stats = sync.sync()
+    print(
+        f"Pushed {stats.pushed} and merged {stats.pulled} activities "
+        f"({seeded} seeded from local history); "
+        f"{len(sync.devices())} devices in the merged index"
+    )
+
+def run_search(args: argparse.Namespace, config: dict) -> None:
+    """Print activities matching a search query, newest first."""
+    from .core.storage import create_storage
+    
+    storage = create_storage(config['storage'])
+    try:
+        for activity in storage.search(args.query, args.start, args.end, args.limit):
+            print(
+                f"{activity.start_time:%Y-%m-%d %H:%M}  "
+                f"{activity.duration_minutes:7.1f} min  "
+                f"{activity.process_name}: {activity.window_title}"
+            )
+    finally:
+        storage.close()
+
+def run_at(args: argparse.Namespace, config: dict) -> None:
+    """Print the activities in progress at a moment."""
+    from .core.storage import create_storage
+    
+    storage = create_storage(config['storage'])
+    try:
+        activities = storage.get_activities_at(args.moment)
+    finally:
+        storage.close()
+    if not activities:
+        print(f"Nothing was tracked at {args.moment:%Y-%m-%d %H:%M:%S}")
+    for activity in activities:
+        end = f"{activity.end_time:%H:%M}" if activity.end_time else "now"
+        print(
+            f"{activity.start_time:%Y-%m-%d %H:%M}-{end}  "
+            f"{activity.process_name}: {activity.window_title}"
+        )
+
+def run_recategorize(args: argparse.Namespace, config: dict) -> None:
+    """Recompute the category of every stored activity."""
+    from .core.categorizer import Categorizer
+    from .core.storage import create_storage
+    
+    categorization_config = config.get('categorization', {})
+    categorizer = Categorizer.from_file(
+        args.rules or categorization_config.get('rules_file'),
+        categorization_config.get('cache_size', 4096)
+    )
+    storage = create_storage(config['storage'])
+    try:
+        changed = storage.recategorize(categorizer.categorize, args.batch_size)
+    finally:
+        storage.close()
+    print(f"Updated the category of {changed} activities")
+
+def run_report(args: argparse.Namespace, config: dict) -> None:
+    """Print or write a report."""
+    from .core.reports import ReportGenerator, period_label, period_range
+    from .core.storage import create_storage
+    
+    storage = create_storage(config['storage'])
+    try:
+        generator = ReportGenerator.from_config(storage, config)
+        if args.format:
+            generator.report_format = args.format
+        if args.workers:
+            generator.workers = args.workers
+        
+        if args.start:
+            start = args.start
+            end = (args.end or date.today()) + timedelta(days=1)
+            title = f"Report {start} to {end - timedelta(days=1)}"
+        else:
+            day = args.date or date.today()
+            start, end = period_range(args.period, day)
+            title = f"{args.period.capitalize()} report {period_label(args.period, day)}"
+        
+        if args.output:
+            generator.write(args.output, title, start, end)
+            print(f"Wrote {args.output}")
+        else:
+            sys.stdout.writelines(generator.render(title, start, end))
+    finally:
+        storage.close()
+
+def run_server(args: argparse.Namespace) -> None:
+    """Serve the aggregation API until interrupted."""
+    from .server.aggregator import Aggregator, AggregationServer
+    
+    server = AggregationServer(Aggregator(args.root), args.host, args.port)
+    print(f"Aggregation server listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
 
 def main():
     """Main entry point for the time tracker application."""
+    args = build_parser().parse_args()
     try:
         # Get the application root directory
         app_dir = Path(__file__).parent.parent
         
-        # Load configuration
-        config_path = app_dir / 'config' / 'default_config.yaml'
-        with config_path.open('r') as f:
-            config = yaml.safe_load(f)
+        # Load configuration, watched for changes while the UI runs
+        from .core.config import ConfigService
+        config_service = ConfigService(config_path(app_dir))
+        config = config_service.config
             
         # Setup logging
-        logging_config_path = app_dir / 'config' / 'logging_config.yaml'
-        with logging_config_path.open('r') as f:
-            logging_config = yaml.safe_load(f)
-            # Expand ~ in log file path
-            if 'file' in logging_config['handlers']:
-                logging_config['handlers']['file']['filename'] = \
-                    str(Path(logging_config['handlers']['file']['filename']).expanduser())
-            logging.config.dictConfig(logging_config)
+        setup_logging(app_dir)
             
         logger = logging.getLogger(__name__)
+        
+        if args.command in ('export', 'import'):
+            run_transfer(args, config)
+            return
+        if args.command == 'sync':
+            run_sync(args, config)
+            return
+        if args.command == 'search':
+            run_search(args, config)
+            return
+        if args.command == 'at':
+            run_at(args, config)
+            return
+        if args.command == 'recategorize':
+            run_recategorize(args, config)
+            return
+        if args.command == 'report':
+            run_report(args, config)
+            return
+        if args.command == 'serve':
+            run_server(args)
+            return
+        
         logger.info(f"Starting {config['app']['name']} v{config['app']['version']}")
         
         # Create and run main window
-        window = MainWindow(config)
+        from .ui.main_window import MainWindow
+        window = MainWindow(config, config_service)
         window.run()
         
     except Exception as e:
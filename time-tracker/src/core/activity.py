@@ -1,7 +1,11 @@
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from typing import Optional
 
+def milliseconds(delta: timedelta) -> int:
+    """Whole milliseconds in ``delta``, computed without floating point."""
+    return (delta.days * 86400 + delta.seconds) * 1000 + delta.microseconds // 1000
+
 @dataclass
 class Activity:
     """Represents a single tracked activity."""
@@ -13,12 +17,16 @@ class Activity:
     category: Optional[str] = None
     
     @property
-    def duration_minutes(self) -> float:
-        """Calculate duration in minutes."""
+    def duration_ms(self) -> int:
+        """Duration in whole milliseconds; 0 while in progress."""
         if not self.end_time:
-            return 0.0
-        duration = (self.end_time - self.start_time).total_seconds()
-        return round(duration / 60, 2)
+            return 0
+        return milliseconds(self.end_time - self.start_time)
+    
+    @property
+    def duration_minutes(self) -> float:
+        """Duration in minutes, for display."""
+        return self.duration_ms / 60000
     
     def to_dict(self) -> dict:
         """Convert to dictionary for storage."""
@@ -29,7 +37,7 @@ class Activity:
             "process_name": self.process_name,
             "window_title": self.window_title,
             "category": self.category,
-            "duration_minutes": self.duration_minutes
+            "duration_ms": self.duration_ms
         }
     
     @classmethod
@@ -43,3 +51,16 @@ class Activity:
             window_title=data.get("window_title"),
             category=data.get("category")
         )
+
+@dataclass
+class DailyRollup:
+    """Total time spent in one application on one day."""
+    day: date
+    process_name: str
+    total_ms: int
+    activity_count: int
+    
+    @property
+    def total_minutes(self) -> float:
+        """Total time in minutes, for display."""
+        return self.total_ms / 60000
@@ -0,0 +1,241 @@
+import json
+import socket
+import asyncio
+import logging
+from concurrent.futures import Executor, ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from threading import Thread
+from typing import Any, Callable, List, Optional
+from .clock import Clock
+from .tracker import ActivityTracker
+from ..monitors.base_monitor import BaseMonitor
+
+logger = logging.getLogger(__name__)
+
+class AsyncActivityTracker(ActivityTracker):
+    """Activity tracker driven by a single asyncio event loop.
+
+    Monitor sampling runs on a one-thread executor so slow OS calls never
+    stall the loop, and every storage call runs on a second one-thread
+    executor, which serializes access to the store without locks.
+    Checkpointing, retention, flushing, sync, uploads, reports, metrics
+    export and the IPC server are tasks on the same loop instead of
+    separate threads.
+    """
+
+    def __init__(self, config: dict,
+                 clock: Optional[Clock] = None,
+                 system_monitor: Optional[BaseMonitor] = None,
+                 input_monitor: Optional[BaseMonitor] = None):
+        super().__init__(config, clock, system_monitor, input_monitor)
+        ipc_config = config.get('ipc', {})
+        self.ipc_path: Optional[Path] = None
+        if ipc_config.get('enabled', False):
+            self.ipc_path = Path(ipc_config['socket']).expanduser()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self._monitor_executor: Optional[Executor] = None
+        self._storage_executor: Optional[Executor] = None
+
+    def start(self) -> None:
+        """Run the event loop in a background thread."""
+        if self.tracking_thread and self.tracking_thread.is_alive():
+            logger.warning("Tracking already running")
+            return
+
+        self.stop_event.clear()
+        self.tracking_thread = Thread(target=asyncio.run, args=(self.run(),),
+                                      name='tracker-loop', daemon=True)
+        self.tracking_thread.start()
+        logger.info("Activity tracking started")
+
+    def stop(self) -> None:
+        """Stop tracking and wait for the loop to shut down."""
+        if not self.tracking_thread:
+            return
+
+        self.request_stop()
+        self.tracking_thread.join()
+        logger.info("Activity tracking stopped")
+
+    def request_stop(self) -> None:
+        """Ask :meth:`run` to finish. Safe to call from any thread."""
+        self.stop_event.set()
+        if self.loop and self._stopping:
+            try:
+                self.loop.call_soon_threadsafe(self._stopping.set)
+            except RuntimeError:
+                pass  # The loop has already closed
+
+    async def run(self) -> None:
+        """Track until :meth:`request_stop` is called, then save and flush."""
+        self.loop = asyncio.get_running_loop()
+        self._stopping = asyncio.Event()
+        if self.stop_event.is_set():
+            self._stopping.set()
+        self._monitor_executor = ThreadPoolExecutor(1, thread_name_prefix='tracker-monitor')
+        self._storage_executor = ThreadPoolExecutor(1, thread_name_prefix='tracker-storage')
+
+        tasks = [asyncio.create_task(self._tracking_task())]
+        tasks.extend(asyncio.create_task(task) for task in self._periodic_tasks())
+        server = await self._start_ipc() if self.ipc_path else None
+        try:
+            await self._stopping.wait()
+        finally:
+            if server:
+                server.close()
+                await server.wait_closed()
+                self.ipc_path.unlink(missing_ok=True)
+            if self.retention:
+                # Abort a retention pass between batches
+                self.retention.stop_event.set()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+            # Queued behind any storage call still running on the executor
+            await self._in_storage(self._end_current_activity)
+            if self.coalescer:
+                await self._in_storage(self.coalescer.flush)
+            await self._in_storage(self.storage.flush)
+            await self._in_storage(self._update_checkpoint)
+            if self.sync:
+                await self.loop.run_in_executor(None, self.sync.sync)
+            if self.uploader:
+                await self.loop.run_in_executor(None, self.uploader.flush)
+            self._monitor_executor.shutdown()
+            self._storage_executor.shutdown()
+
+    def _periodic_tasks(self) -> List:
+        # Intervals are passed as callables so reloaded settings apply
+        tasks = [self._every(lambda: self.checkpoint_interval,
+                             self._checkpoint_current_activity, self._storage_executor)]
+        if getattr(self.storage, 'durability', None) == 'interval':
+            tasks.append(self._every(lambda: self.storage.fsync_interval,
+                                     self.storage.flush, self._storage_executor))
+        if self.retention:
+            self.retention.stop_event.clear()
+            tasks.append(self._retention_task())
+        if self.sync:
+            tasks.append(self._every(lambda: self.sync.interval, self.sync.sync))
+        if self.uploader:
+            tasks.append(self._every(lambda: self.uploader.interval, self.uploader.flush))
+        if self.reports:
+            tasks.append(self._every(lambda: self.reports.interval, self.reports.run_pending,
+                                     self._storage_executor))
+        if self.metrics.enabled and self.prometheus_file:
+            tasks.append(self._every(lambda: self.metrics_export_interval, self._export_metrics))
+        return tasks
+
+    def _in_storage(self, func: Callable, *args) -> asyncio.Future:
+        return self.loop.run_in_executor(self._storage_executor, func, *args)
+
+    async def _tracking_task(self) -> None:
+        while True:
+            try:
+                self._service_profiler_request()
+                with self.metrics.timer('tick.total'):
+                    sample = await self.loop.run_in_executor(
+                        self._monitor_executor, self._sample_inputs
+                    )
+                    system_info, is_active, _ = sample
+                    # Updated here too so a retention batch loop sees it promptly
+                    if system_info and is_active:
+                        self.idle_event.clear()
+                    else:
+                        self.idle_event.set()
+                    await self._in_storage(self._apply_sample, *sample)
+            except Exception as e:
+                logger.error("Error in tracking loop: %s", e, exc_info=True)
+            await asyncio.sleep(self.polling_interval)
+
+    def _sample_inputs(self) -> tuple:
+        """Take a monitor sample, including the last input time when idle."""
+        system_info, is_active = self._sample()
+        last_input_time = None
+        if (not system_info or not is_active) and self.current_activity:
+            last_input_time = self.input_monitor._get_last_input_time()
+        return system_info, is_active, last_input_time
+
+    async def _every(self, interval: Callable[[], float], func: Callable,
+                     executor: Optional[Executor] = None) -> None:
+        """Call ``func`` on ``executor`` every ``interval()`` seconds.
+
+        The interval is read again every polling tick, so a changed value
+        applies without waiting out the old one; while it is 0 the task
+        stays idle.
+        """
+        last_run = self.loop.time()
+        while True:
+            await asyncio.sleep(self.polling_interval)
+            seconds = interval()
+            if seconds <= 0 or self.loop.time() - last_run < seconds:
+                continue
+            last_run = self.loop.time()
+            try:
+                await self.loop.run_in_executor(executor, func)
+            except Exception as e:
+                logger.error(f"Error in periodic task {func.__name__}: {e}", exc_info=True)
+
+    async def _retention_task(self) -> None:
+        while True:
+            await asyncio.sleep(self.retention.interval)
+            while not self._idle_for_retention():
+                await asyncio.sleep(self.retention.idle_poll_interval)
+            try:
+                await self._in_storage(self.retention.run_once, self.clock.now())
+            except Exception as e:
+                logger.error(f"Error in retention pass: {e}", exc_info=True)
+
+    async def _start_ipc(self) -> asyncio.AbstractServer:
+        self.ipc_path.parent.mkdir(parents=True, exist_ok=True)
+        self.ipc_path.unlink(missing_ok=True)
+        server = await asyncio.start_unix_server(self._handle_ipc, path=str(self.ipc_path))
+        logger.info(f"Serving IPC on {self.ipc_path}")
+        return server
+
+    async def _handle_ipc(self, reader: asyncio.StreamReader,
+                          writer: asyncio.StreamWriter) -> None:
+        """Answer JSON line requests until the client disconnects."""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    response = {'ok': True, 'result': await self._ipc_command(json.loads(line))}
+                except Exception as e:
+                    response = {'ok': False, 'error': str(e)}
+                writer.write(json.dumps(response, default=str).encode('utf-8') + b'\n')
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def _ipc_command(self, request: dict) -> Any:
+        command = request.get('command')
+        if command == 'status':
+            current = self.current_activity
+            return {
+                'tracking': True,
+                'idle': self.idle_event.is_set(),
+                'current': current.to_dict() if current else None,
+            }
+        if command == 'stats':
+            return self.stats()
+        if command == 'summary':
+            day = datetime.fromisoformat(request['date']) if request.get('date') else None
+            return await self._in_storage(self.get_daily_summary, day)
+        raise ValueError(f"Unknown command: {command}")
+
+def send_ipc_command(path: Path, command: str, timeout: float = 5.0, **params) -> Any:
+    """Send one command to a running tracker's IPC socket and return its result."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(str(Path(path).expanduser()))
+        sock.sendall(json.dumps({'command': command, **params}).encode('utf-8') + b'\n')
+        with sock.makefile('rb') as stream:
+            response = json.loads(stream.readline())
+    if not response['ok']:
+        raise RuntimeError(response['error'])
+    return response['result']
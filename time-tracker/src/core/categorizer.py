@@ -0,0 +1,92 @@
+import re
+import logging
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional
+import yaml
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RULES_FILE = Path(__file__).resolve().parents[2] / 'config' / 'categories.yaml'
+
+class Categorizer:
+    """Assigns categories to activities from process, bundle and title rules.
+
+    Rules compile once into two case-insensitive hash tables (process name
+    and bundle id) checked first, and a single combined regex over window
+    titles with one named group per category. Each alternative is anchored
+    at the start of the title, so the category listed first wins no matter
+    where in the title the patterns match. Results are memoized in a
+    bounded LRU cache, as the same windows recur all day.
+    """
+
+    def __init__(self, rules: Dict[str, dict],
+                 default: Optional[str] = None,
+                 cache_size: int = 4096):
+        self.default = default
+        self._processes: Dict[str, str] = {}
+        self._bundles: Dict[str, str] = {}
+        self._categories: Dict[str, str] = {}
+        alternatives = []
+        for index, (category, rule) in enumerate((rules or {}).items()):
+            rule = rule or {}
+            for process in rule.get('processes', []):
+                self._processes.setdefault(process.casefold(), category)
+            for bundle_id in rule.get('bundle_ids', []):
+                self._bundles.setdefault(bundle_id.casefold(), category)
+            patterns = rule.get('titles', [])
+            for pattern in patterns:
+                try:
+                    re.compile(pattern)
+                except re.error as e:
+                    raise ValueError(f"Invalid title pattern {pattern!r} for {category}: {e}")
+            if patterns:
+                group = f'c{index}'
+                self._categories[group] = category
+                alternatives.append(
+                    f"(?P<{group}>.*?(?:{'|'.join(f'(?:{p})' for p in patterns)}))"
+                )
+        self._titles = (
+            re.compile('|'.join(alternatives), re.IGNORECASE | re.DOTALL)
+            if alternatives else None
+        )
+        self.categorize = lru_cache(maxsize=cache_size)(self._categorize)
+
+    @classmethod
+    def from_file(cls, path: Optional[Path] = None, cache_size: int = 4096) -> 'Categorizer':
+        """Load rules from a YAML file (by default ``config/categories.yaml``)."""
+        with Path(path or DEFAULT_RULES_FILE).expanduser().open('r') as f:
+            data = yaml.safe_load(f) or {}
+        return cls(data.get('categories', {}), data.get('default'), cache_size)
+
+    @classmethod
+    def from_config(cls, config: dict) -> 'Categorizer':
+        return cls.from_file(config.get('rules_file'), config.get('cache_size', 4096))
+
+    def _categorize(self, process_name: Optional[str],
+                    window_title: Optional[str],
+                    bundle_id: Optional[str] = None) -> Optional[str]:
+        """Return the category for a window, or the default."""
+        if process_name:
+            category = self._processes.get(process_name.casefold())
+            if category:
+                return category
+        if bundle_id:
+            category = self._bundles.get(bundle_id.casefold())
+            if category:
+                return category
+        if window_title and self._titles:
+            match = self._titles.match(window_title)
+            if match:
+                return self._categories[match.lastgroup]
+        return self.default
+
+    def cache_stats(self) -> dict:
+        info = self.categorize.cache_info()
+        lookups = info.hits + info.misses
+        return {
+            'hits': info.hits,
+            'misses': info.misses,
+            'size': info.currsize,
+            'hit_rate': round(info.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,121 @@
+import os
+import json
+import zlib
+import struct
+import threading
+from pathlib import Path
+from typing import List, Optional, Tuple
+from .activity import Activity
+
+SLOT_SIZE = 4096
+SLOT_COUNT = 2
+HEADER = struct.Struct('<4sIQI')  # magic, crc32, sequence, payload length
+MAGIC = b'TTCK'
+MAX_PAYLOAD = SLOT_SIZE - HEADER.size
+
+class CheckpointSlot:
+    """Fixed-size on-disk slot holding the in-progress activity.
+
+    Ended activities that are not durable yet travel with it, so the slot
+    holds a list.
+
+    The file holds two alternating slots. Each write overwrites the older
+    slot in place with a checksummed record carrying a higher sequence
+    number, so a torn write can only ever damage the stale copy. A
+    heartbeat therefore costs a single small write, independent of how
+    much history the main store holds.
+    """
+
+    def __init__(self, filepath: Path, fsync: bool = True):
+        self.filepath = filepath
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._file = None
+        self._sequence = 0
+
+    def _open(self):
+        if self._file is None:
+            self.filepath.parent.mkdir(parents=True, exist_ok=True)
+            mode = 'r+b' if self.filepath.exists() else 'w+b'
+            self._file = open(self.filepath, mode)
+            self._sequence = self._read_latest()[0]
+        return self._file
+
+    def save(self, activities: List[Activity]) -> None:
+        """Overwrite the slot with the latest state of ``activities``."""
+        self._write(_encode(activities))
+
+    def clear(self) -> None:
+        """Mark the slot as empty."""
+        self._write(b'null')
+
+    def load(self) -> List[Activity]:
+        """Return the activities of the most recent valid checkpoint."""
+        with self._lock:
+            self._open()
+            _, payload = self._read_latest()
+        return decode_checkpoint(payload) if payload else []
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _write(self, payload: bytes) -> None:
+        with self._lock:
+            f = self._open()
+            self._sequence += 1
+            record = HEADER.pack(MAGIC, zlib.crc32(payload), self._sequence, len(payload))
+            f.seek((self._sequence % SLOT_COUNT) * SLOT_SIZE)
+            f.write((record + payload).ljust(SLOT_SIZE, b'\0'))
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+
+    def _read_latest(self) -> Tuple[int, Optional[bytes]]:
+        """Return ``(sequence, payload)`` of the newest intact slot."""
+        best: Tuple[int, Optional[bytes]] = (0, None)
+        for index in range(SLOT_COUNT):
+            self._file.seek(index * SLOT_SIZE)
+            raw = self._file.read(SLOT_SIZE)
+            if len(raw) < HEADER.size:
+                continue
+            magic, crc, sequence, length = HEADER.unpack_from(raw)
+            payload = raw[HEADER.size:HEADER.size + length]
+            if (magic != MAGIC or length > MAX_PAYLOAD or
+                    zlib.crc32(payload) != crc):
+                continue
+            if sequence > best[0]:
+                best = (sequence, payload)
+        return best
+
+def decode_checkpoint(payload) -> List[Activity]:
+    """Parse a checkpoint holding a list of activities, one activity or null."""
+    data = json.loads(payload)
+    if isinstance(data, dict):
+        # Written before checkpoints carried unsettled activities
+        data = [data]
+    return [Activity.from_dict(item) for item in data or []]
+
+def _encode(activities: List[Activity]) -> bytes:
+    """Serialize activities, truncating the longest titles to fit one slot.
+
+    Process names and categories are kept whole, as recovery matches saved
+    activities on them.
+    """
+    data = [activity.to_dict() for activity in activities]
+    payload = json.dumps(data).encode('utf-8')
+    while len(payload) > MAX_PAYLOAD:
+        item, key = max(
+            ((item, key) for item in data
+             for key in ('window_title', 'name')),
+            key=lambda pair: len(pair[0].get(pair[1]) or '')
+        )
+        value = item.get(key) or ''
+        if not value:
+            raise ValueError("Activities do not fit in a checkpoint slot")
+        overflow = len(payload) - MAX_PAYLOAD
+        item[key] = value[:max(len(value) // 2, len(value) - overflow)]
+        payload = json.dumps(data).encode('utf-8')
+    return payload
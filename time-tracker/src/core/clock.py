@@ -0,0 +1,71 @@
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Optional
+
+class Clock(ABC):
+    """Source of time for the tracker, so it can run on simulated time."""
+    
+    @abstractmethod
+    def now(self) -> datetime:
+        """Current local time."""
+        pass
+    
+    @abstractmethod
+    def time(self) -> float:
+        """Current time as a Unix timestamp."""
+        pass
+    
+    @abstractmethod
+    def monotonic(self) -> float:
+        """Monotonic seconds for measuring intervals."""
+        pass
+    
+    @abstractmethod
+    def sleep(self, seconds: float) -> None:
+        """Wait for ``seconds`` to pass."""
+        pass
+
+class SystemClock(Clock):
+    """Wall-clock time."""
+    
+    def now(self) -> datetime:
+        return datetime.now()
+    
+    def time(self) -> float:
+        return time.time()
+    
+    def monotonic(self) -> float:
+        return time.monotonic()
+    
+    def sleep(self, seconds: float) -> None:
+        time.sleep(seconds)
+
+class SimulatedClock(Clock):
+    """Manually advanced clock. Sleeping advances time instantly."""
+    
+    def __init__(self, start: Optional[datetime] = None):
+        self._now = start or datetime(2024, 1, 1)
+        self._elapsed = 0.0
+    
+    def now(self) -> datetime:
+        return self._now
+    
+    def time(self) -> float:
+        return self._now.timestamp()
+    
+    def monotonic(self) -> float:
+        return self._elapsed
+    
+    def sleep(self, seconds: float) -> None:
+        self.advance(seconds)
+    
+    def advance(self, seconds: float) -> None:
+        """Move time forward by ``seconds``."""
+        self._now += timedelta(seconds=seconds)
+        self._elapsed += seconds
+    
+    def advance_to(self, moment: datetime) -> None:
+        """Move time forward to ``moment`` (never backwards)."""
+        if moment > self._now:
+            self.advance((moment - self._now).total_seconds())
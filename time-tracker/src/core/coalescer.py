@@ -0,0 +1,154 @@
+import dataclasses
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, List, Optional
+from .activity import Activity
+
+logger = logging.getLogger(__name__)
+
+class Coalescer:
+    """Merges rapid-fire activity segments before they reach storage.
+
+    Finished activities are pushed in order and held back while later
+    segments may still merge into them:
+
+    * consecutive segments of the same application separated by at most
+      ``gap_tolerance`` seconds become one record, titled after its longest
+      segment;
+    * segments shorter than ``min_duration`` seconds (alt-tab blips) are
+      folded into the preceding record, or into the next one when nothing
+      precedes them.
+
+    Merged records keep exact totals: a record's duration is the sum of the
+    segments it absorbed, so gaps are never counted as tracked time and no
+    time is dropped. A record is held at most ``max_delay`` seconds after it
+    ends before being emitted, whether or not anything followed it.
+    """
+
+    def __init__(self,
+                 emit: Callable[[Activity], None],
+                 gap_tolerance: float = 5.0,
+                 min_duration: float = 10.0,
+                 max_delay: float = 60.0):
+        self.emit = emit
+        self.gap_tolerance = timedelta(seconds=gap_tolerance)
+        self.min_duration = min_duration
+        self.max_delay = timedelta(seconds=max_delay)
+        self._lock = threading.RLock()
+        self._pending: Optional[Activity] = None
+        self._pending_ms = 0
+        self._pending_end: Optional[datetime] = None
+        self._longest_ms = 0
+        self.input_count = 0
+        self.output_count = 0
+        self.merged_count = 0
+        self.folded_count = 0
+        self.folded_ms = 0
+
+    def push(self, activity: Activity) -> None:
+        """Add a finished activity."""
+        duration_ms = max(0, activity.duration_ms)
+        min_duration_ms = self.min_duration * 1000
+        with self._lock:
+            self.input_count += 1
+            pending = self._pending
+            if pending is None:
+                self._hold(activity, duration_ms)
+                return
+
+            adjacent = activity.start_time - self._pending_end <= self.gap_tolerance
+            if adjacent and activity.process_name == pending.process_name:
+                self.merged_count += 1
+                self._absorb(activity, duration_ms)
+            elif adjacent and duration_ms < min_duration_ms:
+                self.folded_count += 1
+                self.folded_ms += duration_ms
+                self._absorb(activity, duration_ms, retitle=False)
+            elif adjacent and self._pending_ms < min_duration_ms:
+                # The held record is itself a blip: fold it into the newcomer
+                self.folded_count += 1
+                self.folded_ms += self._pending_ms
+                held_ms = self._pending_ms
+                self._hold(dataclasses.replace(activity, start_time=pending.start_time), duration_ms)
+                self._pending_ms += held_ms
+                self._set_end()
+            else:
+                self._emit_pending()
+                self._hold(activity, duration_ms)
+
+    def poll(self, now: datetime) -> None:
+        """Emit the held record once it has waited ``max_delay``."""
+        with self._lock:
+            if self._pending is not None and now - self._pending_end >= self.max_delay:
+                self._emit_pending()
+
+    def flush(self) -> None:
+        """Emit the held record, if any."""
+        with self._lock:
+            self._emit_pending()
+
+    @property
+    def held(self) -> Optional[Activity]:
+        """A copy of the record held back for merging, if any."""
+        with self._lock:
+            return dataclasses.replace(self._pending) if self._pending else None
+
+    def _hold(self, activity: Activity, duration_ms: int) -> None:
+        self._pending = dataclasses.replace(activity)
+        self._pending_ms = duration_ms
+        self._pending_end = activity.end_time
+        self._longest_ms = duration_ms
+
+    def _absorb(self, activity: Activity, duration_ms: int, retitle: bool = True) -> None:
+        if retitle and duration_ms > self._longest_ms:
+            self._pending.name = activity.name
+            self._pending.window_title = activity.window_title
+            self._longest_ms = duration_ms
+        self._pending_ms += duration_ms
+        self._pending_end = activity.end_time
+        self._set_end()
+
+    def _set_end(self) -> None:
+        self._pending.end_time = (
+            self._pending.start_time + timedelta(milliseconds=self._pending_ms)
+        )
+
+    def _emit_pending(self) -> None:
+        if self._pending is None:
+            return
+        activity = self._pending
+        self._pending = None
+        self.output_count += 1
+        self.emit(activity)
+
+    @property
+    def reduction_ratio(self) -> float:
+        """Fraction of input records removed by coalescing."""
+        if not self.input_count:
+            return 0.0
+        held = 1 if self._pending is not None else 0
+        return round(1 - (self.output_count + held) / self.input_count, 4)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'input': self.input_count,
+                'output': self.output_count,
+                'pending': 1 if self._pending is not None else 0,
+                'merged': self.merged_count,
+                'folded': self.folded_count,
+                'folded_seconds': self.folded_ms / 1000,
+                'reduction_ratio': self.reduction_ratio,
+            }
+
+def coalesce(activities: Iterable[Activity],
+             gap_tolerance: float = 5.0,
+             min_duration: float = 10.0) -> List[Activity]:
+    """Coalesce a time-ordered batch of finished activities."""
+    result: List[Activity] = []
+    coalescer = Coalescer(result.append, gap_tolerance, min_duration)
+    for activity in activities:
+        coalescer.push(activity)
+    coalescer.flush()
+    return result
@@ -0,0 +1,520 @@
+import os
+import json
+import lzma
+import zlib
+import heapq
+import struct
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from .activity import Activity, DailyRollup
+from .checkpoint import CheckpointSlot
+from .locking import FileLock
+from .search import InvertedIndex, matches, parse_query
+from .storage import (BaseStorage, _accumulate_rollups, _file_identity, _instrumented,
+                      _load_rollups, _rollups_document, _with_ties, decode_records,
+                      encode_records)
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+CODECS = ('zlib', 'lzma', 'zstd')
+
+FILE_HEADER = struct.Struct('<4sB')  # magic, version
+FILE_MAGIC = b'TTCZ'
+# magic, codec, crc32 of payload, payload length, record count, then the
+# earliest start, latest start and latest end in microseconds since the epoch
+FRAME_HEADER = struct.Struct('<4sBIIIqqq')
+FRAME_MAGIC = b'TTCF'
+# Stands in for the end of an activity still in progress
+OPEN_END = 2 ** 62
+
+def _micros(moment: datetime) -> int:
+    delta = moment - datetime(1970, 1, 1, tzinfo=moment.tzinfo)
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+def _record_micros(value: Optional[str], default: int) -> int:
+    return _micros(datetime.fromisoformat(value)) if value else default
+
+def _compress(codec: str, data: bytes) -> bytes:
+    if codec == 'lzma':
+        return lzma.compress(data, preset=6)
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=9).compress(data)
+    return zlib.compress(data, 6)
+
+def _decompress(codec: str, data: bytes) -> bytes:
+    if codec == 'lzma':
+        return lzma.decompress(data)
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("This store has zstd chunks; install the zstandard package")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+@dataclass
+class _Frame:
+    offset: int  # Of the payload
+    length: int
+    codec: str
+    crc: int
+    count: int
+    min_start: int
+    max_start: int
+    max_end: int
+
+class CompressedStorage(BaseStorage):
+    """Append-only store of independently compressed chunks.
+
+    Activities are collected in a small uncompressed ``.tail`` file until
+    there are ``chunk_records`` of them, then dictionary-encoded,
+    compressed with ``codec`` and appended to the store as one frame. Each
+    frame header records the time range of its activities, so a query only
+    decompresses the frames it can match; the most recently used ones are
+    kept decoded. A frame torn by a crash is dropped when next written, and
+    the tail names the frame it will become, so a tail already sealed into
+    the store is never added twice.
+    """
+
+    # Every delete rewrites the whole file
+    incremental_deletes = False
+
+    def __init__(self, filepath: Path, codec: str = 'zlib', chunk_records: int = 1000,
+                 cache_chunks: int = 8, fsync: bool = True,
+                 lock_timeout: Optional[float] = None):
+        if codec not in CODECS:
+            raise ValueError(f"Unknown compression codec: {codec}")
+        if codec == 'zstd' and zstandard is None:
+            raise ValueError("The zstd codec needs the zstandard package")
+        self.filepath = filepath
+        self.codec = codec
+        self.chunk_records = chunk_records
+        self.cache_chunks = cache_chunks
+        self.fsync = fsync
+        self.tail_path = filepath.with_name(filepath.name + '.tail')
+        self.rollups_path = filepath.with_name(filepath.name + '.rollups')
+        self._lock = threading.RLock()
+        self._file_lock = FileLock(filepath.with_name(filepath.name + '.lock'),
+                                   timeout=lock_timeout)
+        self._frames: List[_Frame] = []
+        self._scanned: Tuple[Optional[int], int] = (None, 0)  # inode, bytes scanned
+        self._tail: List[dict] = []
+        self._tail_key: Optional[tuple] = None
+        self._chunks: 'OrderedDict[int, List[dict]]' = OrderedDict()
+        # Search postings by frame offset, built the first time a frame is searched
+        self._indexes: Dict[int, InvertedIndex] = {}
+        self.filepath.parent.mkdir(parents=True, exist_ok=True)
+        with self._locked(exclusive=True):
+            if not self.filepath.exists():
+                self._replace_store([])
+        self._checkpoint = CheckpointSlot(
+            self.filepath.with_name(self.filepath.name + '.checkpoint'), fsync=fsync
+        )
+
+    def save_activity(self, activity: Activity) -> None:
+        self.save_activities([activity])
+
+    @_instrumented
+    def save_activities(self, activities: List[Activity]) -> None:
+        records = [activity.to_dict() for activity in activities]
+        if not records:
+            return
+        with self._locked(exclusive=True):
+            self._refresh()
+            rollups = self._read_rollups()
+            tail = self._tail + records
+            while len(tail) >= self.chunk_records:
+                self._append_frame(tail[:self.chunk_records])
+                tail = tail[self.chunk_records:]
+            self._write_tail(tail)
+            _accumulate_rollups(rollups, records)
+            self._write_rollups(rollups)
+
+    @_instrumented
+    def get_activities(self,
+                      start_time: Optional[datetime] = None,
+                      end_time: Optional[datetime] = None) -> List[Activity]:
+        start_us = _micros(start_time) if start_time else None
+        end_us = _micros(end_time) if end_time else None
+        records = self._select(lambda frame: (
+            (start_us is None or frame.max_start >= start_us)
+            and (end_us is None or frame.min_start <= end_us)
+        ))
+        activities = []
+        for record in records:
+            activity = Activity.from_dict(record)
+            if start_time and activity.start_time < start_time:
+                continue
+            if end_time and activity.end_time and activity.end_time > end_time:
+                continue
+            activities.append(activity)
+        return activities
+
+    @_instrumented
+    def get_overlapping(self, start_time: datetime, end_time: datetime) -> List[Activity]:
+        start_us, end_us = _micros(start_time), _micros(end_time)
+        records = self._select(
+            lambda frame: frame.min_start < end_us and frame.max_end > start_us
+        )
+        activities = [
+            activity for activity in map(Activity.from_dict, records)
+            if activity.start_time < end_time
+            and (activity.end_time is None or activity.end_time > start_time)
+        ]
+        activities.sort(key=lambda activity: activity.start_time)
+        return activities
+
+    @_instrumented
+    def get_page(self,
+                 before: Optional[datetime] = None,
+                 limit: int = 100) -> List[Activity]:
+        before_key = before.isoformat() if before else None
+        before_us = _micros(before) if before else None
+        with self._locked():
+            self._refresh()
+            records = [record for record in self._tail
+                       if before_key is None or record['start_time'] < before_key]
+            frames = sorted((frame for frame in self._frames
+                             if before_us is None or frame.min_start < before_us),
+                            key=lambda frame: frame.max_start, reverse=True)
+            for frame in frames:
+                if len(records) >= limit:
+                    boundary = heapq.nlargest(limit, (r['start_time'] for r in records))[-1]
+                    # Older frames can neither beat nor tie the page so far
+                    if frame.max_start < _micros(datetime.fromisoformat(boundary)):
+                        break
+                records.extend(record for record in self._decoded(frame)
+                               if before_key is None or record['start_time'] < before_key)
+        records.sort(key=lambda record: record['start_time'], reverse=True)
+        return [Activity.from_dict(record)
+                for record in _with_ties(records, limit, lambda record: record['start_time'])]
+
+    @_instrumented
+    def search(self,
+               query: str,
+               start_time: Optional[datetime] = None,
+               end_time: Optional[datetime] = None,
+               limit: int = 100) -> List[Activity]:
+        terms = parse_query(query)
+        if not terms:
+            return []
+        start_key = start_time.isoformat() if start_time else None
+        end_key = end_time.isoformat() if end_time else None
+
+        def in_range(record: dict) -> bool:
+            return (not (start_key and record['start_time'] < start_key)
+                    and not (end_key and record.get('end_time') and record['end_time'] > end_key))
+
+        with self._locked():
+            self._refresh()
+            hits = [record for record in self._tail if matches(record, terms) and in_range(record)]
+            frames = sorted((frame for frame in self._frames
+                             if not (start_time and frame.max_start < _micros(start_time))
+                             and not (end_time and frame.min_start > _micros(end_time))),
+                            key=lambda frame: frame.max_start, reverse=True)
+            for frame in frames:
+                if len(hits) >= limit:
+                    boundary = heapq.nlargest(limit, (r['start_time'] for r in hits))[-1]
+                    if frame.max_start < _micros(datetime.fromisoformat(boundary)):
+                        break
+                index = self._indexes.get(frame.offset)
+                if index is None:
+                    index = self._indexes[frame.offset] = InvertedIndex.build(self._decoded(frame))
+                positions = index.search(terms)
+                if positions:
+                    records = self._decoded(frame)
+                    hits.extend(record for record in map(records.__getitem__, positions)
+                                if in_range(record))
+        hits.sort(key=lambda record: record['start_time'], reverse=True)
+        return [Activity.from_dict(record) for record in hits[:limit]]
+
+    @_instrumented
+    def get_rollups(self,
+                    start_day: Optional[date] = None,
+                    end_day: Optional[date] = None) -> List[DailyRollup]:
+        with self._locked():
+            rollups = self._read_rollups()
+        start_key = start_day.isoformat() if start_day else ''
+        end_key = end_day.isoformat() if end_day else '9999'
+        return [
+            DailyRollup(date.fromisoformat(day), process_name, total_ms, count)
+            for day in sorted(rollups)
+            if start_key <= day < end_key
+            for process_name, (total_ms, count) in sorted(rollups[day].items())
+        ]
+
+    def cleanup_old_activities(self, days: int = 30) -> None:
+        cutoff = (datetime.now() - timedelta(days=days)).isoformat()
+        with self._locked(exclusive=True):
+            self._refresh()
+            self._rewrite(lambda location, records: [
+                record for record in records if record['start_time'] > cutoff
+            ])
+
+    @_instrumented
+    def delete_activities_before(self, cutoff: datetime, limit: Optional[int] = 500) -> int:
+        cutoff_key, cutoff_us = cutoff.isoformat(), _micros(cutoff)
+        with self._locked(exclusive=True):
+            self._refresh()
+            chunks = [(frame.offset, self._decoded(frame)) for frame in self._frames
+                      if frame.min_start < cutoff_us]
+            expired = [
+                (record['start_time'], location, position)
+                for location, records in chunks + [(None, self._tail)]
+                for position, record in enumerate(records)
+                if record['start_time'] < cutoff_key
+            ]
+            if limit is not None:
+                expired = heapq.nsmallest(limit, expired)
+            doomed = {(location, position) for _, location, position in expired}
+            if doomed:
+                self._rewrite(lambda location, records: [
+                    record for position, record in enumerate(records)
+                    if (location, position) not in doomed
+                ])
+            return len(doomed)
+
+    def delete_rollups_before(self, day: date) -> int:
+        with self._locked(exclusive=True):
+            rollups = self._read_rollups()
+            expired = [key for key in rollups if key < day.isoformat()]
+            if not expired:
+                return 0
+            deleted = sum(len(rollups.pop(key)) for key in expired)
+            self._write_rollups(rollups)
+            return deleted
+
+    @_instrumented
+    def recategorize(self,
+                     categorize: Callable[[Optional[str], Optional[str]], Optional[str]],
+                     batch_size: int = 1000) -> int:
+        changed = 0
+
+        def update(location: Optional[int], records: List[dict]) -> List[dict]:
+            nonlocal changed
+            updated = []
+            for record in records:
+                category = categorize(record.get('process_name'), record.get('window_title'))
+                if category != record.get('category'):
+                    record = dict(record, category=category)
+                    changed += 1
+                updated.append(record)
+            return updated
+
+        # Unchanged chunks are copied as they are, so one pass is one batch
+        with self._locked(exclusive=True):
+            self._refresh()
+            self._rewrite(update)
+        return changed
+
+    def save_checkpoint(self, activities: List[Activity]) -> None:
+        self._checkpoint.save(activities)
+
+    def load_checkpoint(self) -> List[Activity]:
+        return self._checkpoint.load()
+
+    def clear_checkpoint(self) -> None:
+        self._checkpoint.clear()
+
+    def close(self) -> None:
+        self._checkpoint.close()
+        self._file_lock.close()
+
+    @contextmanager
+    def _locked(self, exclusive: bool = False):
+        """Hold the thread lock and the cross-process file lock."""
+        with self._lock:
+            hold = self._file_lock.exclusive if exclusive else self._file_lock.shared
+            with hold() as waited:
+                self.metrics.observe('storage.lock_wait', waited)
+                yield
+
+    def _select(self, wanted: Callable[[_Frame], bool]) -> List[dict]:
+        """Records of the frames ``wanted`` accepts, then of the tail."""
+        with self._locked():
+            self._refresh()
+            records = []
+            for frame in self._frames:
+                if wanted(frame):
+                    records.extend(self._decoded(frame))
+            records.extend(self._tail)
+        return records
+
+    def _decoded(self, frame: _Frame) -> List[dict]:
+        records = self._chunks.get(frame.offset)
+        if records is not None:
+            self._chunks.move_to_end(frame.offset)
+            self.metrics.record_cache('compressed_chunk', True)
+            return records
+        self.metrics.record_cache('compressed_chunk', False)
+        with self.filepath.open('rb') as f:
+            f.seek(frame.offset)
+            payload = f.read(frame.length)
+        if zlib.crc32(payload) != frame.crc:
+            raise ValueError(f"Corrupt chunk at offset {frame.offset} of {self.filepath}")
+        records = decode_records(json.loads(_decompress(frame.codec, payload)))
+        self._chunks[frame.offset] = records
+        while len(self._chunks) > self.cache_chunks:
+            self._chunks.popitem(last=False)
+        return records
+
+    def _refresh(self) -> None:
+        """Pick up frames and tail written since the last look, by any process."""
+        stat = self.filepath.stat()
+        inode, scanned = self._scanned
+        if stat.st_ino != inode:
+            with self.filepath.open('rb') as f:
+                magic, _ = FILE_HEADER.unpack(f.read(FILE_HEADER.size))
+            if magic != FILE_MAGIC:
+                raise ValueError(f"{self.filepath} is not a compressed activity store")
+            self._frames, self._chunks, self._indexes = [], OrderedDict(), {}
+            scanned = FILE_HEADER.size
+        if stat.st_size > scanned:
+            with self.filepath.open('rb') as f:
+                scanned = self._scan(f, scanned, stat.st_size)
+        self._scanned = (stat.st_ino, scanned)
+
+        try:
+            tail_stat = self.tail_path.stat()
+        except FileNotFoundError:
+            self._tail, self._tail_key = [], None
+            return
+        key = _file_identity(tail_stat)
+        if key != self._tail_key:
+            with self.tail_path.open('r') as f:
+                tail = json.load(f)
+            # A tail naming an earlier frame was sealed before a crash
+            sealed = tail['frame'] < len(self._frames)
+            self._tail = [] if sealed else decode_records(tail['records'])
+            self._tail_key = key
+
+    def _scan(self, f, offset: int, size: int) -> int:
+        """Index the complete frames from ``offset``; returns where they end."""
+        while offset + FRAME_HEADER.size <= size:
+            f.seek(offset)
+            magic, codec, crc, length, count, min_start, max_start, max_end = \
+                FRAME_HEADER.unpack(f.read(FRAME_HEADER.size))
+            payload_offset = offset + FRAME_HEADER.size
+            # Anything else is a frame torn by a crash, overwritten by the next one
+            if magic != FRAME_MAGIC or codec >= len(CODECS) or payload_offset + length > size:
+                break
+            self._frames.append(_Frame(payload_offset, length, CODECS[codec], crc,
+                                       count, min_start, max_start, max_end))
+            offset = payload_offset + length
+        return offset
+
+    def _frame_bytes(self, records: List[dict]) -> bytes:
+        payload = _compress(self.codec, json.dumps(encode_records(records)).encode())
+        starts = [_micros(datetime.fromisoformat(r['start_time'])) for r in records]
+        return FRAME_HEADER.pack(
+            FRAME_MAGIC, CODECS.index(self.codec), zlib.crc32(payload), len(payload),
+            len(records), min(starts), max(starts),
+            max(_record_micros(r.get('end_time'), OPEN_END) for r in records)
+        ) + payload
+
+    def _append_frame(self, records: List[dict]) -> None:
+        inode, scanned = self._scanned
+        data = self._frame_bytes(records)
+        with self.filepath.open('r+b') as f:
+            # Drop whatever a crash left after the last complete frame
+            f.truncate(scanned)
+            f.seek(scanned)
+            f.write(data)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+            self._scanned = (inode, self._scan(f, scanned, scanned + len(data)))
+
+    def _write_tail(self, records: List[dict]) -> None:
+        data = {'frame': len(self._frames), 'records': encode_records(records)}
+        self._atomic_write(self.tail_path, json.dumps(data).encode())
+        self._tail, self._tail_key = records, _file_identity(self.tail_path.stat())
+
+    def _rewrite(self, transform: Callable[[Optional[int], List[dict]], List[dict]]) -> None:
+        """Rewrite the store with ``transform`` applied to every chunk.
+
+        ``transform`` gets the offset of each frame, or None for the tail,
+        with its records. Frames it returns unchanged are copied compressed.
+        """
+        if not self.rollups_path.exists():
+            # Rollups outlive the activities they were built from
+            self._write_rollups(self._read_rollups())
+        chunks = []
+        for frame in self._frames:
+            records = self._decoded(frame)
+            updated = transform(frame.offset, records)
+            if len(updated) == len(records) and all(a is b for a, b in zip(updated, records)):
+                chunks.append((frame, None))
+            elif updated:
+                chunks.append((None, updated))
+        tail = transform(None, self._tail)
+        self._replace_store(chunks)
+        self._write_tail(tail)
+
+    def _replace_store(self, chunks: List[Tuple[Optional[_Frame], Optional[List[dict]]]]) -> None:
+        """Atomically write a new store from kept frames and re-encoded records."""
+        fd, tmp_name = tempfile.mkstemp(dir=str(self.filepath.parent),
+                                        prefix=f'.{self.filepath.name}.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                out.write(FILE_HEADER.pack(FILE_MAGIC, 1))
+                source = self.filepath.open('rb') if self._frames else None
+                try:
+                    for frame, records in chunks:
+                        if frame is None:
+                            out.write(self._frame_bytes(records))
+                            continue
+                        source.seek(frame.offset - FRAME_HEADER.size)
+                        out.write(source.read(FRAME_HEADER.size + frame.length))
+                finally:
+                    if source:
+                        source.close()
+                out.flush()
+                if self.fsync:
+                    os.fsync(out.fileno())
+            os.replace(tmp_name, self.filepath)
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+        self._scanned = (None, 0)
+        self._refresh()
+
+    def _read_rollups(self) -> Dict[str, Dict[str, list]]:
+        rollups = _load_rollups(self.rollups_path)
+        if rollups is not None:
+            return rollups
+        rollups = {}
+        self._refresh()
+        for frame in self._frames:
+            _accumulate_rollups(rollups, self._decoded(frame))
+        _accumulate_rollups(rollups, self._tail)
+        return rollups
+
+    def _write_rollups(self, rollups: Dict[str, Dict[str, list]]) -> None:
+        self._atomic_write(self.rollups_path, json.dumps(_rollups_document(rollups)).encode())
+
+    def _atomic_write(self, path: Path, data: bytes) -> None:
+        fd, tmp_name = tempfile.mkstemp(dir=str(path.parent), prefix=f'.{path.name}.',
+                                        suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            os.replace(tmp_name, path)
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
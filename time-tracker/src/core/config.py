@@ -0,0 +1,181 @@
+import copy
+import time
+import logging
+import yaml
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class ConfigError(ValueError):
+    """The configuration file is missing a section or holds an invalid value."""
+
+REQUIRED_SECTIONS = ('app', 'monitoring', 'storage', 'ui')
+
+# Lower bound of numeric settings and whether they must be whole numbers
+NUMBERS: Dict[str, Tuple[float, bool]] = {
+    'app.reload_interval': (0, False),
+    'monitoring.inactivity_threshold': (0, False),
+    'monitoring.polling_interval': (0.01, False),
+    'monitoring.input_threshold': (0, False),
+    'monitoring.checkpoint_interval': (0, False),
+    'monitoring.intern_pool_size': (1, True),
+    'storage.fsync_interval': (0, False),
+    'storage.busy_timeout': (0, False),
+    'storage.busy_retries': (0, True),
+    'storage.chunk_records': (1, True),
+    'categorization.cache_size': (0, True),
+    'coalescing.gap_tolerance': (0, False),
+    'coalescing.min_duration': (0, False),
+    'coalescing.max_delay': (0, False),
+    'retention.batch_size': (1, True),
+    'retention.check_interval': (1, False),
+    'retention.idle_after': (0, False),
+    'aggregation.max_buffer': (1, True),
+    'metrics.export_interval': (0.1, False),
+    'ui.recent_activities_count': (1, True),
+    'ui.history_page_size': (1, True),
+    'ui.history_prefetch_pages': (0, True),
+    'ui.timeline_cache_days': (1, True),
+}
+
+CHOICES: Dict[str, Tuple[str, ...]] = {
+    'monitoring.event_loop': ('thread', 'asyncio'),
+    'storage.type': ('json', 'sqlite', 'compressed'),
+    'storage.durability': ('always', 'interval', 'never'),
+    'storage.compression': ('zlib', 'lzma', 'zstd'),
+}
+
+# Settings a running tracker and window pick up without a restart; changes
+# to anything else, such as storage, wait for the next start
+LIVE_KEYS = frozenset({
+    'app.reload_interval',
+    'monitoring.inactivity_threshold',
+    'monitoring.polling_interval',
+    'monitoring.input_threshold',
+    'monitoring.checkpoint_interval',
+    'coalescing.gap_tolerance',
+    'coalescing.min_duration',
+    'coalescing.max_delay',
+    'retention.check_interval',
+    'retention.idle_after',
+    'metrics.export_interval',
+    'ui.recent_activities_count',
+    'ui.history_page_size',
+    'ui.history_prefetch_pages',
+})
+
+def _flatten(config: dict, prefix: str = '') -> Dict[str, Any]:
+    flat = {}
+    for key, value in config.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+def validate_config(config: Any) -> dict:
+    """Check sections, numeric bounds and choices; returns ``config``."""
+    if not isinstance(config, dict):
+        raise ConfigError("The configuration must be a mapping")
+    for section in REQUIRED_SECTIONS:
+        if not isinstance(config.get(section), dict):
+            raise ConfigError(f"Missing configuration section: {section}")
+    for key, value in _flatten(config).items():
+        if key in NUMBERS:
+            minimum, whole = NUMBERS[key]
+            if isinstance(value, bool) or not isinstance(value, int if whole else (int, float)):
+                kind = 'a whole number' if whole else 'a number'
+                raise ConfigError(f"{key} must be {kind}, not {value!r}")
+            if value < minimum:
+                raise ConfigError(f"{key} must be at least {minimum}, not {value!r}")
+        elif key in CHOICES and value not in CHOICES[key]:
+            raise ConfigError(f"{key} must be one of {', '.join(CHOICES[key])}, not {value!r}")
+    return config
+
+def load_config(path: Path) -> dict:
+    """Parse and validate a YAML configuration file."""
+    with path.open('r') as f:
+        return validate_config(yaml.safe_load(f))
+
+class ConfigService:
+    """The application configuration, parsed once and reloaded when edited.
+
+    :attr:`config` is the validated configuration in effect. :meth:`check`
+    polls the file's modification time at most every ``reload_interval``
+    seconds and, when it changed, applies the new values of the settings in
+    :data:`LIVE_KEYS` and calls every subscriber with the updated config and
+    the keys changed. Other changes are logged and take effect on restart,
+    and a file that fails to parse or validate is ignored until fixed.
+    """
+
+    def __init__(self, path: Path, reload_interval: Optional[float] = None):
+        self.path = path
+        self.config = load_config(path)
+        self.reload_interval = (reload_interval if reload_interval is not None
+                                else self.config['app'].get('reload_interval', 2.0))
+        self._identity = self._file_identity()
+        self._last_check = time.monotonic()
+        self._listeners: List[Callable[[dict, List[str]], None]] = []
+
+    def subscribe(self, listener: Callable[[dict, List[str]], None]) -> None:
+        """Call ``listener(config, changed_keys)`` after each applied change."""
+        self._listeners.append(listener)
+
+    def check(self) -> List[str]:
+        """Reload the file if due and changed; returns the keys applied."""
+        if not self.reload_interval:
+            return []
+        now = time.monotonic()
+        if now - self._last_check < self.reload_interval:
+            return []
+        self._last_check = now
+        return self.reload()
+
+    def reload(self) -> List[str]:
+        """Reload the file if it changed since last read; returns the keys applied."""
+        identity = self._file_identity()
+        if identity == self._identity:
+            return []
+        self._identity = identity
+        try:
+            new = load_config(self.path)
+        except (OSError, yaml.YAMLError, ConfigError) as e:
+            logger.error(f"Ignoring invalid configuration in {self.path}: {e}")
+            return []
+
+        current, updated = _flatten(self.config), _flatten(new)
+        changed = sorted(key for key in current.keys() | updated.keys()
+                         if current.get(key) != updated.get(key))
+        pending = [key for key in changed if key not in LIVE_KEYS]
+        if pending:
+            logger.warning(f"Restart to apply configuration changes to: {', '.join(pending)}")
+        live = [key for key in changed if key in LIVE_KEYS]
+        if not live:
+            return []
+
+        config = copy.deepcopy(self.config)
+        for key in live:
+            section, name = key.split('.', 1)
+            if key in updated:
+                config.setdefault(section, {})[name] = updated[key]
+            else:
+                config.get(section, {}).pop(name, None)
+        self.config = config
+        if 'app.reload_interval' in live:
+            self.reload_interval = config['app'].get('reload_interval', 2.0)
+        logger.info(f"Applied configuration changes to: {', '.join(live)}")
+        for listener in self._listeners:
+            try:
+                listener(config, live)
+            except Exception as e:
+                logger.error(f"Error applying configuration: {e}", exc_info=True)
+        return live
+
+    def _file_identity(self) -> Optional[tuple]:
+        try:
+            stat = self.path.stat()
+        except OSError:
+            return None
+        # Editors often save by replacing the file, which changes the inode
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
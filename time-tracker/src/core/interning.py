@@ -0,0 +1,58 @@
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+class InternPool:
+    """Bounded pool handing out one shared instance per distinct string.
+
+    The tracker passes every sampled process name and window title through
+    it, so the strings held by in-flight activities are shared and compare
+    by identity first. Least recently used strings are evicted once
+    ``max_size`` distinct strings are held.
+    """
+
+    def __init__(self, max_size: int = 8192):
+        self.max_size = max_size
+        self._pool: 'OrderedDict[str, str]' = OrderedDict()
+
+    def intern(self, value: Optional[str]) -> Optional[str]:
+        if value is None:
+            return None
+        shared = self._pool.get(value)
+        if shared is not None:
+            self._pool.move_to_end(value)
+            return shared
+        self._pool[value] = value
+        if len(self._pool) > self.max_size:
+            self._pool.popitem(last=False)
+        return value
+
+    def __len__(self) -> int:
+        return len(self._pool)
+
+class StringTable:
+    """Dictionary encoding of repeated strings as integer ids.
+
+    Used by the file formats: each distinct string is stored once and
+    records refer to it by position.
+    """
+
+    def __init__(self, strings: Iterable[str] = ()):
+        self.strings: List[str] = []
+        self._ids: Dict[str, int] = {}
+        for value in strings:
+            self.id_for(value)
+
+    def id_for(self, value: Optional[str]) -> Optional[int]:
+        if value is None:
+            return None
+        string_id = self._ids.get(value)
+        if string_id is None:
+            string_id = self._ids[value] = len(self.strings)
+            self.strings.append(value)
+        return string_id
+
+    def string(self, string_id: Optional[int]) -> Optional[str]:
+        return None if string_id is None else self.strings[string_id]
+
+    def __len__(self) -> int:
+        return len(self.strings)
@@ -0,0 +1,126 @@
+from bisect import bisect_left, bisect_right
+from typing import Any, Iterable, List, Optional, Tuple
+
+# Appended intervals are kept unsorted until they exceed this many, or
+# 1/TAIL_FRACTION of the sorted ones, and then merged in
+TAIL_MIN = 256
+TAIL_FRACTION = 8
+
+Interval = Tuple[Any, Optional[Any]]
+
+class IntervalIndex:
+    """Overlap, point and containment queries over ``[start, end)`` intervals.
+
+    Intervals are identified by their insertion position and kept sorted by
+    start, with an implicit balanced tree over the sorted array: the middle
+    element of each range stores the largest end in that range, so
+    subtrees ending before a query are skipped and queries take
+    ``O(log n + k)``. Any comparable values work as bounds; the file
+    backends use ISO timestamps. An interval without an end is still open
+    and overlaps everything after its start.
+    """
+
+    def __init__(self):
+        self._starts: List[Any] = []
+        self._ends: List[Any] = []
+        self._ids: List[int] = []
+        self._max_ends: List[Any] = []
+        self._tail: List[tuple] = []
+        self._open: List[tuple] = []
+        self.count = 0
+
+    @classmethod
+    def build(cls, intervals: Iterable[Interval]) -> 'IntervalIndex':
+        index = cls()
+        index.extend(intervals)
+        index._merge_tail()
+        return index
+
+    def extend(self, intervals: Iterable[Interval]) -> None:
+        """Index intervals appended after the ones already covered."""
+        for start, end in intervals:
+            if end is None:
+                self._open.append((start, self.count))
+            else:
+                self._tail.append((start, max(start, end), self.count))
+            self.count += 1
+        if len(self._tail) > max(TAIL_MIN, len(self._starts) // TAIL_FRACTION):
+            self._merge_tail()
+
+    def overlapping(self, start: Any, end: Any) -> List[int]:
+        """Positions of intervals overlapping ``[start, end)``, in position order."""
+        return self._query(start, end, closed=False)
+
+    def at(self, point: Any) -> List[int]:
+        """Positions of intervals containing ``point``, in position order."""
+        return self._query(point, point, closed=True)
+
+    def within(self, start: Optional[Any] = None, end: Optional[Any] = None) -> List[int]:
+        """Positions of intervals with ``start <= s`` and ``e <= end``.
+
+        Open intervals have no end yet, so only ``start`` applies to them.
+        """
+        lo = 0 if start is None else bisect_left(self._starts, start)
+        hi = len(self._starts) if end is None else bisect_right(self._starts, end)
+        positions = [
+            self._ids[i] for i in range(lo, hi)
+            if end is None or self._ends[i] <= end
+        ]
+        positions.extend(
+            position for s, e, position in self._tail
+            if (start is None or s >= start) and (end is None or e <= end)
+        )
+        positions.extend(
+            position for s, position in self._open
+            if start is None or s >= start
+        )
+        positions.sort()
+        return positions
+
+    def _query(self, start: Any, end: Any, closed: bool) -> List[int]:
+        # closed: starts may equal ``end`` (a point query)
+        starts, ends, max_ends = self._starts, self._ends, self._max_ends
+        positions = []
+        stack = [(0, len(starts))]
+        while stack:
+            lo, hi = stack.pop()
+            if lo >= hi:
+                continue
+            mid = (lo + hi) // 2
+            if max_ends[mid] <= start:
+                continue
+            stack.append((lo, mid))
+            if starts[mid] < end or (closed and starts[mid] == end):
+                if ends[mid] > start:
+                    positions.append(self._ids[mid])
+                stack.append((mid + 1, hi))
+        for s, e, position in self._tail:
+            if (s < end or (closed and s == end)) and e > start:
+                positions.append(position)
+        for s, position in self._open:
+            if s < end or (closed and s == end):
+                positions.append(position)
+        positions.sort()
+        return positions
+
+    def _merge_tail(self) -> None:
+        if not self._tail:
+            return
+        items = sorted(list(zip(self._starts, self._ends, self._ids)) + self._tail)
+        self._tail = []
+        self._starts = [item[0] for item in items]
+        self._ends = [item[1] for item in items]
+        self._ids = [item[2] for item in items]
+        self._max_ends = list(self._ends)
+        self._augment(0, len(items))
+
+    def _augment(self, lo: int, hi: int) -> Any:
+        """Store each range's largest end at its middle element; returns it."""
+        mid = (lo + hi) // 2
+        largest = self._ends[mid]
+        if lo < mid:
+            largest = max(largest, self._augment(lo, mid))
+        if mid + 1 < hi:
+            largest = max(largest, self._augment(mid + 1, hi))
+        self._max_ends[mid] = largest
+        return largest
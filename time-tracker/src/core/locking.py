@@ -0,0 +1,98 @@
+import os
+import time
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: locks only exclude threads of this process
+    fcntl = None
+
+SHARED, EXCLUSIVE = 'shared', 'exclusive'
+
+# Poll interval while waiting for a lock with a timeout
+POLL_INTERVAL = 0.01
+
+class FileLock:
+    """Advisory lock on a sidecar file, held shared or exclusively.
+
+    Uses ``flock``, so it excludes other processes as well as other
+    threads of this one, and is released by the OS if the holder dies.
+    The lock file is never replaced, unlike the data files it guards.
+    Holding it again while held is allowed, except asking for exclusive
+    access while only holding it shared, which could deadlock against
+    another process doing the same.
+    """
+
+    def __init__(self, path: Path, timeout: Optional[float] = None):
+        self.path = path
+        self.timeout = timeout
+        self._thread_lock = threading.RLock()
+        self._fd: Optional[int] = None
+        self._mode: Optional[str] = None
+        self._depth = 0
+
+    @contextmanager
+    def shared(self) -> Iterator[float]:
+        """Hold the lock alongside other readers; yields the seconds waited."""
+        with self._hold(SHARED) as waited:
+            yield waited
+
+    @contextmanager
+    def exclusive(self) -> Iterator[float]:
+        """Hold the lock alone; yields the seconds waited."""
+        with self._hold(EXCLUSIVE) as waited:
+            yield waited
+
+    def close(self) -> None:
+        with self._thread_lock:
+            if self._fd is not None and not self._depth:
+                os.close(self._fd)
+                self._fd = None
+
+    @contextmanager
+    def _hold(self, mode: str) -> Iterator[float]:
+        started = time.monotonic()
+        with self._thread_lock:
+            if self._depth:
+                if mode == EXCLUSIVE and self._mode == SHARED:
+                    raise RuntimeError(f"Cannot upgrade a shared lock on {self.path}")
+                waited = 0.0
+            else:
+                self._acquire(mode)
+                self._mode = mode
+                waited = time.monotonic() - started
+            self._depth += 1
+            try:
+                yield waited
+            finally:
+                self._depth -= 1
+                if not self._depth:
+                    self._release()
+                    self._mode = None
+
+    def _acquire(self, mode: str) -> None:
+        if fcntl is None:
+            return
+        if self._fd is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._fd = os.open(str(self.path), os.O_RDWR | os.O_CREAT, 0o644)
+        operation = fcntl.LOCK_SH if mode == SHARED else fcntl.LOCK_EX
+        if self.timeout is None:
+            fcntl.flock(self._fd, operation)
+            return
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                fcntl.flock(self._fd, operation | fcntl.LOCK_NB)
+                return
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"Timed out waiting for a {mode} lock on {self.path}")
+                time.sleep(POLL_INTERVAL)
+
+    def _release(self) -> None:
+        if fcntl is not None and self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
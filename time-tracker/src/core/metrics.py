@@ -0,0 +1,196 @@
+import os
+import time
+import threading
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+# Latency buckets in seconds, from 100µs to 2.5s
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+)
+
+class Histogram:
+    """Fixed-bucket latency histogram."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile as the upper bound of the bucket holding it."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return self.buckets[min(index, len(self.buckets) - 1)]
+        return self.buckets[-1]
+
+    def snapshot(self) -> dict:
+        return {
+            'count': self.count,
+            'mean_ms': round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            'p50_ms': self.quantile(0.50) * 1000,
+            'p90_ms': self.quantile(0.90) * 1000,
+            'p99_ms': self.quantile(0.99) * 1000,
+        }
+
+class _NullTimer:
+    """Shared no-op context manager used while metrics are disabled."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+class _Timer:
+    __slots__ = ('metrics', 'name', 'started')
+
+    def __init__(self, metrics: 'Metrics', name: str):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.started)
+        return False
+
+class Metrics:
+    """Registry of latency histograms, counters, gauges and cache hit rates.
+
+    Every recording method returns immediately while ``enabled`` is false,
+    so instrumented hot paths pay a single attribute check when metrics
+    are turned off.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Histogram] = {}
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, float] = {}
+        self._caches: Dict[str, list] = {}
+
+    def timer(self, name: str):
+        """Context manager recording the duration of its body under ``name``."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name)
+
+    def observe(self, name: str, seconds: float) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.observe(seconds)
+
+    def increment(self, name: str, amount: float = 1) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def set_gauge(self, name: str, value: float) -> None:
+        if not self.enabled:
+            return
+        self._gauges[name] = value
+
+    def record_cache(self, name: str, hit: bool) -> None:
+        """Count a lookup against the cache called ``name``."""
+        if not self.enabled:
+            return
+        with self._lock:
+            entry = self._caches.setdefault(name, [0, 0])
+            entry[0 if hit else 1] += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._gauges.clear()
+            self._caches.clear()
+
+    def stats(self) -> dict:
+        """Return a snapshot of everything recorded so far."""
+        with self._lock:
+            return {
+                'latency': {
+                    name: histogram.snapshot()
+                    for name, histogram in sorted(self._histograms.items())
+                },
+                'counters': dict(sorted(self._counters.items())),
+                'gauges': dict(sorted(self._gauges.items())),
+                'cache_hit_rates': {
+                    name: {
+                        'hits': hits,
+                        'misses': misses,
+                        'hit_rate': round(hits / (hits + misses), 4) if hits + misses else 0.0,
+                    }
+                    for name, (hits, misses) in sorted(self._caches.items())
+                },
+            }
+
+    def to_prometheus(self, prefix: str = 'timetracker') -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name, histogram in sorted(self._histograms.items()):
+                metric = _metric_name(prefix, name, 'seconds')
+                lines.append(f'# TYPE {metric} histogram')
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{{le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_bucket{{le="+Inf"}} {histogram.count}')
+                lines.append(f'{metric}_sum {histogram.total}')
+                lines.append(f'{metric}_count {histogram.count}')
+            for name, value in sorted(self._counters.items()):
+                metric = _metric_name(prefix, name, 'total')
+                lines.append(f'# TYPE {metric} counter')
+                lines.append(f'{metric} {value}')
+            for name, value in sorted(self._gauges.items()):
+                metric = _metric_name(prefix, name)
+                lines.append(f'# TYPE {metric} gauge')
+                lines.append(f'{metric} {value}')
+            for name, (hits, misses) in sorted(self._caches.items()):
+                metric = _metric_name(prefix, name, 'lookups_total')
+                lines.append(f'# TYPE {metric} counter')
+                lines.append(f'{metric}{{result="hit"}} {hits}')
+                lines.append(f'{metric}{{result="miss"}} {misses}')
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path: Path) -> None:
+        """Atomically write :meth:`to_prometheus` output for a textfile collector."""
+        path = Path(path).expanduser()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+        tmp_path.write_text(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+def _metric_name(prefix: str, name: str, suffix: Optional[str] = None) -> str:
+    parts = [prefix, name.replace('.', '_').replace('-', '_')]
+    if suffix:
+        parts.append(suffix)
+    return '_'.join(parts)
+
+# Shared disabled registry for components created without one
+NULL_METRICS = Metrics(enabled=False)
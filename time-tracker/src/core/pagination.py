@@ -0,0 +1,148 @@
+import bisect
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Set
+from .activity import Activity
+
+logger = logging.getLogger(__name__)
+
+# fetch(before, limit) -> newest-first activities starting before ``before``
+PageFetcher = Callable[[Optional[datetime], int], List[Activity]]
+
+class PageCache:
+    """Newest-first window onto stored history, loaded a page at a time.
+
+    Page ``i`` holds the activities starting before cursor ``i``; the next
+    cursor is the start time of its last row, so pages are keyset queries
+    and never re-read earlier rows. History is anchored at the time of the
+    last :meth:`reset`, which keeps row offsets stable while new activities
+    are saved. Pages are fetched on a background thread, ``prefetch_pages``
+    ahead of what was last asked for, and at most ``max_pages`` are kept in
+    memory; evicted pages keep their cursor and are refetched on demand.
+    """
+
+    def __init__(self, fetch: PageFetcher,
+                 page_size: int = 200,
+                 prefetch_pages: int = 2,
+                 max_pages: int = 50):
+        self.fetch = fetch
+        self.page_size = page_size
+        self.prefetch_pages = prefetch_pages
+        self.max_pages = max(max_pages, 2 * prefetch_pages + 1)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix='history-prefetch')
+        self._futures: List[Future] = []
+        self._generation = 0
+        self.reset()
+
+    def reset(self, anchor: Optional[datetime] = None) -> None:
+        """Forget loaded pages and show history from ``anchor`` (default now) back."""
+        with self._lock:
+            self._generation += 1
+            self._cursors: List[datetime] = [anchor or datetime.now()]
+            self._offsets: List[int] = [0]
+            self._pages: Dict[int, List[Activity]] = {}
+            self._requested: Set[int] = set()
+            self.complete = False
+
+    @property
+    def total_rows(self) -> int:
+        """Rows known so far, plus one page while older history may remain."""
+        with self._lock:
+            return self._offsets[-1] + (0 if self.complete else self.page_size)
+
+    @property
+    def pending(self) -> bool:
+        with self._lock:
+            return bool(self._requested)
+
+    def rows(self, offset: int, count: int) -> List[Activity]:
+        """Return the loaded rows from ``offset``, requesting any that are missing.
+
+        Never blocks on storage: fewer than ``count`` rows are returned while
+        pages are still loading.
+        """
+        with self._lock:
+            first = max(0, bisect.bisect_right(self._offsets, offset) - 1)
+            last = max(first, bisect.bisect_right(self._offsets, offset + count - 1) - 1)
+            self._request(first, last + self.prefetch_pages)
+            rows: List[Activity] = []
+            for index in range(first, last + 1):
+                page = self._pages.get(index)
+                if page is None:
+                    break
+                start = max(0, offset - self._offsets[index])
+                rows.extend(page[start:start + count - len(rows)])
+            return rows
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        """Wait for requested pages to finish loading."""
+        while True:
+            with self._lock:
+                futures = [future for future in self._futures if not future.done()]
+                self._futures = futures
+            if not futures:
+                return
+            futures[0].result(timeout)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _request(self, first: int, last: int) -> None:
+        # Called with the lock held
+        wanted = [
+            index for index in range(first, last + 1)
+            if index not in self._pages and index not in self._requested
+        ]
+        if not wanted or (self.complete and wanted[0] >= len(self._offsets) - 1):
+            return
+        self._requested.update(wanted)
+        self._futures.append(
+            self._executor.submit(self._load, self._generation, wanted, (first, last))
+        )
+
+    def _load(self, generation: int, indexes: List[int], window: tuple) -> None:
+        """Fetch pages in order; each one's last row gives the next cursor."""
+        try:
+            for index in indexes:
+                with self._lock:
+                    if generation != self._generation or index >= len(self._cursors):
+                        return
+                    before = self._cursors[index]
+                page = self.fetch(before, self.page_size)
+                with self._lock:
+                    if generation != self._generation:
+                        return
+                    self._store(index, page)
+                    self._evict(window)
+        except Exception as e:
+            logger.error(f"Failed to load history page: {e}", exc_info=True)
+        finally:
+            with self._lock:
+                if generation == self._generation:
+                    self._requested.difference_update(indexes)
+
+    def _store(self, index: int, page: List[Activity]) -> None:
+        self._pages[index] = page
+        if index == len(self._offsets) - 1:
+            # First load of the oldest page so far
+            self._offsets.append(self._offsets[index] + len(page))
+            if len(page) < self.page_size:
+                self.complete = True
+            else:
+                self._cursors.append(page[-1].start_time)
+
+    def _evict(self, window: tuple) -> None:
+        """Drop the pages farthest from ``window`` beyond ``max_pages``."""
+        if len(self._pages) <= self.max_pages:
+            return
+        first, last = window
+
+        def distance(index: int) -> int:
+            return first - index if index < first else max(0, index - last)
+
+        farthest = sorted(self._pages, key=distance, reverse=True)
+        for index in farthest[:len(self._pages) - self.max_pages]:
+            del self._pages[index]
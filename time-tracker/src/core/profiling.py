@@ -0,0 +1,72 @@
+import io
+import sys
+import pstats
+import cProfile
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+class SamplingProfiler:
+    """Low-overhead statistical profiler for a single thread.
+
+    A daemon thread periodically captures the target thread's stack via
+    ``sys._current_frames`` and counts identical stacks. The profiled
+    thread itself runs uninstrumented.
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.005, max_depth: int = 64):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples: Counter = Counter()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None and len(stack) < self.max_depth:
+                code = frame.f_code
+                stack.append(f"{Path(code.co_filename).name}:{code.co_name}:{frame.f_lineno}")
+                frame = frame.f_back
+            self.samples[';'.join(reversed(stack))] += 1
+
+    def top(self, limit: int = 20) -> List[Tuple[str, int]]:
+        """Return the most frequently sampled leaf functions."""
+        leaves: Counter = Counter()
+        for stack, count in self.samples.items():
+            leaves[stack.rsplit(';', 1)[-1]] += count
+        return leaves.most_common(limit)
+
+    def report(self, limit: int = 20) -> str:
+        total = sum(self.samples.values())
+        lines = [f"{total} samples every {self.interval * 1000:.1f} ms"]
+        for leaf, count in self.top(limit):
+            lines.append(f"{count / total:7.1%}  {leaf}" if total else leaf)
+        return '\n'.join(lines)
+
+    def write(self, path: Path) -> None:
+        """Write collapsed stacks, the input format of flamegraph tools."""
+        with Path(path).open('w') as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+def format_cprofile(profile: cProfile.Profile, limit: int = 30) -> str:
+    """Render the hottest functions of a cProfile run by cumulative time."""
+    stream = io.StringIO()
+    pstats.Stats(profile, stream=stream).sort_stats('cumulative').print_stats(limit)
+    return stream.getvalue()
@@ -0,0 +1,84 @@
+import math
+import time
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+from .tracker import ActivityTracker
+from ..monitors.replay_monitor import ReplayTrace
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class ReplayResult:
+    """Outcome of replaying a trace through a tracker."""
+    ticks: int
+    simulated_seconds: float
+    wall_seconds: float
+    
+    @property
+    def speedup(self) -> float:
+        return self.simulated_seconds / self.wall_seconds if self.wall_seconds else 0.0
+
+def _next_state_change(tracker: ActivityTracker, trace: ReplayTrace) -> Optional[datetime]:
+    """Earliest moment a tick could behave differently from the last one."""
+    candidates = []
+    next_event = trace.next_change()
+    if next_event:
+        candidates.append(next_event)
+    idle_since = trace.idle_since()
+    if idle_since and tracker.current_activity:
+        candidates.append(idle_since + timedelta(seconds=tracker.inactivity_threshold))
+    return min(candidates) if candidates else None
+
+def replay_trace(tracker: ActivityTracker,
+                 trace: ReplayTrace,
+                 fast_forward: bool = True,
+                 checkpoints: bool = False) -> ReplayResult:
+    """Drive ``tracker`` through ``trace`` as fast as possible.
+    
+    Every tick runs the tracker's real ``_update_activity`` logic against
+    the replay monitors. With ``fast_forward`` the clock jumps straight to
+    the first polling tick at or after the next event (or inactivity
+    timeout), skipping ticks that could not change any state, so the
+    result is identical to ticking every ``polling_interval``.
+    """
+    clock = trace.clock
+    if tracker.clock is not clock:
+        raise ValueError("Tracker must use the trace's clock")
+    
+    step = tracker.polling_interval
+    started_at = clock.now()
+    wall_start = time.perf_counter()
+    ticks = 0
+    
+    while True:
+        tracker._update_activity()
+        if checkpoints:
+            tracker._checkpoint_current_activity()
+        ticks += 1
+        
+        target = _next_state_change(tracker, trace)
+        if target is None:
+            break
+        steps = 1
+        if fast_forward:
+            remaining = (target - clock.now()).total_seconds()
+            steps = max(1, math.ceil(remaining / step))
+        clock.advance(steps * step)
+    
+    tracker._end_current_activity()
+    if tracker.coalescer:
+        tracker.coalescer.flush()
+    tracker.storage.flush()
+    
+    result = ReplayResult(
+        ticks=ticks,
+        simulated_seconds=(clock.now() - started_at).total_seconds(),
+        wall_seconds=time.perf_counter() - wall_start
+    )
+    logger.info(
+        f"Replayed {result.simulated_seconds / 86400:.1f} days in "
+        f"{result.wall_seconds:.2f}s ({result.speedup:,.0f}x)"
+    )
+    return result
@@ -0,0 +1,327 @@
+import os
+import json
+import logging
+import tempfile
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from threading import Thread, Event
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from .activity import DailyRollup
+from .clock import Clock, SystemClock
+from .storage import BaseStorage, create_storage
+
+logger = logging.getLogger(__name__)
+
+PERIODS = ('daily', 'weekly', 'monthly')
+REPORT_FORMATS = ('text', 'markdown')
+EXTENSIONS = {'text': 'txt', 'markdown': 'md'}
+
+# Ranges longer than this are split into one section per calendar month
+PARTITION_DAYS = 31
+
+def period_range(period: str, day: date) -> Tuple[date, date]:
+    """Return the ``[start, end)`` days of the period containing ``day``."""
+    if period == 'daily':
+        return day, day + timedelta(days=1)
+    if period == 'weekly':
+        start = day - timedelta(days=day.weekday())
+        return start, start + timedelta(days=7)
+    if period == 'monthly':
+        start = day.replace(day=1)
+        return start, _next_month(start)
+    raise ValueError(f"Unknown report period: {period}")
+
+def period_label(period: str, day: date) -> str:
+    if period == 'weekly':
+        year, week, _ = day.isocalendar()
+        return f"{year}-W{week:02d}"
+    if period == 'monthly':
+        return f"{day:%Y-%m}"
+    return day.isoformat()
+
+def month_partitions(start: date, end: date) -> List[Tuple[date, date]]:
+    """Split ``[start, end)`` at calendar month boundaries."""
+    partitions = []
+    while start < end:
+        boundary = min(_next_month(start.replace(day=1)), end)
+        partitions.append((start, boundary))
+        start = boundary
+    return partitions
+
+def _next_month(day: date) -> date:
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+@dataclass
+class ReportSection:
+    """Totals for one contiguous part of a report, in milliseconds."""
+    start: date
+    end: date
+    days: Dict[date, int] = field(default_factory=dict)
+    applications: Dict[str, int] = field(default_factory=dict)
+    activity_count: int = 0
+
+    @property
+    def total_ms(self) -> int:
+        return sum(self.days.values())
+
+    @classmethod
+    def from_rollups(cls, start: date, end: date,
+                     rollups: Iterable[DailyRollup]) -> 'ReportSection':
+        days: Dict[date, int] = defaultdict(int)
+        applications: Dict[str, int] = defaultdict(int)
+        count = 0
+        for rollup in rollups:
+            days[rollup.day] += rollup.total_ms
+            applications[rollup.process_name or 'Unknown'] += rollup.total_ms
+            count += rollup.activity_count
+        return cls(start, end, dict(days), dict(applications), count)
+
+def _partition_section(storage_config: dict, start: date, end: date) -> ReportSection:
+    """Build one partition in a worker process from its own storage handle."""
+    storage = create_storage(storage_config)
+    try:
+        return ReportSection.from_rollups(start, end, storage.get_rollups(start, end))
+    finally:
+        storage.close()
+
+class ReportGenerator:
+    """Renders reports from the daily per-application rollups.
+
+    Rollups are updated by the storage backend as each activity is saved,
+    so a report reads a few rows per day instead of scanning history.
+    Ranges spanning several months are split by month; with a
+    ``storage_config`` the months are built in parallel worker processes.
+    Output is produced section by section, so large reports are streamed.
+    """
+
+    def __init__(self, storage: BaseStorage,
+                 storage_config: Optional[dict] = None,
+                 report_format: str = 'text',
+                 group_by_application: bool = True,
+                 workers: Optional[int] = None):
+        if report_format not in REPORT_FORMATS:
+            raise ValueError(f"Unknown report format: {report_format}")
+        self.storage = storage
+        self.storage_config = storage_config
+        self.report_format = report_format
+        self.group_by_application = group_by_application
+        self.workers = workers
+
+    @classmethod
+    def from_config(cls, storage: BaseStorage, config: dict) -> 'ReportGenerator':
+        reporting_config = config.get('reporting', {})
+        return cls(
+            storage,
+            storage_config=config['storage'],
+            report_format=reporting_config.get('report_format', 'text'),
+            group_by_application=reporting_config.get('group_by_application', True),
+            workers=reporting_config.get('workers')
+        )
+
+    def sections(self, start: date, end: date) -> Iterator[ReportSection]:
+        """Yield the report's sections in order as they are built."""
+        if (end - start).days <= PARTITION_DAYS:
+            partitions = [(start, end)]
+        else:
+            partitions = month_partitions(start, end)
+        workers = min(self.workers or os.cpu_count() or 1, len(partitions))
+        if workers <= 1 or self.storage_config is None:
+            for part_start, part_end in partitions:
+                yield ReportSection.from_rollups(
+                    part_start, part_end, self.storage.get_rollups(part_start, part_end)
+                )
+            return
+        # Workers read the store from disk
+        self.storage.flush()
+        with ProcessPoolExecutor(workers) as pool:
+            yield from pool.map(
+                _partition_section,
+                [self.storage_config] * len(partitions),
+                [part_start for part_start, _ in partitions],
+                [part_end for _, part_end in partitions]
+            )
+
+    def render(self, title: str, start: date, end: date) -> Iterator[str]:
+        """Yield the report for ``[start, end)`` line by line."""
+        markdown = self.report_format == 'markdown'
+        last_day = end - timedelta(days=1)
+        span = start.isoformat() if start == last_day else f"{start} to {last_day}"
+        yield f"# {title}\n" if markdown else f"{title}\n{'=' * len(title)}\n"
+        yield f"\n{span}\n"
+
+        total_ms, total_count, section_count = 0, 0, 0
+        applications: Dict[str, int] = defaultdict(int)
+        partitioned = (end - start).days > PARTITION_DAYS
+        for section in self.sections(start, end):
+            section_count += 1
+            total_ms += section.total_ms
+            total_count += section.activity_count
+            for name, milliseconds in section.applications.items():
+                applications[name] += milliseconds
+            if partitioned:
+                heading = f"{section.start:%B %Y}"
+                yield f"\n## {heading}\n" if markdown else f"\n{heading}\n{'-' * len(heading)}\n"
+            yield from self._render_section(section, markdown)
+
+        if section_count > 1 and self.group_by_application:
+            heading = 'Overall'
+            yield f"\n## {heading}\n" if markdown else f"\n{heading}\n{'-' * len(heading)}\n"
+            yield from self._render_table('Application', applications, total_ms, markdown)
+        yield f"\nTotal: {_hours(total_ms)} across {total_count} activities\n"
+
+    def write(self, path: Path, title: str, start: date, end: date) -> Path:
+        """Stream a report to ``path``, replacing it only once complete."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=str(path.parent), prefix=f'.{path.name}.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.writelines(self.render(title, start, end))
+            os.replace(tmp_name, path)
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+        return path
+
+    def _render_section(self, section: ReportSection, markdown: bool) -> Iterator[str]:
+        if len(section.days) > 1 or (section.end - section.start).days > 1:
+            days = {
+                f"{day:%a %Y-%m-%d}": section.days.get(day, 0)
+                for day in _days(section.start, section.end)
+            }
+            yield from self._render_table('Day', days, section.total_ms, markdown, sort=False)
+        if self.group_by_application:
+            yield from self._render_table('Application', section.applications,
+                                          section.total_ms, markdown)
+
+    @staticmethod
+    def _render_table(label: str, rows: Dict[str, int], total: int,
+                      markdown: bool, sort: bool = True) -> Iterator[str]:
+        items = sorted(rows.items(), key=lambda item: (-item[1], item[0])) if sort else rows.items()
+        if markdown:
+            yield f"\n| {label} | Time | Share |\n|---|---:|---:|\n"
+        else:
+            width = max([len(label)] + [len(name) for name in rows])
+            yield f"\n{label:<{width}}  {'Time':>8}  {'Share':>6}\n"
+        for name, milliseconds in items:
+            share = f"{100 * milliseconds / total:.1f}%" if total else '-'
+            if markdown:
+                yield f"| {name} | {_hours(milliseconds)} | {share} |\n"
+            else:
+                yield f"{name:<{width}}  {_hours(milliseconds):>8}  {share:>6}\n"
+
+def _days(start: date, end: date) -> Iterator[date]:
+    day = start
+    while day < end:
+        yield day
+        day += timedelta(days=1)
+
+def _hours(milliseconds: int) -> str:
+    minutes = (milliseconds + 30000) // 60000
+    return f"{minutes // 60}h {minutes % 60:02d}m"
+
+class ReportScheduler:
+    """Writes the configured reports once a day at ``report_time``.
+
+    Weekly reports are written on the last day of the week and monthly ones
+    on the last day of the month. The last day reported is kept in
+    ``output_dir``, so restarts neither repeat nor skip the latest reports.
+    """
+
+    STATE_FILE = '.schedule.json'
+
+    def __init__(self, generator: ReportGenerator, output_dir: Path,
+                 report_time: time = time(23, 59),
+                 periods: Iterable[str] = PERIODS,
+                 interval: float = 60.0,
+                 clock: Optional[Clock] = None):
+        self.generator = generator
+        self.output_dir = Path(output_dir).expanduser()
+        self.report_time = report_time
+        self.periods = tuple(periods)
+        for period in self.periods:
+            if period not in PERIODS:
+                raise ValueError(f"Unknown report period: {period}")
+        self.interval = interval
+        self.clock = clock or SystemClock()
+        self.state_path = self.output_dir / self.STATE_FILE
+        self.stop_event = Event()
+        self.thread: Optional[Thread] = None
+
+    @classmethod
+    def from_config(cls, storage: BaseStorage, config: dict,
+                    clock: Optional[Clock] = None) -> 'ReportScheduler':
+        reporting_config = config.get('reporting', {})
+        return cls(
+            ReportGenerator.from_config(storage, config),
+            output_dir=reporting_config.get('output_dir', '~/.timetracker/reports'),
+            report_time=time.fromisoformat(reporting_config.get('daily_report_time', '23:59')),
+            periods=reporting_config.get('periods', PERIODS),
+            interval=reporting_config.get('check_interval', 60.0),
+            clock=clock
+        )
+
+    def due_day(self, now: datetime) -> date:
+        """The latest day whose reports should exist at ``now``."""
+        if now.time() >= self.report_time:
+            return now.date()
+        return now.date() - timedelta(days=1)
+
+    def run_pending(self, now: Optional[datetime] = None) -> List[Path]:
+        """Write the reports for the latest due day unless already written."""
+        day = self.due_day(now or self.clock.now())
+        last = self._load_last_day()
+        if last is not None and last >= day:
+            return []
+        written = [
+            self.write_report(period, day)
+            for period in self.periods
+            if period_range(period, day)[1] == day + timedelta(days=1)
+        ]
+        self._store_last_day(day)
+        return written
+
+    def write_report(self, period: str, day: date) -> Path:
+        """Write the ``period`` report containing ``day``."""
+        start, end = period_range(period, day)
+        label = period_label(period, day)
+        extension = EXTENSIONS[self.generator.report_format]
+        path = self.output_dir / f"{period}-{label}.{extension}"
+        self.generator.write(path, f"{period.capitalize()} report {label}", start, end)
+        logger.info(f"Wrote {period} report {path}")
+        return path
+
+    def start(self) -> None:
+        """Check for due reports every ``interval`` seconds in a background thread."""
+        if self.thread and self.thread.is_alive():
+            return
+        self.stop_event.clear()
+        self.thread = Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        if not self.thread:
+            return
+        self.stop_event.set()
+        self.thread.join()
+
+    def _run(self) -> None:
+        while not self.stop_event.wait(self.interval):
+            try:
+                self.run_pending()
+            except Exception as e:
+                logger.error(f"Error writing reports: {e}", exc_info=True)
+
+    def _load_last_day(self) -> Optional[date]:
+        try:
+            with self.state_path.open('r') as f:
+                return date.fromisoformat(json.load(f)['last_day'])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _store_last_day(self, day: date) -> None:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.state_path.write_text(json.dumps({'last_day': day.isoformat()}))
@@ -0,0 +1,99 @@
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from threading import Thread, Event
+from typing import Callable, Optional
+from .storage import BaseStorage
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class RetentionPolicy:
+    """How long each kind of data is kept. ``None`` keeps it forever."""
+    raw_days: Optional[float] = 365
+    rollup_days: Optional[float] = None
+
+    @classmethod
+    def from_config(cls, config: dict) -> 'RetentionPolicy':
+        return cls(
+            raw_days=config.get('raw_days', 365),
+            rollup_days=config.get('rollup_days')
+        )
+
+class RetentionEngine:
+    """Applies a retention policy in small batches on a background thread.
+
+    Raw activities are deleted in batches of ``batch_size`` so no single
+    storage call holds the store for long. Backends that rewrite the whole
+    file on every delete get all expired activities in one call instead,
+    as each batch would cost a full rewrite under the file lock. Daily
+    rollups are maintained by the storage backend on save, so expiring raw
+    data never loses totals. Passes only run while ``idle_check`` reports
+    the user as idle, and stop between batches as soon as activity resumes.
+    """
+
+    def __init__(self,
+                 storage: BaseStorage,
+                 policy: RetentionPolicy,
+                 batch_size: int = 500,
+                 interval: float = 3600.0,
+                 idle_check: Optional[Callable[[], bool]] = None,
+                 idle_poll_interval: float = 30.0):
+        self.storage = storage
+        self.policy = policy
+        self.batch_size = batch_size
+        self.interval = interval
+        self.idle_check = idle_check or (lambda: True)
+        self.idle_poll_interval = idle_poll_interval
+
+        self.stop_event = Event()
+        self.thread: Optional[Thread] = None
+
+    def run_once(self, now: Optional[datetime] = None) -> int:
+        """Run one retention pass. Returns the number of activities deleted."""
+        now = now or datetime.now()
+        deleted = 0
+
+        if self.policy.raw_days is not None:
+            cutoff = now - timedelta(days=self.policy.raw_days)
+            limit = self.batch_size if self.storage.incremental_deletes else None
+            while not self.stop_event.is_set() and self.idle_check():
+                batch = self.storage.delete_activities_before(cutoff, limit)
+                deleted += batch
+                if limit is None or batch < limit:
+                    break
+
+        if self.policy.rollup_days is not None:
+            cutoff_day = (now - timedelta(days=self.policy.rollup_days)).date()
+            self.storage.delete_rollups_before(cutoff_day)
+
+        if deleted:
+            self.storage.compact()
+            logger.info(f"Retention removed {deleted} activities")
+        return deleted
+
+    def start(self) -> None:
+        """Start periodic retention passes in a background thread."""
+        if self.thread and self.thread.is_alive():
+            return
+        self.stop_event.clear()
+        self.thread = Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread."""
+        if not self.thread:
+            return
+        self.stop_event.set()
+        self.thread.join()
+
+    def _run(self) -> None:
+        while not self.stop_event.wait(self.interval):
+            # Wait for an idle period before touching the store
+            while not self.idle_check():
+                if self.stop_event.wait(self.idle_poll_interval):
+                    return
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Error in retention pass: {e}", exc_info=True)
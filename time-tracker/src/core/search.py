@@ -0,0 +1,106 @@
+import re
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Letters and digits, like SQLite FTS5's default unicode61 tokenizer
+TOKEN_PATTERN = re.compile(r'[^\W_]+')
+
+# Columns searched by every backend
+SEARCH_FIELDS = ('process_name', 'window_title')
+
+Term = Tuple[str, bool]
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return TOKEN_PATTERN.findall(text.casefold()) if text else []
+
+def parse_query(query: str) -> List[Term]:
+    """Split a query into ``(token, is_prefix)`` terms that must all match.
+
+    A word ending in ``*`` matches any token starting with it.
+    """
+    terms = []
+    for word in query.split():
+        tokens = tokenize(word)
+        if not tokens:
+            continue
+        terms.extend((token, False) for token in tokens[:-1])
+        terms.append((tokens[-1], word.endswith('*')))
+    return terms
+
+def record_tokens(record: dict) -> Set[str]:
+    tokens: Set[str] = set()
+    for field in SEARCH_FIELDS:
+        tokens.update(tokenize(record.get(field)))
+    return tokens
+
+def matches(record: dict, terms: List[Term]) -> bool:
+    """Check a serialized activity against parsed terms without an index."""
+    tokens = record_tokens(record)
+    return all(
+        any(t.startswith(token) for t in tokens) if prefix else token in tokens
+        for token, prefix in terms
+    )
+
+def fts_query(terms: List[Term]) -> str:
+    """Render parsed terms as an FTS5 MATCH expression."""
+    return ' '.join(f'"{token}"*' if prefix else f'"{token}"' for token, prefix in terms)
+
+class InvertedIndex:
+    """Token to record-position postings for the file-based stores.
+
+    ``count`` is the number of records indexed, so positions ``0..count-1``
+    are covered and appends extend the index in place.
+    """
+
+    def __init__(self, postings: Optional[Dict[str, List[int]]] = None, count: int = 0):
+        self.postings: Dict[str, List[int]] = postings or {}
+        self.count = count
+        self._sorted_tokens: Optional[List[str]] = None
+
+    @classmethod
+    def build(cls, records: Iterable[dict]) -> 'InvertedIndex':
+        index = cls()
+        index.extend(records)
+        return index
+
+    def extend(self, records: Iterable[dict]) -> None:
+        """Index records appended after the ones already covered."""
+        for record in records:
+            for token in record_tokens(record):
+                postings = self.postings.get(token)
+                if postings is None:
+                    self.postings[token] = [self.count]
+                    self._sorted_tokens = None
+                else:
+                    postings.append(self.count)
+            self.count += 1
+
+    def lookup(self, token: str, prefix: bool = False) -> Set[int]:
+        if not prefix:
+            return set(self.postings.get(token, ()))
+        if self._sorted_tokens is None:
+            self._sorted_tokens = sorted(self.postings)
+        positions: Set[int] = set()
+        start = bisect_left(self._sorted_tokens, token)
+        for candidate in self._sorted_tokens[start:]:
+            if not candidate.startswith(token):
+                break
+            positions.update(self.postings[candidate])
+        return positions
+
+    def search(self, terms: List[Term]) -> Set[int]:
+        """Positions of records matching every term."""
+        result: Optional[Set[int]] = None
+        for token, prefix in terms:
+            positions = self.lookup(token, prefix)
+            result = positions if result is None else result & positions
+            if not result:
+                return set()
+        return result or set()
+
+    def to_dict(self) -> dict:
+        return {'count': self.count, 'postings': self.postings}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'InvertedIndex':
+        return cls(data['postings'], data['count'])
@@ -1,14 +1,80 @@
+import os
+import calendar
 import json
+import heapq
+import time
+import random
+import logging
 import sqlite3
+import tempfile
+import functools
+import threading
 from pathlib import Path
-from typing import List, Optional
-from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+from datetime import date, datetime, timedelta
 from abc import ABC, abstractmethod
-from .activity import Activity
+from contextlib import contextmanager
+from .activity import Activity, DailyRollup, milliseconds
+from .checkpoint import CheckpointSlot, decode_checkpoint
+from .metrics import NULL_METRICS
+from .search import InvertedIndex, fts_query, matches, parse_query
+from .interning import StringTable
+from .intervals import IntervalIndex
+from .locking import FileLock
+
+logger = logging.getLogger(__name__)
+
+def _instrumented(method):
+    """Record the latency of a storage API call when metrics are enabled."""
+    name = f'storage.{method.__name__}'
+    
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if not self.metrics.enabled:
+            return method(self, *args, **kwargs)
+        with self.metrics.timer(name):
+            return method(self, *args, **kwargs)
+    return wrapper
+
+# Backoff before retrying a write that found the database locked
+BUSY_BACKOFF = 0.05
+BUSY_BACKOFF_MAX = 1.0
+
+def _is_busy(error: sqlite3.OperationalError) -> bool:
+    code = getattr(error, 'sqlite_errorcode', None)  # Python 3.11+
+    if code is not None:
+        return code & 0xff in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+    message = str(error)
+    return 'locked' in message or 'busy' in message
+
+def _retry_busy(method):
+    """Retry a SQLite write that outlasted the busy timeout, with backoff."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        attempt = 0
+        while True:
+            try:
+                return method(self, *args, **kwargs)
+            except sqlite3.OperationalError as e:
+                if not _is_busy(e):
+                    raise
+                if attempt >= self.busy_retries:
+                    self.metrics.increment('storage.busy_failures')
+                    raise
+                self.metrics.increment('storage.busy_retries')
+                delay = min(BUSY_BACKOFF_MAX, BUSY_BACKOFF * 2 ** attempt)
+                time.sleep(delay * random.uniform(0.5, 1.0))
+                attempt += 1
+    return wrapper
 
 class BaseStorage(ABC):
     """Abstract base class for activity storage."""
     
+    # Replaced by the tracker with its own registry when metrics are enabled
+    metrics = NULL_METRICS
+    # Whether deleting a small batch costs less than deleting everything at once
+    incremental_deletes = True
+    
     @abstractmethod
     def save_activity(self, activity: Activity) -> None:
         """Save a single activity."""
@@ -25,25 +91,588 @@ class BaseStorage(ABC):
     def cleanup_old_activities(self, days: int = 30) -> None:
         """Remove activities older than specified days."""
         pass
+    
+    def save_activities(self, activities: List[Activity]) -> None:
+        """Save a batch of activities."""
+        for activity in activities:
+            self.save_activity(activity)
+    
+    def iter_activities(self,
+                        start_time: Optional[datetime] = None,
+                        end_time: Optional[datetime] = None,
+                        batch_size: int = 1000) -> Iterator[List[Activity]]:
+        """Yield activities within the time range in batches."""
+        activities = self.get_activities(start_time, end_time)
+        for i in range(0, len(activities), batch_size):
+            yield activities[i:i + batch_size]
+    
+    def get_page(self,
+                 before: Optional[datetime] = None,
+                 limit: int = 100) -> List[Activity]:
+        """Return up to ``limit`` activities starting before ``before``, newest first.
+        
+        Every activity sharing the start time of the last one is included, so
+        passing that start time as the next ``before`` never skips a row.
+        """
+        activities = [
+            activity for activity in self.get_activities()
+            if before is None or activity.start_time < before
+        ]
+        activities.sort(key=lambda activity: activity.start_time, reverse=True)
+        return _with_ties(activities, limit, lambda activity: activity.start_time)
+    
+    def get_overlapping(self, start_time: datetime, end_time: datetime) -> List[Activity]:
+        """Retrieve activities overlapping ``[start_time, end_time)``, by start time.
+        
+        Unlike :meth:`get_activities`, activities straddling either edge are
+        included. Activities without an end overlap everything after their start.
+        """
+        return sorted((
+            activity for activity in self.get_activities()
+            if activity.start_time < end_time
+            and (activity.end_time is None or activity.end_time > start_time)
+        ), key=lambda activity: activity.start_time)
+    
+    def get_activities_at(self, moment: datetime) -> List[Activity]:
+        """Retrieve the activities in progress at ``moment``."""
+        return [
+            activity for activity in self.get_overlapping(moment, moment + timedelta(microseconds=1))
+            if activity.start_time <= moment
+        ]
+    
+    def flush(self) -> None:
+        """Make any buffered writes durable."""
+        pass
+    
+    def has_pending_writes(self) -> bool:
+        """Whether saved activities are buffered and not durable yet."""
+        return False
+    
+    def save_checkpoint(self, activities: List[Activity]) -> None:
+        """Record the in-progress activity and ended ones not durable yet."""
+        pass
+    
+    def load_checkpoint(self) -> List[Activity]:
+        """Return the activities of the last checkpoint."""
+        return []
+    
+    def clear_checkpoint(self) -> None:
+        """Discard the checkpoint."""
+        pass
+    
+    def close(self) -> None:
+        """Flush pending writes and release resources."""
+        self.flush()
+    
+    def get_rollups(self,
+                    start_day: Optional[date] = None,
+                    end_day: Optional[date] = None) -> List[DailyRollup]:
+        """Retrieve per-application daily totals for ``start_day <= day < end_day``."""
+        totals: Dict[tuple, list] = {}
+        for activity in self.get_activities():
+            if not activity.end_time:
+                continue
+            day = activity.start_time.date()
+            if (start_day and day < start_day) or (end_day and day >= end_day):
+                continue
+            entry = totals.setdefault((day, activity.process_name or ''), [0, 0])
+            entry[0] += activity.duration_ms
+            entry[1] += 1
+        return [
+            DailyRollup(day, process_name, total_ms, count)
+            for (day, process_name), (total_ms, count) in sorted(totals.items())
+        ]
+    
+    @abstractmethod
+    def delete_activities_before(self, cutoff: datetime, limit: Optional[int] = 500) -> int:
+        """Delete up to ``limit`` of the oldest activities starting before ``cutoff``.
+        
+        ``None`` deletes all of them. Daily rollups are left untouched.
+        Returns the number of activities deleted.
+        """
+        pass
+    
+    @abstractmethod
+    def delete_rollups_before(self, day: date) -> int:
+        """Delete daily rollups older than ``day``. Returns the number deleted."""
+        pass
+    
+    def compact(self) -> None:
+        """Reclaim space freed by deletions."""
+        pass
+    
+    def search(self,
+               query: str,
+               start_time: Optional[datetime] = None,
+               end_time: Optional[datetime] = None,
+               limit: int = 100) -> List[Activity]:
+        """Find activities whose process name or window title match ``query``.
+        
+        Every word must match a token; a word ending in ``*`` is a prefix.
+        Results are newest first.
+        """
+        terms = parse_query(query)
+        if not terms:
+            return []
+        results = [
+            activity for activity in self.get_activities(start_time, end_time)
+            if matches(activity.to_dict(), terms)
+        ]
+        results.sort(key=lambda activity: activity.start_time, reverse=True)
+        return results[:limit]
+    
+    @abstractmethod
+    def recategorize(self,
+                     categorize: Callable[[Optional[str], Optional[str]], Optional[str]],
+                     batch_size: int = 1000) -> int:
+        """Set every activity's category to ``categorize(process_name, window_title)``.
+        
+        Returns the number of activities whose category changed.
+        """
+        pass
+
+def _with_ties(ordered: list, limit: int, key: Callable) -> list:
+    """Cut a sorted list after ``limit`` items, extended to the end of the last key's run."""
+    if len(ordered) <= limit:
+        return ordered
+    boundary = key(ordered[limit - 1])
+    end = limit
+    while end < len(ordered) and key(ordered[end]) == boundary:
+        end += 1
+    return ordered[:end]
+
+def _duration_ms(record: dict) -> int:
+    """Duration of a serialized activity in milliseconds.
+    
+    Records saved before durations were kept in milliseconds are timed from
+    their timestamps rather than from their rounded minutes.
+    """
+    duration = record.get('duration_ms')
+    if duration is not None:
+        return duration
+    if not record.get('end_time'):
+        return 0
+    return milliseconds(datetime.fromisoformat(record['end_time'])
+                        - datetime.fromisoformat(record['start_time']))
+
+def _accumulate_rollups(rollups: Dict[str, Dict[str, list]], records: List[dict]) -> None:
+    """Add serialized activities to a ``{day: {process: [milliseconds, count]}}`` map."""
+    for record in records:
+        if not record.get('end_time'):
+            continue
+        day = record['start_time'][:10]
+        entry = rollups.setdefault(day, {}).setdefault(record.get('process_name') or '', [0, 0])
+        entry[0] += _duration_ms(record)
+        entry[1] += 1
+
+# Version of the rollup sidecars; version 1 was the bare map in float minutes
+ROLLUPS_VERSION = 2
+
+def _load_rollups(path: Path) -> Optional[Dict[str, Dict[str, list]]]:
+    """Read a rollup sidecar, or None if there is none."""
+    if not path.exists():
+        return None
+    with path.open('r') as f:
+        data = json.load(f)
+    if data.get('version') == ROLLUPS_VERSION:
+        return data['days']
+    # Converted rather than rebuilt: retention may have removed the raw records
+    return {
+        day: {process: [round(minutes * 60000), count]
+              for process, (minutes, count) in processes.items()}
+        for day, processes in data.items()
+    }
+
+def _rollups_document(rollups: Dict[str, Dict[str, list]]) -> dict:
+    return {'version': ROLLUPS_VERSION, 'days': rollups}
+
+# Record fields of the JSON store, in on-disk column order
+JSON_COLUMNS = ('name', 'start_time', 'end_time', 'process_name',
+                'window_title', 'category', 'duration_ms')
+JSON_STRING_COLUMNS = ('name', 'process_name', 'window_title', 'category')
+
+def encode_records(records: List[dict], generation: int = 0) -> dict:
+    """Dictionary-encode serialized activities for the JSON store.
+    
+    Repeated names, titles, applications and categories are stored once in
+    a string table and rows refer to them by index. ``generation`` changes
+    whenever records are removed, so positions cached by another process
+    can be recognized as stale.
+    """
+    table = StringTable()
+    id_for = table.id_for
+    rows = [
+        [
+            id_for(record['name']),
+            record['start_time'],
+            record.get('end_time'),
+            id_for(record.get('process_name')),
+            id_for(record.get('window_title')),
+            id_for(record.get('category')),
+            _duration_ms(record),
+        ]
+        for record in records
+    ]
+    return {'format': 2, 'generation': generation, 'columns': list(JSON_COLUMNS),
+            'strings': table.strings, 'rows': rows}
+
+def decode_records(data) -> List[dict]:
+    """Decode a JSON store, in either the encoded or the original list format."""
+    if isinstance(data, list):
+        return data
+    strings = data['strings']
+    columns = data['columns']
+    string_indexes = [i for i, column in enumerate(columns) if column in JSON_STRING_COLUMNS]
+    records = []
+    for row in data['rows']:
+        for i in string_indexes:
+            if row[i] is not None:
+                row[i] = strings[row[i]]
+        records.append(dict(zip(columns, row)))
+    return records
+
+DURABILITY_POLICIES = ('always', 'interval', 'never')
+
+# Records indexed in memory before the search sidecar is rewritten
+SEARCH_PERSIST_EVERY = 1000
 
 class JSONStorage(BaseStorage):
-    """JSON file-based storage implementation."""
+    """JSON file-based storage implementation.
+    
+    The file is replaced atomically on every write (write to a temp file,
+    then rename), so a crash never leaves a truncated history behind.
+    The durability policy controls fsync cost:
+    
+    - ``always``: every save is written and fsynced before returning.
+    - ``interval``: saves are buffered and group-committed with a single
+      write and fsync at most every ``fsync_interval`` seconds.
+    - ``never``: every save is written atomically but never fsynced.
+    
+    Several processes can share the file. Every read-modify-write holds an
+    exclusive ``flock`` on a ``.lock`` sidecar and reads hold it shared, so
+    concurrent appends are never lost.
+    """
+    
+    # Every delete rewrites the whole file
+    incremental_deletes = False
     
-    def __init__(self, filepath: Path):
+    def __init__(self, filepath: Path, durability: str = 'always',
+                 fsync_interval: float = 5.0, lock_timeout: Optional[float] = None):
+        if durability not in DURABILITY_POLICIES:
+            raise ValueError(f"Unknown durability policy: {durability}")
         self.filepath = filepath
+        self.durability = durability
+        self.fsync_interval = fsync_interval
+        self._pending: List[dict] = []
+        self._last_commit = time.monotonic()
+        self._lock = threading.RLock()
+        self._cache_key: Optional[tuple] = None
+        self._cache: List[dict] = []
+        self._cache_generation = 0
+        self._generation = 0
         self.filepath.parent.mkdir(parents=True, exist_ok=True)
-        if not self.filepath.exists():
-            self.filepath.write_text('[]')
+        self._file_lock = FileLock(self.filepath.with_name(self.filepath.name + '.lock'),
+                                   timeout=lock_timeout)
+        with self._locked(exclusive=True):
+            if not self.filepath.exists():
+                self._write_activities([])
+        self._checkpoint = CheckpointSlot(
+            self.filepath.with_name(self.filepath.name + '.checkpoint'),
+            fsync=durability != 'never'
+        )
+        self.rollups_path = self.filepath.with_name(self.filepath.name + '.rollups')
+        self.search_path = self.filepath.with_name(self.filepath.name + '.search')
+        self._search_index: Optional[InvertedIndex] = None
+        self._search_persisted = 0
+        self._interval_index: Optional[IntervalIndex] = None
     
+    @_instrumented
     def save_activity(self, activity: Activity) -> None:
-        activities = self._read_activities()
-        activities.append(activity.to_dict())
-        self._write_activities(activities)
+        with self._lock:
+            self._pending.append(activity.to_dict())
+            if (self.durability != 'interval' or
+                    time.monotonic() - self._last_commit >= self.fsync_interval):
+                self._commit()
+            self.metrics.set_gauge('storage.pending_writes', len(self._pending))
     
+    @_instrumented
+    def save_activities(self, activities: List[Activity]) -> None:
+        with self._lock:
+            self._pending.extend(activity.to_dict() for activity in activities)
+            self._commit()
+    
+    def flush(self) -> None:
+        with self._lock:
+            if self._pending:
+                self._commit()
+    
+    def has_pending_writes(self) -> bool:
+        return bool(self._pending)
+    
+    def close(self) -> None:
+        self.flush()
+        with self._locked():
+            if self._search_index and self._search_index.count != self._search_persisted:
+                self._store_search_index(self._search_index)
+        self._checkpoint.close()
+        self._file_lock.close()
+    
+    def save_checkpoint(self, activities: List[Activity]) -> None:
+        self._checkpoint.save(activities)
+    
+    def load_checkpoint(self) -> List[Activity]:
+        return self._checkpoint.load()
+    
+    def clear_checkpoint(self) -> None:
+        self._checkpoint.clear()
+    
+    @contextmanager
+    def _locked(self, exclusive: bool = False):
+        """Hold the thread lock and the cross-process file lock."""
+        with self._lock:
+            hold = self._file_lock.exclusive if exclusive else self._file_lock.shared
+            with hold() as waited:
+                self.metrics.observe('storage.lock_wait', waited)
+                yield
+    
+    def _commit(self) -> None:
+        """Write all pending activities in a single atomic replace."""
+        with self._locked(exclusive=True):
+            # Re-read under the lock: other processes may have appended
+            activities = self._read_activities()
+            rollups = self._read_rollups(activities)
+            search_index = self._load_search_index(activities)
+            activities.extend(self._pending)
+            self._write_activities(activities)
+            _accumulate_rollups(rollups, self._pending)
+            self._atomic_write(self.rollups_path, _rollups_document(rollups))
+            search_index.extend(self._pending)
+            if search_index.count - self._search_persisted >= SEARCH_PERSIST_EVERY:
+                self._store_search_index(search_index)
+            self._pending = []
+            self._last_commit = time.monotonic()
+    
+    @_instrumented
+    def get_rollups(self,
+                    start_day: Optional[date] = None,
+                    end_day: Optional[date] = None) -> List[DailyRollup]:
+        with self._locked():
+            rollups = self._read_rollups()
+            _accumulate_rollups(rollups, self._pending)
+        start_key = start_day.isoformat() if start_day else ''
+        end_key = end_day.isoformat() if end_day else '9999'
+        return [
+            DailyRollup(date.fromisoformat(day), process_name, total_ms, count)
+            for day in sorted(rollups)
+            if start_key <= day < end_key
+            for process_name, (total_ms, count) in sorted(rollups[day].items())
+        ]
+    
+    @_instrumented
+    def delete_activities_before(self, cutoff: datetime, limit: Optional[int] = 500) -> int:
+        with self._locked(exclusive=True):
+            self.flush()
+            activities = self._read_activities()
+            expired = [
+                index for index, activity in enumerate(activities)
+                if datetime.fromisoformat(activity['start_time']) < cutoff
+            ]
+            if limit is not None:
+                expired.sort(key=lambda index: activities[index]['start_time'])
+                expired = expired[:limit]
+            doomed = set(expired)
+            if doomed:
+                self._drop_position_indexes()
+                self._write_activities([
+                    activity for index, activity in enumerate(activities)
+                    if index not in doomed
+                ])
+            return len(doomed)
+    
+    def delete_rollups_before(self, day: date) -> int:
+        with self._locked(exclusive=True):
+            rollups = self._read_rollups()
+            expired = [key for key in rollups if key < day.isoformat()]
+            if expired:
+                deleted = sum(len(rollups.pop(key)) for key in expired)
+                self._atomic_write(self.rollups_path, _rollups_document(rollups))
+                return deleted
+            return 0
+    
+    @_instrumented
+    def recategorize(self,
+                     categorize: Callable[[Optional[str], Optional[str]], Optional[str]],
+                     batch_size: int = 1000) -> int:
+        # The whole file is rewritten on any change, so one pass is one batch
+        with self._locked(exclusive=True):
+            self.flush()
+            activities = self._read_activities()
+            changed = 0
+            for index, record in enumerate(activities):
+                category = categorize(record.get('process_name'), record.get('window_title'))
+                if category != record.get('category'):
+                    activities[index] = dict(record, category=category)
+                    changed += 1
+            if changed:
+                self._write_activities(activities)
+            return changed
+    
+    @_instrumented
+    def search(self,
+               query: str,
+               start_time: Optional[datetime] = None,
+               end_time: Optional[datetime] = None,
+               limit: int = 100) -> List[Activity]:
+        terms = parse_query(query)
+        if not terms:
+            return []
+        with self._locked():
+            activities = self._read_activities()
+            records = [activities[position]
+                       for position in self._load_search_index(activities).search(terms)]
+            records.extend(record for record in self._pending if matches(record, terms))
+        
+        # ISO timestamps order like the datetimes they encode, so only the
+        # returned records are parsed
+        start_key = start_time.isoformat() if start_time else None
+        end_key = end_time.isoformat() if end_time else None
+        records = heapq.nlargest(limit, (
+            record for record in records
+            if not (start_key and record['start_time'] < start_key)
+            and not (end_key and record['end_time'] and record['end_time'] > end_key)
+        ), key=lambda record: record['start_time'])
+        return [Activity.from_dict(record) for record in records]
+    
+    @_instrumented
+    def get_page(self,
+                 before: Optional[datetime] = None,
+                 limit: int = 100) -> List[Activity]:
+        with self._locked():
+            records = self._read_activities() + self._pending
+        before_key = before.isoformat() if before else None
+        if before_key:
+            records = [record for record in records if record['start_time'] < before_key]
+        page = heapq.nlargest(limit, records, key=lambda record: record['start_time'])
+        if len(page) == limit:
+            boundary = page[-1]['start_time']
+            page = [record for record in page if record['start_time'] != boundary]
+            page.extend(record for record in records if record['start_time'] == boundary)
+        return [Activity.from_dict(record) for record in page]
+    
+    @_instrumented
+    def get_overlapping(self, start_time: datetime, end_time: datetime) -> List[Activity]:
+        with self._locked():
+            activities = self._read_activities()
+            records = [activities[position] for position in
+                       self._load_interval_index(activities).overlapping(
+                           start_time.isoformat(), end_time.isoformat())]
+            pending = list(self._pending)
+        start_key, end_key = start_time.isoformat(), end_time.isoformat()
+        records.extend(
+            record for record in pending
+            if record['start_time'] < end_key
+            and (record.get('end_time') is None or record['end_time'] > start_key)
+        )
+        records.sort(key=lambda record: record['start_time'])
+        return [Activity.from_dict(record) for record in records]
+    
+    @_instrumented
+    def get_activities_at(self, moment: datetime) -> List[Activity]:
+        key = moment.isoformat()
+        with self._locked():
+            activities = self._read_activities()
+            records = [activities[position]
+                       for position in self._load_interval_index(activities).at(key)]
+            pending = list(self._pending)
+        records.extend(
+            record for record in pending
+            if record['start_time'] <= key
+            and (record.get('end_time') is None or record['end_time'] > key)
+        )
+        records.sort(key=lambda record: record['start_time'])
+        return [Activity.from_dict(record) for record in records]
+    
+    def _load_interval_index(self, activities: List[dict]) -> IntervalIndex:
+        """Return the interval index covering ``activities``, catching it up if behind."""
+        index = self._interval_index
+        if index is None or index.count > len(activities):
+            index = IntervalIndex()
+        if index.count < len(activities):
+            index.extend((record['start_time'], record.get('end_time'))
+                         for record in activities[index.count:])
+        self._interval_index = index
+        return index
+    
+    def _load_search_index(self, activities: List[dict]) -> InvertedIndex:
+        """Return the index covering ``activities``, catching it up if behind.
+        
+        Records are only ever appended between deletions, and deletions drop
+        the index, so an index covering fewer records is a valid prefix.
+        """
+        index = self._search_index
+        if index is None or index.count > len(activities):
+            index = None
+            try:
+                with self.search_path.open('r') as f:
+                    data = json.load(f)
+                if data.get('generation', 0) == self._generation:
+                    index = InvertedIndex.from_dict(data)
+                    self._search_persisted = index.count
+            except (OSError, ValueError, KeyError, AttributeError):
+                pass
+            if index is None or index.count > len(activities):
+                index = InvertedIndex()
+                self._search_persisted = 0
+        if index.count < len(activities):
+            index.extend(activities[index.count:])
+            if index.count - self._search_persisted >= SEARCH_PERSIST_EVERY:
+                self._store_search_index(index)
+        self._search_index = index
+        return index
+    
+    def _store_search_index(self, index: InvertedIndex) -> None:
+        # Derived data: a stale or torn sidecar is caught up or rebuilt on load
+        self._atomic_write(self.search_path, dict(index.to_dict(), generation=self._generation),
+                           durable=False)
+        self._search_index = index
+        self._search_persisted = index.count
+    
+    def _drop_position_indexes(self) -> None:
+        """Discard the indexes before positions shift; they are rebuilt on demand.
+        
+        Also starts a new generation, so other processes drop theirs too.
+        """
+        self._generation += 1
+        self._interval_index = None
+        self._search_index = None
+        self._search_persisted = 0
+        if self.search_path.exists():
+            self.search_path.unlink()
+    
+    def _read_rollups(self, activities: Optional[List[dict]] = None) -> Dict[str, Dict[str, list]]:
+        """Load the rollup sidecar, building it from history if missing."""
+        rollups = _load_rollups(self.rollups_path)
+        if rollups is not None:
+            return rollups
+        rollups = {}
+        _accumulate_rollups(rollups, activities if activities is not None
+                            else self._read_activities())
+        return rollups
+    
+    @_instrumented
     def get_activities(self,
                       start_time: Optional[datetime] = None,
                       end_time: Optional[datetime] = None) -> List[Activity]:
-        activities = self._read_activities()
+        with self._locked():
+            activities = self._read_activities()
+            if start_time or end_time:
+                # Only records that can match are parsed and checked below
+                index = self._load_interval_index(activities)
+                activities = [activities[position] for position in index.within(
+                    start_time.isoformat() if start_time else None,
+                    end_time.isoformat() if end_time else None
+                )]
+            activities += self._pending
         filtered_activities = []
         
         for activity_dict in activities:
@@ -60,64 +689,608 @@ class JSONStorage(BaseStorage):
     
     def cleanup_old_activities(self, days: int = 30) -> None:
         cutoff_date = datetime.now() - timedelta(days=days)
-        activities = self._read_activities()
-        
-        filtered_activities = [
-            activity for activity in activities
-            if datetime.fromisoformat(activity['start_time']) > cutoff_date
-        ]
-        
-        self._write_activities(filtered_activities)
+        with self._locked(exclusive=True):
+            activities = self._read_activities() + self._pending
+            
+            filtered_activities = [
+                activity for activity in activities
+                if datetime.fromisoformat(activity['start_time']) > cutoff_date
+            ]
+            
+            self._drop_position_indexes()
+            self._write_activities(filtered_activities)
+            self._pending = []
+            self._last_commit = time.monotonic()
     
     def _read_activities(self) -> List[dict]:
+        """Return the stored records, reusing the last parse if the file is unchanged."""
         with self.filepath.open('r') as f:
-            return json.load(f)
+            key = _file_identity(os.fstat(f.fileno()))
+            if key == self._cache_key:
+                self.metrics.record_cache('json_read', True)
+            else:
+                self.metrics.record_cache('json_read', False)
+                data = json.load(f)
+                self._cache_key, self._cache = key, decode_records(data)
+                self._cache_generation = data.get('generation', 0) if isinstance(data, dict) else 0
+        if self._cache_generation != self._generation:
+            # Another process removed records; cached positions no longer hold
+            self._generation = self._cache_generation
+            self._interval_index = None
+            self._search_index = None
+        return list(self._cache)
     
     def _write_activities(self, activities: List[dict]) -> None:
-        with self.filepath.open('w') as f:
-            json.dump(activities, f, indent=2)
+        """Atomically replace the store with ``activities``."""
+        self._atomic_write(self.filepath, encode_records(activities, self._generation))
+        self._cache_key = _file_identity(self.filepath.stat())
+        self._cache = activities
+        self._cache_generation = self._generation
+    
+    def _atomic_write(self, path: Path, data, indent: Optional[int] = None,
+                      durable: bool = True) -> None:
+        """Replace ``path`` with ``data`` serialized as JSON, crash-safely."""
+        fsync = durable and self.durability != 'never'
+        fd, tmp_name = tempfile.mkstemp(
+            dir=str(path.parent),
+            prefix=f'.{path.name}.',
+            suffix='.tmp'
+        )
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f, indent=indent)
+                f.flush()
+                if fsync:
+                    os.fsync(f.fileno())
+            os.replace(tmp_name, path)
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+        if fsync:
+            self._fsync_directory()
+    
+    def _fsync_directory(self) -> None:
+        """Persist the rename itself by syncing the parent directory."""
+        if os.name != 'posix':
+            return
+        dir_fd = os.open(str(self.filepath.parent), os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+def _epoch_seconds(moment: datetime) -> int:
+    """Whole seconds since the epoch, matching SQLite's ``strftime('%s')``."""
+    if moment.tzinfo is not None:
+        return int(moment.timestamp())
+    return calendar.timegm(moment.timetuple())
+
+def _file_identity(stat: os.stat_result) -> tuple:
+    # Atomic replaces always produce a new inode, so this changes on every write
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+@contextmanager
+def _sqlite_connection(path: Path, timeout: float = 5.0) -> Iterator[sqlite3.Connection]:
+    """Connection for one transaction, committed on success and then closed.
+
+    ``with sqlite3.connect(...)`` only ends the transaction: the connection
+    and its WAL file descriptors stay open until the garbage collector
+    finds them, which in a long-running tracker is hundreds of handles.
+    """
+    conn = sqlite3.connect(str(path), timeout=timeout)
+    try:
+        with conn:
+            yield conn
+    finally:
+        conn.close()
 
 class SQLiteStorage(BaseStorage):
-    """SQLite-based storage implementation."""
+    """SQLite-based storage implementation.
+    
+    Application names and titles are dictionary-encoded: ``activities``
+    refers to rows of ``apps`` and ``titles`` by id, and reads go through
+    the ``activity_view`` view that joins them back.
     
-    def __init__(self, filepath: Path):
+    The database is kept in WAL mode so readers in other processes never
+    wait for a writer. Connections wait up to ``busy_timeout`` seconds for
+    another writer to finish, and writes that still find the database
+    locked are retried up to ``busy_retries`` times with backoff.
+    """
+    
+    def __init__(self, filepath: Path, busy_timeout: float = 30.0, busy_retries: int = 5):
         self.filepath = filepath
+        self.busy_timeout = busy_timeout
+        self.busy_retries = busy_retries
         self.filepath.parent.mkdir(parents=True, exist_ok=True)
+        self._app_ids: Dict[str, int] = {}
+        self._title_ids: Dict[str, int] = {}
         self._init_db()
     
+    def _connect(self):
+        return _sqlite_connection(self.filepath, self.busy_timeout)
+    
+    @_retry_busy
     def _init_db(self):
-        with sqlite3.connect(str(self.filepath)) as conn:
+        with self._connect() as conn:
+            # Lets compact() reclaim pages. It must come before the switch to
+            # WAL, which makes SQLite ignore it on a new database
+            conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            journal_mode = conn.execute('PRAGMA journal_mode = WAL').fetchone()[0]
+            if journal_mode.lower() != 'wal':
+                logger.warning(f"WAL unavailable for {self.filepath}; readers may wait for writers")
+            if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+                # Created without it: existing databases only pick it up on a rebuild
+                logger.info(f"Rebuilding {self.filepath} once to enable incremental vacuum")
+                conn.execute('VACUUM')
+            legacy = 'process_name' in self._columns(conn, 'activities')
+            if legacy:
+                # Version 1 stored strings inline: move it aside in one transaction
+                conn.execute('BEGIN')
+                for trigger in ('activities_rollup', 'activities_fts_insert',
+                                'activities_fts_delete', 'activities_fts_update'):
+                    conn.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+                conn.execute('DROP TABLE IF EXISTS activities_fts')
+                conn.execute('DROP INDEX IF EXISTS idx_activities_start_time')
+                conn.execute('ALTER TABLE activities RENAME TO activities_v1')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS apps (
+                    id INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL UNIQUE
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS titles (
+                    id INTEGER PRIMARY KEY,
+                    title TEXT NOT NULL UNIQUE
+                )
+            ''')
             conn.execute('''
                 CREATE TABLE IF NOT EXISTS activities (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
+                    name_id INTEGER NOT NULL REFERENCES titles (id),
                     start_time TEXT NOT NULL,
                     end_time TEXT,
-                    process_name TEXT,
-                    window_title TEXT,
-                    category TEXT
+                    app_id INTEGER REFERENCES apps (id),
+                    title_id INTEGER REFERENCES titles (id),
+                    category TEXT,
+                    duration_ms INTEGER
                 )
             ''')
+            if 'duration_ms' not in self._columns(conn, 'activities'):
+                # Version 2 had no stored duration: add it in the same transaction
+                if not conn.in_transaction:
+                    conn.execute('BEGIN')
+                conn.execute('ALTER TABLE activities ADD COLUMN duration_ms INTEGER')
+                conn.execute(f'''
+                    UPDATE activities SET duration_ms = {self.DURATION_MS_SQL}
+                    WHERE end_time IS NOT NULL
+                ''')
+            conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_activities_start_time
+                ON activities (start_time)
+            ''')
+            # Rows with their strings resolved, in the column order of _from_row
+            conn.execute('''
+                CREATE VIEW IF NOT EXISTS activity_view AS
+                SELECT activities.id AS id, names.title AS name,
+                       activities.start_time AS start_time, activities.end_time AS end_time,
+                       apps.name AS process_name, titles.title AS window_title,
+                       activities.category AS category
+                FROM activities
+                JOIN titles AS names ON names.id = activities.name_id
+                LEFT JOIN apps ON apps.id = activities.app_id
+                LEFT JOIN titles ON titles.id = activities.title_id
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS checkpoint (
+                    slot INTEGER PRIMARY KEY CHECK (slot = 0),
+                    data TEXT NOT NULL
+                )
+            ''')
+            if legacy:
+                self._migrate_legacy(conn)
+            self._init_rollups(conn)
+            self._init_search(conn)
+            self._init_intervals(conn)
     
-    def save_activity(self, activity: Activity) -> None:
-        with sqlite3.connect(str(self.filepath)) as conn:
+    # Milliseconds between a row's timestamps, for rows saved without a duration
+    DURATION_MS_SQL = '''
+        CAST(ROUND((julianday(end_time) - julianday(start_time)) * 86400000) AS INTEGER)
+    '''
+    
+    @staticmethod
+    def _columns(conn: sqlite3.Connection, table: str) -> set:
+        return {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+    
+    def _migrate_legacy(self, conn: sqlite3.Connection) -> None:
+        """Copy version 1 rows into the dictionary-encoded tables, keeping ids."""
+        logger.info(f"Migrating {self.filepath} to dictionary-encoded storage")
+        conn.execute('''
+            INSERT OR IGNORE INTO apps (name)
+            SELECT DISTINCT process_name FROM activities_v1 WHERE process_name IS NOT NULL
+        ''')
+        conn.execute('''
+            INSERT OR IGNORE INTO titles (title)
+            SELECT name FROM activities_v1
+            UNION SELECT window_title FROM activities_v1 WHERE window_title IS NOT NULL
+        ''')
+        conn.execute(f'''
+            INSERT INTO activities
+            (id, name_id, start_time, end_time, app_id, title_id, category, duration_ms)
+            SELECT v1.id, names.id, v1.start_time, v1.end_time, apps.id, titles.id, v1.category,
+                   {self.DURATION_MS_SQL}
+            FROM activities_v1 AS v1
+            JOIN titles AS names ON names.title = v1.name
+            LEFT JOIN apps ON apps.name = v1.process_name
+            LEFT JOIN titles ON titles.title = v1.window_title
+            ORDER BY v1.id
+        ''')
+        # Keep handing out ids above any ever used, as AUTOINCREMENT promises
+        conn.execute("DELETE FROM sqlite_sequence WHERE name = 'activities'")
+        conn.execute("UPDATE sqlite_sequence SET name = 'activities' WHERE name = 'activities_v1'")
+        conn.execute('DROP TABLE activities_v1')
+    
+    def _init_rollups(self, conn: sqlite3.Connection) -> None:
+        """Create the daily rollup table, kept current by an insert trigger."""
+        columns = self._columns(conn, 'daily_rollups')
+        legacy = 'process_name' in columns
+        in_minutes = not legacy and 'total_minutes' in columns
+        if legacy:
+            conn.execute('ALTER TABLE daily_rollups RENAME TO daily_rollups_v1')
+        elif in_minutes:
+            # Version 2 summed rounded minutes as REAL
+            if not conn.in_transaction:
+                conn.execute('BEGIN')
+            conn.execute('DROP TRIGGER IF EXISTS activities_rollup')
+            conn.execute('ALTER TABLE daily_rollups RENAME TO daily_rollups_v2')
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'daily_rollups'"
+        ).fetchone()
+        # app_id 0 stands for activities without an application
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS daily_rollups (
+                day TEXT NOT NULL,
+                app_id INTEGER NOT NULL,
+                total_ms INTEGER NOT NULL,
+                activity_count INTEGER NOT NULL,
+                PRIMARY KEY (day, app_id)
+            )
+        ''')
+        conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS activities_rollup AFTER INSERT ON activities
+            WHEN NEW.end_time IS NOT NULL
+            BEGIN
+                INSERT INTO daily_rollups (day, app_id, total_ms, activity_count)
+                VALUES (substr(NEW.start_time, 1, 10), COALESCE(NEW.app_id, 0), NEW.duration_ms, 1)
+                ON CONFLICT (day, app_id) DO UPDATE SET
+                    total_ms = total_ms + excluded.total_ms,
+                    activity_count = activity_count + 1;
+            END
+        ''')
+        if legacy:
+            # Converted rather than rebuilt: retention may have removed the raw rows
             conn.execute('''
-                INSERT INTO activities 
-                (name, start_time, end_time, process_name, window_title, category)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (
-                activity.name,
-                activity.start_time.isoformat(),
-                activity.end_time.isoformat() if activity.end_time else None,
-                activity.process_name,
-                activity.window_title,
-                activity.category
+                INSERT OR IGNORE INTO apps (name)
+                SELECT DISTINCT process_name FROM daily_rollups_v1 WHERE process_name != ''
+            ''')
+            conn.execute('''
+                INSERT INTO daily_rollups (day, app_id, total_ms, activity_count)
+                SELECT v1.day, COALESCE(apps.id, 0),
+                       CAST(ROUND(v1.total_minutes * 60000) AS INTEGER), v1.activity_count
+                FROM daily_rollups_v1 AS v1
+                LEFT JOIN apps ON apps.name = v1.process_name
+            ''')
+            conn.execute('DROP TABLE daily_rollups_v1')
+        elif in_minutes:
+            conn.execute('''
+                INSERT INTO daily_rollups (day, app_id, total_ms, activity_count)
+                SELECT day, app_id, CAST(ROUND(total_minutes * 60000) AS INTEGER), activity_count
+                FROM daily_rollups_v2
+            ''')
+            conn.execute('DROP TABLE daily_rollups_v2')
+        elif not exists:
+            # Backfill rollups for databases created before they existed
+            conn.execute('''
+                INSERT INTO daily_rollups (day, app_id, total_ms, activity_count)
+                SELECT substr(start_time, 1, 10), COALESCE(app_id, 0), SUM(duration_ms), COUNT(*)
+                FROM activities
+                WHERE end_time IS NOT NULL
+                GROUP BY 1, 2
+            ''')
+    
+    def _init_search(self, conn: sqlite3.Connection) -> None:
+        """Create the FTS5 index over titles, kept current by triggers."""
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'activities_fts'"
+        ).fetchone()
+        try:
+            conn.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS activities_fts USING fts5(
+                    process_name, window_title,
+                    content = 'activity_view', content_rowid = 'id'
+                )
+            ''')
+        except sqlite3.OperationalError as e:
+            # SQLite built without FTS5: search falls back to a scan
+            logger.warning(f"Full-text search unavailable: {e}")
+            self._fts = False
+            return
+        self._fts = True
+        conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS activities_fts_insert AFTER INSERT ON activities
+            BEGIN
+                INSERT INTO activities_fts (rowid, process_name, window_title)
+                VALUES (NEW.id,
+                        (SELECT name FROM apps WHERE id = NEW.app_id),
+                        (SELECT title FROM titles WHERE id = NEW.title_id));
+            END
+        ''')
+        conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS activities_fts_delete AFTER DELETE ON activities
+            BEGIN
+                INSERT INTO activities_fts (activities_fts, rowid, process_name, window_title)
+                VALUES ('delete', OLD.id,
+                        (SELECT name FROM apps WHERE id = OLD.app_id),
+                        (SELECT title FROM titles WHERE id = OLD.title_id));
+            END
+        ''')
+        conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS activities_fts_update
+            AFTER UPDATE OF app_id, title_id ON activities
+            BEGIN
+                INSERT INTO activities_fts (activities_fts, rowid, process_name, window_title)
+                VALUES ('delete', OLD.id,
+                        (SELECT name FROM apps WHERE id = OLD.app_id),
+                        (SELECT title FROM titles WHERE id = OLD.title_id));
+                INSERT INTO activities_fts (rowid, process_name, window_title)
+                VALUES (NEW.id,
+                        (SELECT name FROM apps WHERE id = NEW.app_id),
+                        (SELECT title FROM titles WHERE id = NEW.title_id));
+            END
+        ''')
+        if not exists:
+            # Index history saved before search existed
+            conn.execute("INSERT INTO activities_fts (activities_fts) VALUES ('rebuild')")
+    
+    # Upper bound stored for activities without an end (9999-12-31)
+    OPEN_END = 253402300799
+    
+    def _init_intervals(self, conn: sqlite3.Connection) -> None:
+        """Create the R*Tree over activity intervals, kept current by triggers.
+        
+        Bounds are whole seconds since the epoch, as computed by SQLite's
+        ``strftime('%s')``; R*Tree rounds them outwards, so it only narrows
+        the candidates and queries recheck the exact timestamps.
+        """
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'activity_intervals'"
+        ).fetchone()
+        try:
+            conn.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS activity_intervals
+                USING rtree(id, start_s, end_s)
+            ''')
+        except sqlite3.OperationalError as e:
+            # SQLite built without R*Tree: interval queries use the start_time index
+            logger.warning(f"Interval index unavailable: {e}")
+            self._rtree = False
+            return
+        self._rtree = True
+        bounds = f'''
+            CAST(strftime('%s', NEW.start_time) AS INTEGER),
+            COALESCE(CAST(strftime('%s', NEW.end_time) AS INTEGER), {self.OPEN_END})
+        '''
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS activity_intervals_insert AFTER INSERT ON activities
+            BEGIN
+                INSERT INTO activity_intervals (id, start_s, end_s) VALUES (NEW.id, {bounds});
+            END
+        ''')
+        conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS activity_intervals_delete AFTER DELETE ON activities
+            BEGIN
+                DELETE FROM activity_intervals WHERE id = OLD.id;
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS activity_intervals_update
+            AFTER UPDATE OF start_time, end_time ON activities
+            BEGIN
+                INSERT OR REPLACE INTO activity_intervals (id, start_s, end_s) VALUES (NEW.id, {bounds});
+            END
+        ''')
+        if not exists:
+            conn.execute(f'''
+                INSERT INTO activity_intervals (id, start_s, end_s)
+                SELECT id,
+                       CAST(strftime('%s', start_time) AS INTEGER),
+                       COALESCE(CAST(strftime('%s', end_time) AS INTEGER), {self.OPEN_END})
+                FROM activities
+            ''')
+    
+    @_instrumented
+    def get_overlapping(self, start_time: datetime, end_time: datetime) -> List[Activity]:
+        return self._interval_query(
+            'activity_view.start_time < ?', start_time, end_time
+        )
+    
+    @_instrumented
+    def get_activities_at(self, moment: datetime) -> List[Activity]:
+        return self._interval_query('activity_view.start_time <= ?', moment, moment)
+    
+    def _interval_query(self, start_condition: str,
+                        start_time: datetime, end_time: datetime) -> List[Activity]:
+        """Activities ending after ``start_time`` whose start meets ``start_condition``."""
+        conditions = [
+            start_condition,
+            '(activity_view.end_time IS NULL OR activity_view.end_time > ?)'
+        ]
+        params: list = [end_time.isoformat(), start_time.isoformat()]
+        if self._rtree:
+            query = '''
+                SELECT activity_view.* FROM activity_intervals
+                JOIN activity_view ON activity_view.id = activity_intervals.id
+            '''
+            conditions[:0] = ['activity_intervals.start_s <= ?', 'activity_intervals.end_s >= ?']
+            params[:0] = [_epoch_seconds(end_time), _epoch_seconds(start_time)]
+        else:
+            query = 'SELECT * FROM activity_view'
+        query += ' WHERE ' + ' AND '.join(conditions) + ' ORDER BY activity_view.start_time'
+        with self._connect() as conn:
+            return [self._from_row(row) for row in conn.execute(query, params)]
+    
+    INSERT_SQL = '''
+        INSERT INTO activities 
+        (name_id, start_time, end_time, app_id, title_id, category, duration_ms)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    '''
+    
+    # Dictionary ids cached per table before the cache is reset
+    ID_CACHE_SIZE = 65536
+    
+    @_instrumented
+    @_retry_busy
+    def save_activity(self, activity: Activity) -> None:
+        with self._connect() as conn:
+            self._insert(conn, [activity])
+    
+    @_instrumented
+    @_retry_busy
+    def save_activities(self, activities: List[Activity]) -> None:
+        # One executemany inside one transaction for the whole batch
+        with self._connect() as conn:
+            self._insert(conn, activities)
+    
+    def _insert(self, conn: sqlite3.Connection, activities: Iterable[Activity]) -> None:
+        """Insert activities, storing each distinct string once in ``apps`` or ``titles``."""
+        activities = list(activities)
+        try:
+            app_ids = self._resolve_ids(
+                conn, 'apps', 'name', self._app_ids,
+                {activity.process_name for activity in activities}
+            )
+            title_ids = self._resolve_ids(
+                conn, 'titles', 'title', self._title_ids,
+                {activity.name for activity in activities} |
+                {activity.window_title for activity in activities}
+            )
+            conn.executemany(self.INSERT_SQL, (
+                (
+                    title_ids[activity.name],
+                    activity.start_time.isoformat(),
+                    activity.end_time.isoformat() if activity.end_time else None,
+                    app_ids.get(activity.process_name),
+                    title_ids.get(activity.window_title),
+                    activity.category,
+                    activity.duration_ms if activity.end_time else None
+                )
+                for activity in activities
             ))
+        except Exception:
+            # Ids assigned in a transaction that will be rolled back
+            self._app_ids.clear()
+            self._title_ids.clear()
+            raise
+    
+    def _resolve_ids(self, conn: sqlite3.Connection, table: str, column: str,
+                     cache: Dict[str, int], values: set) -> Dict[str, int]:
+        if len(cache) > self.ID_CACHE_SIZE:
+            cache.clear()
+        missing = [value for value in values if value is not None and value not in cache]
+        if missing:
+            conn.executemany(
+                f'INSERT OR IGNORE INTO {table} ({column}) VALUES (?)',
+                ((value,) for value in missing)
+            )
+            # Stay under SQLite's bound parameter limit
+            for i in range(0, len(missing), 500):
+                chunk = missing[i:i + 500]
+                placeholders = ', '.join('?' * len(chunk))
+                cache.update(conn.execute(
+                    f'SELECT {column}, id FROM {table} WHERE {column} IN ({placeholders})',
+                    chunk
+                ))
+        return cache
+    
+    @staticmethod
+    def _from_row(row: tuple) -> Activity:
+        return Activity(
+            name=row[1],
+            start_time=datetime.fromisoformat(row[2]),
+            end_time=datetime.fromisoformat(row[3]) if row[3] else None,
+            process_name=row[4],
+            window_title=row[5],
+            category=row[6]
+        )
+    
+    @_retry_busy
+    def save_checkpoint(self, activities: List[Activity]) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO checkpoint (slot, data) VALUES (0, ?)',
+                (json.dumps([activity.to_dict() for activity in activities]),)
+            )
+    
+    def load_checkpoint(self) -> List[Activity]:
+        with self._connect() as conn:
+            row = conn.execute('SELECT data FROM checkpoint WHERE slot = 0').fetchone()
+        return decode_checkpoint(row[0]) if row else []
+    
+    @_retry_busy
+    def clear_checkpoint(self) -> None:
+        with self._connect() as conn:
+            conn.execute('DELETE FROM checkpoint')
     
+    @_instrumented
     def get_activities(self,
                       start_time: Optional[datetime] = None,
                       end_time: Optional[datetime] = None) -> List[Activity]:
-        query = 'SELECT * FROM activities'
+        query, params = self._range_query(start_time, end_time)
+        with self._connect() as conn:
+            cursor = conn.execute(query, params)
+            return [self._from_row(row) for row in cursor.fetchall()]
+    
+    def iter_activities(self,
+                        start_time: Optional[datetime] = None,
+                        end_time: Optional[datetime] = None,
+                        batch_size: int = 1000) -> Iterator[List[Activity]]:
+        query, params = self._range_query(start_time, end_time)
+        with self._connect() as conn:
+            cursor = conn.execute(query + ' ORDER BY id', params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield [self._from_row(row) for row in rows]
+    
+    @_instrumented
+    def get_page(self,
+                 before: Optional[datetime] = None,
+                 limit: int = 100) -> List[Activity]:
+        # Walks idx_activities_start_time backwards from ``before``
+        query = 'SELECT * FROM activity_view'
+        params: list = []
+        if before:
+            query += ' WHERE start_time < ?'
+            params.append(before.isoformat())
+        query += ' ORDER BY start_time DESC, id DESC LIMIT ?'
+        params.append(limit)
+        with self._connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+            if len(rows) == limit:
+                boundary = rows[-1][2]
+                rows = [row for row in rows if row[2] != boundary]
+                rows.extend(conn.execute(
+                    'SELECT * FROM activity_view WHERE start_time = ? ORDER BY id DESC',
+                    (boundary,)
+                ))
+        return [self._from_row(row) for row in rows]
+    
+    @staticmethod
+    def _range_query(start_time: Optional[datetime],
+                     end_time: Optional[datetime]) -> tuple:
+        query = 'SELECT * FROM activity_view'
         params = []
         conditions = []
         
@@ -125,30 +1298,177 @@ class SQLiteStorage(BaseStorage):
             conditions.append('start_time >= ?')
             params.append(start_time.isoformat())
         if end_time:
+            # Implied by end_time <= ?, and bounds the start_time index scan
+            conditions.append('start_time <= ?')
             conditions.append('end_time <= ?')
-            params.append(end_time.isoformat())
+            params.extend([end_time.isoformat(), end_time.isoformat()])
             
         if conditions:
             query += ' WHERE ' + ' AND '.join(conditions)
-        
-        with sqlite3.connect(str(self.filepath)) as conn:
-            cursor = conn.execute(query, params)
-            return [
-                Activity(
-                    name=row[1],
-                    start_time=datetime.fromisoformat(row[2]),
-                    end_time=datetime.fromisoformat(row[3]) if row[3] else None,
-                    process_name=row[4],
-                    window_title=row[5],
-                    category=row[6]
-                )
-                for row in cursor.fetchall()
-            ]
+        return query, params
     
+    @_retry_busy
     def cleanup_old_activities(self, days: int = 30) -> None:
         cutoff_date = datetime.now() - timedelta(days=days)
-        with sqlite3.connect(str(self.filepath)) as conn:
+        with self._connect() as conn:
             conn.execute(
                 'DELETE FROM activities WHERE start_time < ?',
                 (cutoff_date.isoformat(),)
             )
+    
+    @_instrumented
+    def get_rollups(self,
+                    start_day: Optional[date] = None,
+                    end_day: Optional[date] = None) -> List[DailyRollup]:
+        query = '''
+            SELECT day, COALESCE(apps.name, ''), total_ms, activity_count
+            FROM daily_rollups LEFT JOIN apps ON apps.id = daily_rollups.app_id
+        '''
+        params = []
+        conditions = []
+        if start_day:
+            conditions.append('day >= ?')
+            params.append(start_day.isoformat())
+        if end_day:
+            conditions.append('day < ?')
+            params.append(end_day.isoformat())
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        query += ' ORDER BY day, 2'
+        
+        with self._connect() as conn:
+            return [
+                DailyRollup(date.fromisoformat(row[0]), row[1], row[2], row[3])
+                for row in conn.execute(query, params)
+            ]
+    
+    @_instrumented
+    @_retry_busy
+    def delete_activities_before(self, cutoff: datetime, limit: Optional[int] = 500) -> int:
+        with self._connect() as conn:
+            cursor = conn.execute('''
+                DELETE FROM activities WHERE id IN (
+                    SELECT id FROM activities
+                    WHERE start_time < ?
+                    ORDER BY start_time
+                    LIMIT ?
+                )
+            ''', (cutoff.isoformat(), -1 if limit is None else limit))
+            return cursor.rowcount
+    
+    @_retry_busy
+    def delete_rollups_before(self, day: date) -> int:
+        with self._connect() as conn:
+            cursor = conn.execute(
+                'DELETE FROM daily_rollups WHERE day < ?',
+                (day.isoformat(),)
+            )
+            return cursor.rowcount
+    
+    @_instrumented
+    def search(self,
+               query: str,
+               start_time: Optional[datetime] = None,
+               end_time: Optional[datetime] = None,
+               limit: int = 100) -> List[Activity]:
+        terms = parse_query(query)
+        if not self._fts or not terms:
+            return super().search(query, start_time, end_time, limit)
+        
+        sql = '''
+            SELECT activity_view.* FROM activities_fts
+            JOIN activity_view ON activity_view.id = activities_fts.rowid
+            WHERE activities_fts MATCH ?
+        '''
+        params: list = [fts_query(terms)]
+        if start_time:
+            sql += ' AND activity_view.start_time >= ?'
+            params.append(start_time.isoformat())
+        if end_time:
+            sql += ' AND activity_view.end_time <= ?'
+            params.append(end_time.isoformat())
+        sql += ' ORDER BY activity_view.start_time DESC LIMIT ?'
+        params.append(limit)
+        
+        with self._connect() as conn:
+            return [self._from_row(row) for row in conn.execute(sql, params)]
+    
+    @_instrumented
+    @_retry_busy
+    def recategorize(self,
+                     categorize: Callable[[Optional[str], Optional[str]], Optional[str]],
+                     batch_size: int = 1000) -> int:
+        # Walk the table by id; each batch of updates is its own short transaction
+        changed = 0
+        last_id = 0
+        with self._connect() as conn:
+            while True:
+                rows = conn.execute('''
+                    SELECT id, process_name, window_title, category FROM activity_view
+                    WHERE id > ? ORDER BY id LIMIT ?
+                ''', (last_id, batch_size)).fetchall()
+                if not rows:
+                    break
+                last_id = rows[-1][0]
+                updates = []
+                for row_id, process_name, window_title, current in rows:
+                    category = categorize(process_name, window_title)
+                    if category != current:
+                        updates.append((category, row_id))
+                if updates:
+                    conn.executemany('UPDATE activities SET category = ? WHERE id = ?', updates)
+                    changed += len(updates)
+                conn.commit()
+        return changed
+    
+    @_retry_busy
+    def compact(self) -> None:
+        with self._connect() as conn:
+            conn.execute('PRAGMA incremental_vacuum').fetchall()
+
+def storage_location(storage_config: dict) -> Path:
+    """Return the file backing the configured storage backend."""
+    storage_path = Path(storage_config['path']).expanduser()
+    
+    if storage_config['type'] == 'sqlite':
+        return storage_path / 'activities.db'
+    if storage_config['type'] == 'compressed':
+        return storage_path / 'activities.tz'
+    return storage_path / storage_config['filename']
+
+def create_storage(storage_config: dict) -> BaseStorage:
+    """Create the storage backend described by the ``storage`` config section."""
+    filepath = storage_location(storage_config)
+    
+    if storage_config['type'] == 'sqlite':
+        storage: BaseStorage = SQLiteStorage(
+            filepath,
+            busy_timeout=storage_config.get('busy_timeout', 30.0),
+            busy_retries=storage_config.get('busy_retries', 5)
+        )
+    elif storage_config['type'] == 'compressed':
+        from .compressed import CompressedStorage
+        storage = CompressedStorage(
+            filepath,
+            codec=storage_config.get('compression', 'zlib'),
+            chunk_records=storage_config.get('chunk_records', 1000),
+            fsync=storage_config.get('durability', 'always') != 'never',
+            lock_timeout=storage_config.get('lock_timeout')
+        )
+    else:  # default to JSON
+        storage = JSONStorage(
+            filepath,
+            durability=storage_config.get('durability', 'always'),
+            fsync_interval=storage_config.get('fsync_interval', 5.0),
+            lock_timeout=storage_config.get('lock_timeout')
+        )
+    
+    hot_tier_config = storage_config.get('hot_tier', {})
+    if hot_tier_config.get('enabled', False):
+        from .tiered import TieredStorage
+        storage = TieredStorage(
+            storage,
+            write_behind=hot_tier_config.get('write_behind', False),
+            flush_timeout=hot_tier_config.get('flush_timeout', 30.0)
+        )
+    return storage
@@ -0,0 +1,300 @@
+import os
+import re
+import json
+import socket
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from threading import Thread, Event
+from typing import Dict, Iterator, List, Optional, Tuple
+from .activity import Activity
+from .storage import BaseStorage, _sqlite_connection
+
+logger = logging.getLogger(__name__)
+
+LOG_SUFFIX = '.log'
+
+def default_device_id() -> str:
+    return socket.gethostname() or 'device'
+
+def _safe_name(device_id: str) -> str:
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', device_id)
+
+class DeviceLog:
+    """Append-only JSON Lines log of one device's activities.
+
+    Every record carries a sequence number that increases by one per
+    record, so readers can resume from the last sequence (and byte offset)
+    they have seen. A trailing line without a newline is an append still in
+    progress, or a partially synced file, and is left for the next read.
+    """
+
+    def __init__(self, path: Path, device_id: str):
+        self.path = path
+        self.device_id = device_id
+        self._lock = threading.Lock()
+        self._last_seq: Optional[int] = None
+
+    @property
+    def last_seq(self) -> int:
+        if self._last_seq is None:
+            self._last_seq = 0
+            for record, _ in self.read_from(0):
+                self._last_seq = record['seq']
+        return self._last_seq
+
+    def append(self, activities: List[dict]) -> int:
+        """Append serialized activities. Returns the last sequence number written."""
+        with self._lock:
+            seq = self.last_seq
+            lines = []
+            for activity in activities:
+                seq += 1
+                lines.append(json.dumps({'seq': seq, 'device': self.device_id,
+                                         'activity': activity}) + '\n')
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open('a') as f:
+                f.writelines(lines)
+                f.flush()
+                os.fsync(f.fileno())
+            self._last_seq = seq
+            return seq
+
+    def read_from(self, offset: int) -> Iterator[Tuple[dict, int]]:
+        """Yield ``(record, next_offset)`` for complete records at or after ``offset``."""
+        if not self.path.exists():
+            return
+        with self.path.open('rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    return
+                offset += len(line)
+                yield json.loads(line), offset
+
+@dataclass
+class SyncStats:
+    pushed: int = 0
+    pulled: int = 0
+
+class SyncManager:
+    """Merges per-device activity logs through a shared directory.
+
+    Each device appends its own activities to a local log and pushes new
+    records to ``<shared_dir>/<device>.log``, a file only that device ever
+    writes. Pulling reads other devices' logs from the byte offset and
+    sequence already seen, so every round ships only new records. Records
+    are keyed by ``(device, seq)`` in a local SQLite index, which makes
+    repeated or overlapping merges idempotent and serves merged queries.
+    """
+
+    def __init__(self,
+                 local_dir: Path,
+                 shared_dir: Path,
+                 device_id: Optional[str] = None,
+                 interval: float = 300.0):
+        self.device_id = device_id or default_device_id()
+        self.local_dir = Path(local_dir).expanduser() / 'sync'
+        self.shared_dir = Path(shared_dir).expanduser()
+        self.interval = interval
+        self.local_log = DeviceLog(
+            self.local_dir / f'{_safe_name(self.device_id)}{LOG_SUFFIX}', self.device_id
+        )
+        self.shared_log = DeviceLog(
+            self.shared_dir / f'{_safe_name(self.device_id)}{LOG_SUFFIX}', self.device_id
+        )
+        self.index_path = self.local_dir / 'index.db'
+        self._lock = threading.Lock()
+        self.stop_event = Event()
+        self.thread: Optional[Thread] = None
+        self.local_dir.mkdir(parents=True, exist_ok=True)
+        self._init_index()
+
+    def _init_index(self) -> None:
+        with _sqlite_connection(self.index_path) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS records (
+                    device TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    name TEXT NOT NULL,
+                    start_time TEXT NOT NULL,
+                    end_time TEXT,
+                    process_name TEXT,
+                    window_title TEXT,
+                    category TEXT,
+                    PRIMARY KEY (device, seq)
+                )
+            ''')
+            conn.execute(
+                'CREATE INDEX IF NOT EXISTS idx_records_start_time ON records (start_time)'
+            )
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS cursors (
+                    log TEXT PRIMARY KEY,
+                    seq INTEGER NOT NULL,
+                    offset INTEGER NOT NULL
+                )
+            ''')
+
+    def record(self, activity: Activity) -> None:
+        """Append a newly saved local activity to this device's log."""
+        self.record_many([activity])
+
+    def record_many(self, activities: List[Activity]) -> None:
+        if activities:
+            self.local_log.append([activity.to_dict() for activity in activities])
+
+    def seed_from(self, storage: BaseStorage, batch_size: int = 1000) -> int:
+        """Publish pre-existing history the first time sync is enabled."""
+        if self.local_log.last_seq:
+            return 0
+        count = 0
+        for batch in storage.iter_activities(batch_size=batch_size):
+            self.record_many(batch)
+            count += len(batch)
+        return count
+
+    def push(self) -> int:
+        """Ship local records the shared log has not seen yet."""
+        shared_seq = self.shared_log.last_seq
+        if shared_seq >= self.local_log.last_seq:
+            return 0
+        
+        cursor_seq, offset = self._get_cursor('push')
+        if cursor_seq > shared_seq:
+            # The shared log is behind our cursor (e.g. it was reset): resend
+            offset = 0
+        pending = []
+        for record, next_offset in self.local_log.read_from(offset):
+            offset = next_offset
+            if record['seq'] > shared_seq:
+                pending.append(record['activity'])
+        pushed_seq = self.shared_log.append(pending)
+        self._set_cursor('push', pushed_seq, offset)
+        return len(pending)
+
+    def pull(self) -> int:
+        """Merge new records from other devices' shared logs into the index."""
+        merged = self._merge_log(self.local_log, 'local')
+        for path in sorted(self.shared_dir.glob(f'*{LOG_SUFFIX}')):
+            if path == self.shared_log.path:
+                continue
+            merged += self._merge_log(DeviceLog(path, path.stem), f'shared:{path.name}')
+        return merged
+
+    def sync(self) -> SyncStats:
+        """Push then pull. Safe to call repeatedly and concurrently."""
+        with self._lock:
+            stats = SyncStats(pushed=self.push())
+            stats.pulled = self.pull()
+        if stats.pushed or stats.pulled:
+            logger.info(f"Sync pushed {stats.pushed} and merged {stats.pulled} records")
+        return stats
+
+    def _get_cursor(self, key: str) -> Tuple[int, int]:
+        with _sqlite_connection(self.index_path) as conn:
+            row = conn.execute('SELECT seq, offset FROM cursors WHERE log = ?', (key,)).fetchone()
+        return row if row else (0, 0)
+
+    def _set_cursor(self, key: str, seq: int, offset: int) -> None:
+        with _sqlite_connection(self.index_path) as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO cursors (log, seq, offset) VALUES (?, ?, ?)',
+                (key, seq, offset)
+            )
+
+    def _merge_log(self, log: DeviceLog, key: str) -> int:
+        """Index records appended to ``log`` since the last merge."""
+        last_seq, offset = self._get_cursor(key)
+        rows = []
+        for record, next_offset in log.read_from(offset):
+            offset = next_offset
+            if record['seq'] <= last_seq:
+                continue
+            last_seq = record['seq']
+            activity = record['activity']
+            rows.append((
+                record.get('device', log.device_id), record['seq'],
+                activity['name'], activity['start_time'], activity.get('end_time'),
+                activity.get('process_name'), activity.get('window_title'),
+                activity.get('category')
+            ))
+        
+        # Records and the cursor advance in one transaction
+        with _sqlite_connection(self.index_path) as conn:
+            cursor = conn.executemany('''
+                INSERT OR IGNORE INTO records
+                (device, seq, name, start_time, end_time, process_name, window_title, category)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+            conn.execute(
+                'INSERT OR REPLACE INTO cursors (log, seq, offset) VALUES (?, ?, ?)',
+                (key, last_seq, offset)
+            )
+            return max(cursor.rowcount, 0)
+
+    def get_activities(self,
+                       start_time: Optional[datetime] = None,
+                       end_time: Optional[datetime] = None,
+                       device_id: Optional[str] = None) -> List[Activity]:
+        """Query the merged activities of all devices."""
+        query = '''
+            SELECT name, start_time, end_time, process_name, window_title, category
+            FROM records
+        '''
+        params: list = []
+        conditions = []
+        if start_time:
+            conditions.append('start_time >= ?')
+            params.append(start_time.isoformat())
+        if end_time:
+            conditions.append('end_time <= ?')
+            params.append(end_time.isoformat())
+        if device_id:
+            conditions.append('device = ?')
+            params.append(device_id)
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        query += ' ORDER BY start_time'
+
+        with _sqlite_connection(self.index_path) as conn:
+            return [
+                Activity(
+                    name=row[0],
+                    start_time=datetime.fromisoformat(row[1]),
+                    end_time=datetime.fromisoformat(row[2]) if row[2] else None,
+                    process_name=row[3],
+                    window_title=row[4],
+                    category=row[5]
+                )
+                for row in conn.execute(query, params)
+            ]
+
+    def devices(self) -> Dict[str, int]:
+        """Return the highest merged sequence number per device."""
+        with _sqlite_connection(self.index_path) as conn:
+            return dict(conn.execute('SELECT device, MAX(seq) FROM records GROUP BY device'))
+
+    def start(self) -> None:
+        """Sync every ``interval`` seconds in a background thread."""
+        if self.thread and self.thread.is_alive():
+            return
+        self.stop_event.clear()
+        self.thread = Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        if not self.thread:
+            return
+        self.stop_event.set()
+        self.thread.join()
+        self.sync()
+
+    def _run(self) -> None:
+        while not self.stop_event.wait(self.interval):
+            try:
+                self.sync()
+            except Exception as e:
+                logger.error(f"Error during sync: {e}", exc_info=True)
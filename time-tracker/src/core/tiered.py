@@ -0,0 +1,337 @@
+import bisect
+import logging
+import threading
+import dataclasses
+from datetime import date, datetime, time, timedelta
+from threading import Thread
+from typing import Callable, Dict, List, Optional
+from .activity import Activity, DailyRollup
+from .clock import Clock, SystemClock
+from .metrics import NULL_METRICS
+from .search import matches, parse_query
+from .storage import BaseStorage, _with_ties
+
+logger = logging.getLogger(__name__)
+
+# Activities written to the durable tier per batch in write-behind mode
+WRITE_BATCH = 500
+# Seconds before a failed write-behind batch is retried
+RETRY_DELAY = 1.0
+
+class TieredStorage(BaseStorage):
+    """Today's activities in memory, in front of any durable backend.
+
+    The hot tier holds every saved activity that ends after midnight, loaded
+    from the durable tier at startup and kept sorted by start time. Queries
+    that only concern today, such as the daily summary and the recent
+    activities list, are answered from it without touching disk; queries
+    reaching further back send only the part before midnight to the durable
+    tier and merge in the rest.
+
+    Saves are written through to the durable tier, or with ``write_behind``
+    queued and written in batches by a background thread, which
+    :meth:`flush` waits for.
+    """
+
+    def __init__(self, durable: BaseStorage, write_behind: bool = False,
+                 clock: Optional[Clock] = None, flush_timeout: float = 30.0):
+        self.durable = durable
+        self.write_behind = write_behind
+        self.clock = clock or SystemClock()
+        self.flush_timeout = flush_timeout
+        self._metrics = NULL_METRICS
+        self._lock = threading.RLock()
+        self._hot: List[Activity] = []
+        self._hot_keys: List[datetime] = []
+        self._hot_day: Optional[date] = None
+        # Queued for the durable tier; read together with it under _write_lock
+        self._unwritten: List[Activity] = []
+        self._write_lock = threading.Lock()
+        self._queue_changed = threading.Condition()
+        self._stopping = False
+        self._writer: Optional[Thread] = None
+        with self._lock:
+            self._warm_up(self.clock.now().date())
+        if write_behind:
+            self._writer = Thread(target=self._write_loop, name='storage-write-behind',
+                                  daemon=True)
+            self._writer.start()
+
+    @property
+    def metrics(self):
+        return self._metrics
+
+    @metrics.setter
+    def metrics(self, metrics) -> None:
+        self._metrics = metrics
+        self.durable.metrics = metrics
+
+    @property
+    def hot_start(self) -> datetime:
+        """Midnight starting the day held in memory."""
+        with self._lock:
+            self._roll()
+            return datetime.combine(self._hot_day, time())
+
+    def save_activity(self, activity: Activity) -> None:
+        self.save_activities([activity])
+
+    def save_activities(self, activities: List[Activity]) -> None:
+        activities = list(activities)
+        with self._lock:
+            self._roll()
+        if not self.write_behind:
+            # Only what reached the durable tier is shown
+            self.durable.save_activities(activities)
+        with self._lock:
+            for activity in activities:
+                self._add_hot(activity)
+        if not self.write_behind:
+            return
+        with self._queue_changed:
+            self._unwritten.extend(activities)
+            self._queue_changed.notify_all()
+        self.metrics.set_gauge('storage.unwritten', len(self._unwritten))
+
+    def get_activities(self,
+                      start_time: Optional[datetime] = None,
+                      end_time: Optional[datetime] = None) -> List[Activity]:
+        hot_start = self.hot_start
+        hot = [
+            activity for activity in self._hot_snapshot()
+            if not (start_time and activity.start_time < start_time)
+            and not (end_time and activity.end_time and activity.end_time > end_time)
+        ]
+        if start_time and start_time >= hot_start:
+            return hot
+        # Hot activities all end after midnight, so the rest end before it
+        cold_end = min(end_time, hot_start) if end_time else hot_start
+        cold = self._cold(
+            lambda: self.durable.get_activities(start_time, cold_end),
+            lambda activity: (not (start_time and activity.start_time < start_time)
+                              and activity.end_time <= cold_end)
+        )
+        return cold + hot
+
+    def get_overlapping(self, start_time: datetime, end_time: datetime) -> List[Activity]:
+        hot_start = self.hot_start
+        hot = [
+            activity for activity in self._hot_snapshot()
+            if activity.start_time < end_time
+            and (activity.end_time is None or activity.end_time > start_time)
+        ]
+        if start_time >= hot_start:
+            return hot
+        cold = self._cold(
+            lambda: self.durable.get_overlapping(start_time, min(end_time, hot_start)),
+            lambda activity: (activity.start_time < end_time
+                              and activity.end_time > start_time)
+        )
+        cold = [activity for activity in cold
+                if activity.end_time is not None and activity.end_time <= hot_start]
+        return sorted(cold + hot, key=lambda activity: activity.start_time)
+
+    def get_page(self,
+                 before: Optional[datetime] = None,
+                 limit: int = 100) -> List[Activity]:
+        hot_start = self.hot_start
+        hot = [activity for activity in self._hot_snapshot()
+               if before is None or activity.start_time < before]
+        hot.reverse()
+        # Every cold activity starts before midnight, so it can neither come
+        # before nor tie with a full page of activities started since
+        if len(hot) >= limit and hot[limit - 1].start_time >= hot_start:
+            return _with_ties(hot, limit, lambda activity: activity.start_time)
+        page = self._cold(
+            lambda: self.durable.get_page(before, limit),
+            lambda activity: before is None or activity.start_time < before
+        )
+        page.sort(key=lambda activity: activity.start_time, reverse=True)
+        return _with_ties(page, limit, lambda activity: activity.start_time)
+
+    def get_rollups(self,
+                    start_day: Optional[date] = None,
+                    end_day: Optional[date] = None) -> List[DailyRollup]:
+        with self._write_lock:
+            rollups = self.durable.get_rollups(start_day, end_day)
+            unwritten = self._unwritten_snapshot()
+        if not unwritten:
+            return rollups
+        totals: Dict[tuple, list] = {
+            (rollup.day, rollup.process_name): [rollup.total_ms, rollup.activity_count]
+            for rollup in rollups
+        }
+        for activity in unwritten:
+            day = activity.start_time.date()
+            if (start_day and day < start_day) or (end_day and day >= end_day):
+                continue
+            entry = totals.setdefault((day, activity.process_name or ''), [0, 0])
+            entry[0] += activity.duration_ms
+            entry[1] += 1
+        return [
+            DailyRollup(day, process_name, total_ms, count)
+            for (day, process_name), (total_ms, count) in sorted(totals.items())
+        ]
+
+    def search(self,
+               query: str,
+               start_time: Optional[datetime] = None,
+               end_time: Optional[datetime] = None,
+               limit: int = 100) -> List[Activity]:
+        terms = parse_query(query)
+        if not terms:
+            return []
+        results = self._cold(
+            lambda: self.durable.search(query, start_time, end_time, limit),
+            lambda activity: (matches(activity.to_dict(), terms)
+                              and not (start_time and activity.start_time < start_time)
+                              and not (end_time and activity.end_time > end_time))
+        )
+        results.sort(key=lambda activity: activity.start_time, reverse=True)
+        return results[:limit]
+
+    def cleanup_old_activities(self, days: int = 30) -> None:
+        self.flush()
+        self.durable.cleanup_old_activities(days)
+        self._drop_hot_before(datetime.now() - timedelta(days=days))
+
+    @property
+    def incremental_deletes(self) -> bool:
+        return self.durable.incremental_deletes
+
+    def delete_activities_before(self, cutoff: datetime, limit: Optional[int] = 500) -> int:
+        self.flush()
+        deleted = self.durable.delete_activities_before(cutoff, limit)
+        if limit is None or deleted < limit:
+            self._drop_hot_before(cutoff)
+        return deleted
+
+    def delete_rollups_before(self, day: date) -> int:
+        self.flush()
+        return self.durable.delete_rollups_before(day)
+
+    def recategorize(self,
+                     categorize: Callable[[Optional[str], Optional[str]], Optional[str]],
+                     batch_size: int = 1000) -> int:
+        self.flush()
+        changed = self.durable.recategorize(categorize, batch_size)
+        with self._lock:
+            self._hot = [
+                dataclasses.replace(
+                    activity, category=categorize(activity.process_name, activity.window_title)
+                )
+                for activity in self._hot
+            ]
+        return changed
+
+    def compact(self) -> None:
+        self.flush()
+        self.durable.compact()
+
+    def flush(self) -> None:
+        with self._queue_changed:
+            if not self._queue_changed.wait_for(lambda: not self._unwritten,
+                                                timeout=self.flush_timeout):
+                logger.warning(f"{len(self._unwritten)} activities still waiting "
+                               f"for the durable tier after {self.flush_timeout}s")
+        self.durable.flush()
+
+    def has_pending_writes(self) -> bool:
+        with self._queue_changed:
+            if self._unwritten:
+                return True
+        return self.durable.has_pending_writes()
+
+    def save_checkpoint(self, activities: List[Activity]) -> None:
+        self.durable.save_checkpoint(activities)
+
+    def load_checkpoint(self) -> List[Activity]:
+        return self.durable.load_checkpoint()
+
+    def clear_checkpoint(self) -> None:
+        self.durable.clear_checkpoint()
+
+    def close(self) -> None:
+        self.flush()
+        if self._writer:
+            with self._queue_changed:
+                self._stopping = True
+                self._queue_changed.notify_all()
+            self._writer.join()
+            self._writer = None
+        self.durable.close()
+
+    def _warm_up(self, day: date) -> None:
+        """Load the activities ending after midnight starting ``day``."""
+        midnight = datetime.combine(day, time())
+        self._hot = [
+            activity for activity in self.durable.get_overlapping(midnight, datetime.max)
+            if activity.end_time is not None
+        ]
+        self._hot.sort(key=lambda activity: activity.start_time)
+        self._hot_keys = [activity.start_time for activity in self._hot]
+        self._hot_day = day
+        logger.info(f"Loaded {len(self._hot)} activities into the hot tier")
+
+    def _roll(self) -> None:
+        """Move the hot tier to a new day once midnight has passed."""
+        day = self.clock.now().date()
+        if day <= self._hot_day:
+            return
+        # Cold reads assume anything before midnight is durable
+        self.flush()
+        midnight = datetime.combine(day, time())
+        keep = [activity for activity in self._hot if activity.end_time > midnight]
+        self._hot = keep
+        self._hot_keys = [activity.start_time for activity in keep]
+        self._hot_day = day
+
+    def _add_hot(self, activity: Activity) -> None:
+        if activity.end_time is None:
+            return
+        if activity.end_time <= datetime.combine(self._hot_day, time()):
+            return
+        index = bisect.bisect_right(self._hot_keys, activity.start_time)
+        self._hot_keys.insert(index, activity.start_time)
+        self._hot.insert(index, activity)
+
+    def _drop_hot_before(self, cutoff: datetime) -> None:
+        with self._lock:
+            index = bisect.bisect_left(self._hot_keys, cutoff)
+            del self._hot[:index], self._hot_keys[:index]
+
+    def _hot_snapshot(self) -> List[Activity]:
+        with self._lock:
+            return list(self._hot)
+
+    def _unwritten_snapshot(self) -> List[Activity]:
+        with self._queue_changed:
+            return list(self._unwritten)
+
+    def _cold(self, read: Callable[[], List[Activity]],
+              predicate: Callable[[Activity], bool]) -> List[Activity]:
+        """Read the durable tier plus the queued activities matching ``predicate``."""
+        with self._write_lock:
+            activities = list(read())
+            activities.extend(a for a in self._unwritten_snapshot() if predicate(a))
+        return activities
+
+    def _write_loop(self) -> None:
+        while True:
+            with self._queue_changed:
+                self._queue_changed.wait_for(lambda: self._unwritten or self._stopping)
+                if not self._unwritten:
+                    return
+                batch = self._unwritten[:WRITE_BATCH]
+            try:
+                with self._write_lock:
+                    self.durable.save_activities(batch)
+                    with self._queue_changed:
+                        del self._unwritten[:len(batch)]
+                        self._queue_changed.notify_all()
+            except Exception as e:
+                logger.error(f"Error writing to the durable tier: {e}", exc_info=True)
+                self.metrics.increment('storage.write_behind_errors')
+                with self._queue_changed:
+                    if self._queue_changed.wait_for(lambda: self._stopping, timeout=RETRY_DELAY):
+                        return
@@ -0,0 +1,132 @@
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Set, Tuple
+from .activity import Activity
+from .storage import BaseStorage
+
+logger = logging.getLogger(__name__)
+
+# Bin widths in seconds, finest first; each divides a day evenly. The
+# daily bin keeps month and year views to one segment per day at most.
+RESOLUTIONS = (60, 900, 3600, 86400)
+
+@dataclass
+class Segment:
+    """A run of bins dominated by one application."""
+    start: datetime
+    end: datetime
+    process_name: str
+    coverage: float  # Fraction of the run with any tracked activity
+
+@dataclass
+class _DayBins:
+    # resolution -> bin index within the day -> {process_name: seconds}
+    bins: Dict[int, Dict[int, Dict[str, float]]] = field(
+        default_factory=lambda: {resolution: {} for resolution in RESOLUTIONS}
+    )
+    seen: Set[Tuple] = field(default_factory=set)
+
+class Timeline:
+    """Per-application time in fixed-width bins at several resolutions.
+
+    A day's bins are built from storage the first time it is viewed and
+    kept up to date by :meth:`add`, which the tracker calls as activities
+    are saved. Views ask for at most ``max_bins`` segments, so the amount
+    drawn depends on the width of the view rather than on how many
+    activities the range holds. At most ``max_days`` days are kept.
+    """
+
+    def __init__(self, storage: BaseStorage, max_days: int = 62):
+        self.storage = storage
+        self.max_days = max_days
+        self._days: 'OrderedDict[date, _DayBins]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, activity: Activity) -> None:
+        """Count a newly saved activity in the days already loaded."""
+        if not activity.end_time:
+            return
+        with self._lock:
+            day = activity.start_time.date()
+            while datetime.combine(day, datetime.min.time()) < activity.end_time:
+                day_bins = self._days.get(day)
+                if day_bins is not None:
+                    self._add(day_bins, day, activity)
+                day += timedelta(days=1)
+
+    @staticmethod
+    def resolution_for(span_seconds: float, max_bins: int) -> int:
+        """The finest resolution that fits the span in ``max_bins`` bins."""
+        for resolution in RESOLUTIONS:
+            if span_seconds / resolution <= max_bins:
+                return resolution
+        return RESOLUTIONS[-1]
+
+    def segments(self, start: datetime, end: datetime, max_bins: int) -> List[Segment]:
+        """Dominant application per bin over ``[start, end)``, adjacent bins merged."""
+        resolution = self.resolution_for((end - start).total_seconds(), max_bins)
+        step = timedelta(seconds=resolution)
+        segments: List[Segment] = []
+        with self._lock:
+            day = start.date()
+            while datetime.combine(day, datetime.min.time()) < end:
+                day_start = datetime.combine(day, datetime.min.time())
+                bins = self._load(day).bins[resolution]
+                first = max(0, int((start - day_start).total_seconds() // resolution))
+                last = min(86400 // resolution, -int(-(end - day_start).total_seconds() // resolution))
+                for index in sorted(i for i in bins if first <= i < last):
+                    bucket = bins[index]
+                    process_name = max(bucket, key=bucket.get)
+                    bin_start = day_start + index * step
+                    tracked = sum(bucket.values())
+                    previous = segments[-1] if segments else None
+                    if (previous and previous.process_name == process_name
+                            and previous.end == bin_start):
+                        span = (previous.end - previous.start).total_seconds()
+                        previous.coverage = (previous.coverage * span + tracked) / (span + resolution)
+                        previous.end = bin_start + step
+                    else:
+                        segments.append(Segment(bin_start, bin_start + step, process_name,
+                                                tracked / resolution))
+                day += timedelta(days=1)
+        return segments
+
+    def _load(self, day: date) -> _DayBins:
+        # Called with the lock held
+        day_bins = self._days.get(day)
+        if day_bins is not None:
+            self._days.move_to_end(day)
+            return day_bins
+        day_bins = _DayBins()
+        day_start = datetime.combine(day, datetime.min.time())
+        for activity in self.storage.get_overlapping(day_start, day_start + timedelta(days=1)):
+            if activity.end_time:
+                self._add(day_bins, day, activity)
+        self._days[day] = day_bins
+        while len(self._days) > self.max_days:
+            self._days.popitem(last=False)
+        return day_bins
+
+    @staticmethod
+    def _add(day_bins: _DayBins, day: date, activity: Activity) -> None:
+        """Split the part of ``activity`` within ``day`` across its bins."""
+        key = (activity.start_time, activity.end_time, activity.process_name)
+        if key in day_bins.seen:
+            return  # Saved while the day was being loaded
+        day_bins.seen.add(key)
+        day_start = datetime.combine(day, datetime.min.time())
+        offset = max(0.0, (activity.start_time - day_start).total_seconds())
+        stop = min(86400.0, (activity.end_time - day_start).total_seconds())
+        process_name = activity.process_name or 'Unknown'
+        for resolution in RESOLUTIONS:
+            bins = day_bins.bins[resolution]
+            moment = offset
+            while moment < stop:
+                index = int(moment // resolution)
+                bin_end = (index + 1) * resolution
+                bucket = bins.setdefault(index, {})
+                bucket[process_name] = bucket.get(process_name, 0.0) + min(stop, bin_end) - moment
+                moment = bin_end
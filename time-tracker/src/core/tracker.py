@@ -1,44 +1,201 @@
-import time
 import logging
-from pathlib import Path
-from typing import List, Optional, Dict, Any
+import cProfile
+import dataclasses
+from typing import Callable, List, Optional, Dict, Any
 from datetime import datetime, timedelta
 from threading import Thread, Event
-from .activity import Activity
-from .storage import BaseStorage, JSONStorage, SQLiteStorage
+from .activity import Activity, milliseconds
+from .clock import Clock, SystemClock
+from .storage import BaseStorage, create_storage
+from .retention import RetentionEngine, RetentionPolicy
+from .metrics import Metrics
+from .sync import SyncManager
+from .coalescer import Coalescer
+from .reports import ReportScheduler
+from .categorizer import Categorizer
+from .interning import InternPool
+from .profiling import SamplingProfiler, format_cprofile
+from ..server.client import AggregatorClient
+from ..monitors.base_monitor import BaseMonitor
 from ..monitors.system_monitor import SystemMonitor
 from ..monitors.input_monitor import InputMonitor
 
 logger = logging.getLogger(__name__)
 
 class ActivityTracker:
-    """Core class for tracking user activities."""
+    """Core class for tracking user activities.
     
-    def __init__(self, config: dict):
+    The clock and monitors default to wall-clock time and the macOS
+    monitors, and can be injected to drive the tracker from a simulation.
+    """
+    
+    def __init__(self, config: dict,
+                 clock: Optional[Clock] = None,
+                 system_monitor: Optional[BaseMonitor] = None,
+                 input_monitor: Optional[BaseMonitor] = None):
         self.config = config
+        self.clock = clock or SystemClock()
+        metrics_config = config.get('metrics', {})
+        self.metrics = Metrics(enabled=metrics_config.get('enabled', False))
+        self.prometheus_file = metrics_config.get('prometheus_file')
+        self.metrics_export_interval = metrics_config.get('export_interval', 15.0)
+        self._last_metrics_export = 0.0
+        self._profiler = None
+        self._profiler_request = None
+        self._profiler_ready = Event()
         self.storage = self._init_storage()
-        self.system_monitor = SystemMonitor()
-        self.input_monitor = InputMonitor(
+        self.storage.metrics = self.metrics
+        self.system_monitor = system_monitor or SystemMonitor()
+        self.input_monitor = input_monitor or InputMonitor(
             input_threshold=config['monitoring']['input_threshold']
         )
         
         self.current_activity: Optional[Activity] = None
         self.stop_event = Event()
+        self.idle_event = Event()
         self.tracking_thread: Optional[Thread] = None
+        self._activity_listeners: List[Callable[[Activity], None]] = []
+        self.strings = InternPool(config['monitoring'].get('intern_pool_size', 8192))
+        self.categorizer = self._init_categorizer()
+        self.coalescer = self._init_coalescer()
+        self.retention = self._init_retention()
+        self.sync = self._init_sync()
+        self.uploader = self._init_uploader()
+        self.reports = self._init_reports()
         
         # Configuration
         self.inactivity_threshold = config['monitoring']['inactivity_threshold']
         self.polling_interval = config['monitoring']['polling_interval']
+        self.checkpoint_interval = config['monitoring'].get('checkpoint_interval', 5.0)
+        self.retention_idle_after = config.get('retention', {}).get(
+            'idle_after', self.inactivity_threshold
+        )
+        self._idle_since: Optional[float] = None
+        self._last_checkpoint = 0.0
+        self._checkpoint_dirty = False
+        # Saved but still buffered by the storage, so kept in the checkpoint
+        self._unsettled: List[Activity] = []
+        
+        self._recover_checkpoint()
     
     def _init_storage(self) -> BaseStorage:
         """Initialize storage backend based on configuration."""
-        storage_config = self.config['storage']
-        storage_path = Path(storage_config['path']).expanduser()
+        return create_storage(self.config['storage'])
+    
+    def _init_categorizer(self) -> Optional[Categorizer]:
+        """Initialize rule-based categorization if enabled."""
+        categorization_config = self.config.get('categorization', {})
+        if not categorization_config.get('enabled', False):
+            return None
+        return Categorizer.from_config(categorization_config)
+    
+    def _init_coalescer(self) -> Optional[Coalescer]:
+        """Initialize coalescing of rapid window switches if enabled."""
+        coalescing_config = self.config.get('coalescing', {})
+        if not coalescing_config.get('enabled', False):
+            return None
         
-        if storage_config['type'] == 'sqlite':
-            return SQLiteStorage(storage_path / 'activities.db')
-        else:  # default to JSON
-            return JSONStorage(storage_path / storage_config['filename'])
+        return Coalescer(
+            self._save_activity,
+            gap_tolerance=coalescing_config.get('gap_tolerance', 5.0),
+            min_duration=coalescing_config.get('min_duration', 10.0),
+            max_delay=coalescing_config.get('max_delay', 60.0)
+        )
+    
+    def _init_retention(self) -> Optional[RetentionEngine]:
+        """Initialize the background retention job if enabled."""
+        retention_config = self.config.get('retention', {})
+        if not retention_config.get('enabled', False):
+            return None
+        
+        return RetentionEngine(
+            self.storage,
+            RetentionPolicy.from_config(retention_config),
+            batch_size=retention_config.get('batch_size', 500),
+            interval=retention_config.get('check_interval', 3600),
+            idle_check=self._idle_for_retention
+        )
+    
+    def _init_sync(self) -> Optional[SyncManager]:
+        """Initialize multi-device sync if enabled."""
+        sync_config = self.config.get('sync', {})
+        if not sync_config.get('enabled', False):
+            return None
+        
+        sync = SyncManager(
+            local_dir=self.config['storage']['path'],
+            shared_dir=sync_config['shared_dir'],
+            device_id=sync_config.get('device_id'),
+            interval=sync_config.get('interval', 300)
+        )
+        sync.seed_from(self.storage)
+        self.add_activity_listener(sync.record)
+        return sync
+    
+    def _init_uploader(self) -> Optional[AggregatorClient]:
+        """Initialize uploads to a team aggregation server if enabled."""
+        aggregation_config = self.config.get('aggregation', {})
+        if not aggregation_config.get('enabled', False):
+            return None
+        
+        uploader = AggregatorClient(
+            url=aggregation_config['url'],
+            user_id=aggregation_config['user_id'],
+            batch_size=aggregation_config.get('batch_size', 500),
+            interval=aggregation_config.get('interval', 60),
+            max_buffer=aggregation_config.get('max_buffer', 50000)
+        )
+        uploader.metrics = self.metrics
+        self.add_activity_listener(uploader.record)
+        return uploader
+    
+    def _init_reports(self) -> Optional[ReportScheduler]:
+        """Initialize scheduled report writing if enabled."""
+        reporting_config = self.config.get('reporting', {})
+        if not reporting_config.get('enabled', False):
+            return None
+        return ReportScheduler.from_config(self.storage, self.config, self.clock)
+    
+    def apply_config(self, config: dict) -> None:
+        """Adopt the settings that can change while tracking from ``config``.
+        
+        Intervals and thresholds are read on every use, so new values take
+        effect from the next tick; storage and other components are kept.
+        """
+        monitoring = config['monitoring']
+        self.inactivity_threshold = monitoring.get('inactivity_threshold', self.inactivity_threshold)
+        self.polling_interval = monitoring.get('polling_interval', self.polling_interval)
+        self.checkpoint_interval = monitoring.get('checkpoint_interval', self.checkpoint_interval)
+        if hasattr(self.input_monitor, 'input_threshold'):
+            self.input_monitor.input_threshold = monitoring.get(
+                'input_threshold', self.input_monitor.input_threshold
+            )
+        self.metrics_export_interval = config.get('metrics', {}).get(
+            'export_interval', self.metrics_export_interval
+        )
+        if self.coalescer:
+            coalescing_config = config.get('coalescing', {})
+            self.coalescer.gap_tolerance = timedelta(
+                seconds=coalescing_config.get('gap_tolerance', 5.0)
+            )
+            self.coalescer.min_duration = coalescing_config.get('min_duration', 10.0)
+            self.coalescer.max_delay = timedelta(seconds=coalescing_config.get('max_delay', 60.0))
+        retention_config = config.get('retention', {})
+        self.retention_idle_after = retention_config.get('idle_after', self.inactivity_threshold)
+        if self.retention:
+            self.retention.interval = retention_config.get('check_interval', 3600)
+        self.config = config
+    
+    def add_activity_listener(self, listener: Callable[[Activity], None]) -> None:
+        """Call ``listener`` with every activity after it has been saved."""
+        self._activity_listeners.append(listener)
+    
+    def _notify_saved(self, activity: Activity) -> None:
+        for listener in self._activity_listeners:
+            try:
+                listener(activity)
+            except Exception as e:
+                logger.error("Error in activity listener: %s", e, exc_info=True)
     
     def start(self) -> None:
         """Start activity tracking in a background thread."""
@@ -49,6 +206,14 @@ class ActivityTracker:
         self.stop_event.clear()
         self.tracking_thread = Thread(target=self._tracking_loop, daemon=True)
         self.tracking_thread.start()
+        if self.retention:
+            self.retention.start()
+        if self.sync:
+            self.sync.start()
+        if self.uploader:
+            self.uploader.start()
+        if self.reports:
+            self.reports.start()
         logger.info("Activity tracking started")
     
     def stop(self) -> None:
@@ -58,26 +223,67 @@ class ActivityTracker:
             
         self.stop_event.set()
         self.tracking_thread.join()
+        if self.retention:
+            self.retention.stop()
         self._end_current_activity()
+        if self.coalescer:
+            self.coalescer.flush()
+        self.storage.flush()
+        self._update_checkpoint()
+        if self.sync:
+            self.sync.stop()
+        if self.uploader:
+            self.uploader.stop()
+        if self.reports:
+            self.reports.stop()
         logger.info("Activity tracking stopped")
     
     def _tracking_loop(self) -> None:
         """Main tracking loop."""
         while not self.stop_event.is_set():
             try:
-                self._update_activity()
-                time.sleep(self.polling_interval)
+                self._service_profiler_request()
+                with self.metrics.timer('tick.total'):
+                    self._update_activity()
+                    self._checkpoint_current_activity()
+                if self.metrics.enabled:
+                    self._export_metrics()
+                self.clock.sleep(self.polling_interval)
             except Exception as e:
-                logger.error(f"Error in tracking loop: {e}", exc_info=True)
+                logger.error("Error in tracking loop: %s", e, exc_info=True)
     
     def _update_activity(self) -> None:
         """Update current activity based on system and input state."""
-        system_info = self.system_monitor.get_current_activity()
-        is_active = self.input_monitor.is_active()
+        self._apply_sample(*self._sample())
+    
+    def _sample(self) -> tuple:
+        """Read the foreground application and input state from the monitors."""
+        with self.metrics.timer('tick.sample'):
+            system_info = self.system_monitor.get_current_activity()
+            is_active = self.input_monitor.is_active()
+        if system_info:
+            # Every sample repeats the same few strings; share one copy of each
+            system_info = dict(
+                system_info,
+                process_name=self.strings.intern(system_info.get('process_name')),
+                window_title=self.strings.intern(system_info.get('window_title'))
+            )
+        return system_info, is_active
+    
+    def _apply_sample(self, system_info: Optional[Dict[str, Any]], is_active: bool,
+                      last_input_time: Optional[float] = None) -> None:
+        """Start, end or continue activities for one monitor sample."""
+        if self.coalescer:
+            self.coalescer.poll(self.clock.now())
         
         if not system_info or not is_active:
-            self._handle_inactivity()
+            self.idle_event.set()
+            if self._idle_since is None:
+                self._idle_since = self.clock.monotonic()
+            self._handle_inactivity(last_input_time)
             return
+        self.idle_event.clear()
+        self._idle_since = None
             
         # Check if this is a new activity
         if (not self.current_activity or
@@ -89,35 +295,161 @@ class ActivityTracker:
         """Start tracking a new activity."""
         if self.current_activity:
             self._end_current_activity()
-            
-        self.current_activity = Activity(
-            name=system_info['window_title'],
-            start_time=datetime.now(),
-            process_name=system_info['process_name'],
-            window_title=system_info['window_title']
-        )
-        logger.debug(f"Started new activity: {self.current_activity.name}")
+        
+        with self.metrics.timer('tick.switch'):
+            self.current_activity = Activity(
+                name=system_info['window_title'],
+                start_time=self.clock.now(),
+                process_name=system_info['process_name'],
+                window_title=system_info['window_title'],
+                category=self.categorizer.categorize(
+                    system_info['process_name'],
+                    system_info['window_title'],
+                    system_info.get('bundle_id')
+                ) if self.categorizer else None
+            )
+        self.metrics.increment('activities.started')
+        logger.debug("Started new activity: %s", self.current_activity.name)
     
     def _end_current_activity(self) -> None:
         """End the current activity and save it."""
         if not self.current_activity:
             return
             
-        self.current_activity.end_time = datetime.now()
-        if self.current_activity.duration_minutes > 0:
-            self.storage.save_activity(self.current_activity)
-            logger.debug(
-                f"Ended activity: {self.current_activity.name} "
-                f"({self.current_activity.duration_minutes:.1f} minutes)"
-            )
+        self.current_activity.end_time = self.clock.now()
+        if self.coalescer:
+            # Even sub-minute segments count towards coalesced totals
+            if self.current_activity.end_time > self.current_activity.start_time:
+                self.coalescer.push(self.current_activity)
+        elif self.current_activity.duration_ms > 0:
+            self._save_activity(self.current_activity)
         self.current_activity = None
+        if self._checkpoint_dirty or self.checkpoint_interval > 0:
+            # Cleared only once the ended activity is durable
+            self._update_checkpoint()
+    
+    def _save_activity(self, activity: Activity) -> None:
+        with self.metrics.timer('tick.save'):
+            self.storage.save_activity(activity)
+            if self.storage.has_pending_writes():
+                self._unsettled.append(activity)
+        self._notify_saved(activity)
+        logger.debug("Ended activity: %s (%.1f minutes)",
+                     activity.name, activity.duration_minutes)
+    
+    def _checkpoint_current_activity(self) -> None:
+        """Persist a heartbeat of the in-progress activity if one is due."""
+        if self.checkpoint_interval <= 0:
+            return
+        if not self.current_activity:
+            # Nothing changes until the ended activities become durable
+            if self._checkpoint_dirty and not self._unsettled_activities():
+                self._update_checkpoint()
+            return
+        
+        now = self.clock.monotonic()
+        if now - self._last_checkpoint < self.checkpoint_interval:
+            return
+        self._update_checkpoint()
     
-    def _handle_inactivity(self) -> None:
+    def _unsettled_activities(self) -> List[Activity]:
+        """Ended activities that a crash now would lose."""
+        if self._unsettled and not self.storage.has_pending_writes():
+            self._unsettled = []
+        activities = list(self._unsettled)
+        held = self.coalescer.held if self.coalescer else None
+        if held:
+            activities.append(held)
+        return activities
+    
+    def _update_checkpoint(self) -> None:
+        """Checkpoint the in-progress activity and every ended one not durable yet.
+        
+        Records held by the coalescer or buffered by the storage stay in the
+        checkpoint, which is only cleared once nothing could be lost.
+        """
+        activities = self._checkpoint_contents()
+        if activities:
+            try:
+                with self.metrics.timer('tick.checkpoint'):
+                    self._save_checkpoint(activities)
+            except Exception as e:
+                # A missed heartbeat must not stop tracking
+                logger.error(f"Error saving checkpoint: {e}", exc_info=True)
+                return
+            self._last_checkpoint = self.clock.monotonic()
+            self._checkpoint_dirty = True
+        elif self._checkpoint_dirty:
+            self.storage.clear_checkpoint()
+            self._checkpoint_dirty = False
+    
+    def _checkpoint_contents(self) -> List[Activity]:
+        activities = self._unsettled_activities()
+        if self.current_activity:
+            activities.append(
+                dataclasses.replace(self.current_activity, end_time=self.clock.now())
+            )
+        return activities
+    
+    def _save_checkpoint(self, activities: List[Activity]) -> None:
+        """Save the checkpoint, making room when it outgrows its slot."""
+        try:
+            self.storage.save_checkpoint(activities)
+            return
+        except ValueError:
+            pass
+        
+        # Too many unsettled activities: make them durable instead
+        logger.warning(f"{len(self._unsettled)} unsaved activities do not fit in "
+                       f"the checkpoint, flushing storage")
+        try:
+            self.storage.flush()
+        except Exception as e:
+            logger.error(f"Error flushing storage: {e}", exc_info=True)
+        while True:
+            try:
+                self.storage.save_checkpoint(self._checkpoint_contents())
+                return
+            except ValueError:
+                if not self._unsettled:
+                    raise
+                dropped = self._unsettled.pop(0)
+                logger.warning(f"Dropping {dropped.name} from the checkpoint; "
+                               f"it is lost if the tracker crashes before it is written")
+    
+    def _recover_checkpoint(self) -> None:
+        """Save the activities a crash left in the checkpoint."""
+        activities = self.storage.load_checkpoint()
+        if not activities:
+            return
+        
+        for activity in activities:
+            already_saved = any(
+                saved.start_time == activity.start_time and
+                saved.process_name == activity.process_name
+                for saved in self.storage.get_activities(start_time=activity.start_time)
+            )
+            if not already_saved and activity.duration_ms > 0:
+                self.storage.save_activity(activity)
+                self._notify_saved(activity)
+                logger.info(f"Recovered interrupted activity: {activity.name}")
+        self.storage.flush()
+        self.storage.clear_checkpoint()
+    
+    def _idle_for_retention(self) -> bool:
+        """Whether the user has been away long enough to run retention."""
+        idle_since = self._idle_since
+        return (self.idle_event.is_set() and idle_since is not None and
+                self.clock.monotonic() - idle_since >= self.retention_idle_after)
+    
+    def _handle_inactivity(self, last_input_time: Optional[float] = None) -> None:
         """Handle user inactivity."""
         if not self.current_activity:
             return
-            
-        inactive_time = time.time() - self.input_monitor._get_last_input_time()
+        
+        if last_input_time is None:
+            last_input_time = self.input_monitor._get_last_input_time()
+        inactive_time = self.clock.time() - last_input_time
         if inactive_time >= self.inactivity_threshold:
             self._end_current_activity()
     
@@ -127,20 +459,128 @@ class ActivityTracker:
         """Retrieve activities for the specified time range."""
         return self.storage.get_activities(start_time, end_time)
     
+    def get_overlapping(self, start_time: datetime, end_time: datetime) -> List[Activity]:
+        """Retrieve activities overlapping the time range, including ones straddling it."""
+        return self.storage.get_overlapping(start_time, end_time)
+    
+    def get_activities_at(self, moment: datetime) -> List[Activity]:
+        """Retrieve what was being done at ``moment``."""
+        return self.storage.get_activities_at(moment)
+    
+    def get_page(self,
+                 before: Optional[datetime] = None,
+                 limit: int = 100) -> List[Activity]:
+        """Retrieve one page of history, newest first, starting before ``before``."""
+        return self.storage.get_page(before, limit)
+    
+    def search(self,
+               query: str,
+               start_time: Optional[datetime] = None,
+               end_time: Optional[datetime] = None,
+               limit: int = 100) -> List[Activity]:
+        """Find activities by application or window title words."""
+        return self.storage.search(query, start_time, end_time, limit)
+    
     def get_daily_summary(self, date: Optional[datetime] = None) -> Dict[str, float]:
         """Get summary of activities for a specific date."""
         if not date:
-            date = datetime.now()
+            date = self.clock.now()
             
         start_time = datetime(date.year, date.month, date.day)
         end_time = start_time + timedelta(days=1)
         
-        activities = self.get_activities(start_time, end_time)
-        summary = {}
+        activities = self.get_overlapping(start_time, end_time)
+        totals: Dict[Optional[str], int] = {}
         
         for activity in activities:
-            if activity.process_name not in summary:
-                summary[activity.process_name] = 0
-            summary[activity.process_name] += activity.duration_minutes
-            
-        return summary
+            if not activity.end_time:
+                continue
+            # Count only the part of activities straddling midnight within the day
+            clipped = min(activity.end_time, end_time) - max(activity.start_time, start_time)
+            previous = totals.get(activity.process_name, 0)
+            totals[activity.process_name] = previous + milliseconds(clipped)
+        
+        # Summed exactly in milliseconds; minutes are only for display
+        return {process_name: total / 60000 for process_name, total in totals.items()}
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return tracking loop and storage metrics collected so far."""
+        stats = self.metrics.stats()
+        stats['enabled'] = self.metrics.enabled
+        stats['tracking'] = self.tracking_thread is not None and self.tracking_thread.is_alive()
+        if self.coalescer:
+            stats['coalescing'] = self.coalescer.stats()
+        if self.categorizer:
+            stats['categorization_cache'] = self.categorizer.cache_stats()
+        return stats
+    
+    def _export_metrics(self) -> None:
+        """Dump metrics to the Prometheus textfile if one is configured."""
+        if not self.prometheus_file:
+            return
+        now = self.clock.monotonic()
+        if now - self._last_metrics_export < self.metrics_export_interval:
+            return
+        self._last_metrics_export = now
+        self.metrics.write_prometheus(self.prometheus_file)
+    
+    def start_profiler(self, mode: str = 'sampling', interval: float = 0.005) -> None:
+        """Start profiling the tracking thread.
+        
+        ``sampling`` inspects the thread's stack from a helper thread and
+        adds no overhead to the loop itself; ``cprofile`` traces every call
+        and is enabled on the tracking thread at the start of its next tick.
+        """
+        if self._profiler:
+            raise RuntimeError("Profiler already running")
+        
+        if mode == 'sampling':
+            if not (self.tracking_thread and self.tracking_thread.is_alive()):
+                raise RuntimeError("Tracking must be running to sample it")
+            self._profiler = SamplingProfiler(self.tracking_thread.ident, interval)
+            self._profiler.start()
+        elif mode == 'cprofile':
+            self._profiler = cProfile.Profile()
+            self._request_profiler_toggle('enable')
+        else:
+            raise ValueError(f"Unknown profiler mode: {mode}")
+    
+    def stop_profiler(self, output_path: Optional[str] = None) -> str:
+        """Stop the profiler and return a text report.
+        
+        When ``output_path`` is given, raw results are also written there:
+        pstats data for ``cprofile``, collapsed stacks for ``sampling``.
+        """
+        profiler = self._profiler
+        if not profiler:
+            raise RuntimeError("Profiler not running")
+        
+        if isinstance(profiler, SamplingProfiler):
+            profiler.stop()
+            if output_path:
+                profiler.write(output_path)
+            report = profiler.report()
+        else:
+            self._request_profiler_toggle('disable')
+            if output_path:
+                profiler.dump_stats(output_path)
+            report = format_cprofile(profiler)
+        self._profiler = None
+        return report
+    
+    def _request_profiler_toggle(self, action: str) -> None:
+        """Have the tracking thread enable or disable cProfile for itself."""
+        if not (self.tracking_thread and self.tracking_thread.is_alive()):
+            getattr(self._profiler, action)()
+            return
+        self._profiler_ready.clear()
+        self._profiler_request = (action, self._profiler)
+        self._profiler_ready.wait(timeout=self.polling_interval * 2 + 1)
+    
+    def _service_profiler_request(self) -> None:
+        if not self._profiler_request:
+            return
+        action, profiler = self._profiler_request
+        self._profiler_request = None
+        getattr(profiler, action)()
+        self._profiler_ready.set()
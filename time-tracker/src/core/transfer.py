@@ -0,0 +1,300 @@
+import os
+import csv
+import json
+import time
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Tuple
+from .activity import Activity
+from .compressed import CompressedStorage
+from .storage import BaseStorage, JSONStorage, SQLiteStorage
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ('name', 'start_time', 'end_time', 'process_name', 'window_title', 'category')
+STORAGE_FORMATS = ('json', 'sqlite', 'compressed')
+FILE_FORMATS = ('csv', 'jsonl', 'columnar')
+FORMATS = STORAGE_FORMATS + FILE_FORMATS
+
+SUFFIX_FORMATS = {
+    '.json': 'json',
+    '.db': 'sqlite',
+    '.sqlite': 'sqlite',
+    '.sqlite3': 'sqlite',
+    '.tz': 'compressed',
+    '.csv': 'csv',
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+    '.tcol': 'columnar',
+}
+
+COLUMNAR_MAGIC = 'timetracker-columnar'
+
+def detect_format(path: Path) -> str:
+    """Infer the data format from a file suffix."""
+    fmt = SUFFIX_FORMATS.get(path.suffix.lower())
+    if not fmt:
+        raise ValueError(f"Cannot infer format of {path}; pass it explicitly")
+    return fmt
+
+def open_storage(path: Path, fmt: str) -> BaseStorage:
+    """Open a storage backend located at ``path``."""
+    if fmt == 'sqlite':
+        return SQLiteStorage(path)
+    if fmt == 'compressed':
+        return CompressedStorage(path)
+    return JSONStorage(path)
+
+@dataclass
+class TransferStats:
+    """Outcome of a transfer."""
+    rows: int = 0
+    skipped: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+def _in_range(activity: Activity,
+              start_time: Optional[datetime],
+              end_time: Optional[datetime]) -> bool:
+    # Mirrors the filtering semantics of BaseStorage.get_activities
+    if start_time and activity.start_time < start_time:
+        return False
+    if end_time and activity.end_time and activity.end_time > end_time:
+        return False
+    return True
+
+def _record_to_activity(record: dict) -> Activity:
+    record = {key: (record.get(key) or None) for key in FIELDS}
+    record['name'] = record['name'] or ''
+    return Activity.from_dict(record)
+
+def _iter_storage(storage: BaseStorage,
+                  start_time: Optional[datetime],
+                  end_time: Optional[datetime],
+                  batch_size: int) -> Iterator[Activity]:
+    try:
+        for batch in storage.iter_activities(start_time, end_time, batch_size):
+            yield from batch
+    finally:
+        storage.close()
+
+def _batched(records: Iterator[Activity], batch_size: int) -> Iterator[List[Activity]]:
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            return
+        yield batch
+
+def _iter_csv(path: Path) -> Iterator[Activity]:
+    with path.open('r', newline='') as f:
+        for record in csv.DictReader(f):
+            yield _record_to_activity(record)
+
+def _iter_jsonl(path: Path) -> Iterator[Activity]:
+    with path.open('r') as f:
+        for line in f:
+            if line.strip():
+                yield _record_to_activity(json.loads(line))
+
+def _iter_columnar(path: Path) -> Iterator[Activity]:
+    with path.open('r') as f:
+        header = json.loads(f.readline() or 'null')
+        if not header or header.get('format') != COLUMNAR_MAGIC:
+            raise ValueError(f"{path} is not a columnar activity file")
+        for line in f:
+            if not line.strip():
+                continue
+            columns = json.loads(line)['columns']
+            for values in zip(*(columns[field] for field in FIELDS)):
+                yield _record_to_activity(dict(zip(FIELDS, values)))
+
+_FILE_READERS = {
+    'csv': _iter_csv,
+    'jsonl': _iter_jsonl,
+    'columnar': _iter_columnar,
+}
+
+def read_batches(path: Path,
+                 fmt: Optional[str] = None,
+                 start_time: Optional[datetime] = None,
+                 end_time: Optional[datetime] = None,
+                 batch_size: int = 1000,
+                 skip: int = 0) -> Iterator[List[Activity]]:
+    """Stream activities from a storage backend or export file in batches."""
+    fmt = fmt or detect_format(path)
+    if not path.exists():
+        raise FileNotFoundError(f"No such activity source: {path}")
+    if fmt in STORAGE_FORMATS:
+        records = _iter_storage(open_storage(path, fmt), start_time, end_time, batch_size)
+    else:
+        records = (
+            activity for activity in _FILE_READERS[fmt](path)
+            if _in_range(activity, start_time, end_time)
+        )
+    return _batched(islice(records, skip, None), batch_size)
+
+class _StorageWriter:
+    def __init__(self, path: Path, fmt: str, append: bool):
+        self.storage = open_storage(path, fmt)
+        # A crash after a batch was saved but before the resume offset was
+        # recorded leaves that one batch in the store already
+        self._dedupe_next = append
+
+    def write(self, batch: List[Activity]) -> None:
+        if self._dedupe_next:
+            self._dedupe_next = False
+            saved = {
+                (activity.start_time, activity.process_name)
+                for activity in self.storage.get_activities(
+                    start_time=min(activity.start_time for activity in batch)
+                )
+            }
+            batch = [activity for activity in batch
+                     if (activity.start_time, activity.process_name) not in saved]
+        self.storage.save_activities(batch)
+
+    def commit(self) -> Optional[int]:
+        self.storage.flush()
+        return None
+
+    def close(self) -> None:
+        self.storage.close()
+
+class _FileWriter:
+    """Appends to an export file, made durable before each resume offset."""
+
+    def commit(self) -> Optional[int]:
+        """Fsync the file and return its committed size."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return self._file.tell()
+
+    def close(self) -> None:
+        self._file.close()
+
+class _CSVWriter(_FileWriter):
+    def __init__(self, path: Path, fmt: str, append: bool):
+        write_header = not (append and path.exists())
+        self._file = path.open('a' if append else 'w', newline='')
+        self._writer = csv.DictWriter(self._file, fieldnames=FIELDS + ('duration_ms',))
+        if write_header:
+            self._writer.writeheader()
+
+    def write(self, batch: List[Activity]) -> None:
+        self._writer.writerows(activity.to_dict() for activity in batch)
+
+class _JSONLWriter(_FileWriter):
+    def __init__(self, path: Path, fmt: str, append: bool):
+        self._file = path.open('a' if append else 'w')
+
+    def write(self, batch: List[Activity]) -> None:
+        self._file.writelines(json.dumps(activity.to_dict()) + '\n' for activity in batch)
+
+class _ColumnarWriter(_FileWriter):
+    """Writes one row group of column arrays per batch, Parquet style."""
+
+    def __init__(self, path: Path, fmt: str, append: bool):
+        write_header = not (append and path.exists())
+        self._file = path.open('a' if append else 'w')
+        if write_header:
+            self._file.write(json.dumps({
+                'format': COLUMNAR_MAGIC,
+                'version': 1,
+                'columns': list(FIELDS),
+            }) + '\n')
+
+    def write(self, batch: List[Activity]) -> None:
+        records = [activity.to_dict() for activity in batch]
+        columns = {field: [record[field] for record in records] for field in FIELDS}
+        self._file.write(json.dumps({'rows': len(records), 'columns': columns}) + '\n')
+
+_WRITERS = {
+    'json': _StorageWriter,
+    'sqlite': _StorageWriter,
+    'compressed': _StorageWriter,
+    'csv': _CSVWriter,
+    'jsonl': _JSONLWriter,
+    'columnar': _ColumnarWriter,
+}
+
+def _state_path(destination: Path) -> Path:
+    return destination.with_name(destination.name + '.transfer-state')
+
+def _load_resume_offset(source: Path, destination: Path) -> Tuple[int, Optional[int]]:
+    """Return the source rows and destination file size last committed."""
+    state_path = _state_path(destination)
+    if not state_path.exists():
+        return 0, None
+    state = json.loads(state_path.read_text())
+    if state.get('source') != str(source.resolve()):
+        raise ValueError(
+            f"{destination} has an unfinished transfer from {state.get('source')}"
+        )
+    return state['rows'], state.get('size')
+
+def _save_resume_offset(source: Path, destination: Path, rows: int,
+                        size: Optional[int] = None) -> None:
+    state_path = _state_path(destination)
+    tmp_path = state_path.with_name(state_path.name + '.tmp')
+    tmp_path.write_text(json.dumps({
+        'source': str(source.resolve()), 'rows': rows, 'size': size
+    }))
+    tmp_path.replace(state_path)
+
+def transfer(source: Path,
+             destination: Path,
+             source_format: Optional[str] = None,
+             destination_format: Optional[str] = None,
+             start_time: Optional[datetime] = None,
+             end_time: Optional[datetime] = None,
+             batch_size: int = 1000,
+             resume: bool = False,
+             progress: Optional[Callable[[TransferStats], None]] = None) -> TransferStats:
+    """Stream activities from ``source`` into ``destination`` batch by batch.
+
+    Each batch is committed as a unit. After every commit the number of
+    source rows consumed is recorded next to the destination, so an
+    interrupted transfer restarted with ``resume=True`` continues from the
+    last committed batch instead of starting over. Rows written after that
+    commit are not imported twice: export files are cut back to their
+    committed size, and stores skip activities they already hold.
+    """
+    source_format = source_format or detect_format(source)
+    destination_format = destination_format or detect_format(destination)
+    if source.resolve() == destination.resolve():
+        raise ValueError("Source and destination must differ")
+
+    offset, size = _load_resume_offset(source, destination) if resume else (0, None)
+    if offset and size is not None and destination.exists():
+        os.truncate(destination, size)
+    stats = TransferStats(skipped=offset)
+    writer = _WRITERS[destination_format](destination, destination_format, offset > 0)
+    started = time.perf_counter()
+    batches = read_batches(source, source_format, start_time, end_time,
+                           batch_size, skip=offset)
+    try:
+        for batch in batches:
+            writer.write(batch)
+            size = writer.commit()
+            stats.rows += len(batch)
+            stats.seconds = time.perf_counter() - started
+            _save_resume_offset(source, destination, offset + stats.rows, size)
+            if progress:
+                progress(stats)
+    finally:
+        batches.close()
+        writer.close()
+
+    stats.seconds = time.perf_counter() - started
+    _state_path(destination).unlink(missing_ok=True)
+    logger.info(
+        f"Transferred {stats.rows} activities from {source} to {destination} "
+        f"({stats.rows_per_second:.0f} rows/s)"
+    )
+    return stats
@@ -0,0 +1,145 @@
+import json
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+from .base_monitor import BaseMonitor
+from ..core.activity import Activity
+from ..core.clock import SimulatedClock
+
+@dataclass
+class TraceEvent:
+    """Foreground and input state from ``time`` until the next event."""
+    time: datetime
+    process_name: Optional[str] = None
+    window_title: Optional[str] = None
+    idle: bool = False
+
+    def to_dict(self) -> dict:
+        return {
+            'time': self.time.isoformat(),
+            'process_name': self.process_name,
+            'window_title': self.window_title,
+            'idle': self.idle,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'TraceEvent':
+        return cls(
+            time=datetime.fromisoformat(data['time']),
+            process_name=data.get('process_name'),
+            window_title=data.get('window_title'),
+            idle=data.get('idle', False)
+        )
+
+class ReplayTrace:
+    """A time-ordered trace of focus and idle events read against a clock."""
+
+    def __init__(self, events: Iterable[TraceEvent], clock: Optional[SimulatedClock] = None):
+        self.events: List[TraceEvent] = sorted(events, key=lambda e: e.time)
+        if not self.events:
+            raise ValueError("A trace needs at least one event")
+        self._times = [event.time for event in self.events]
+        self.clock = clock or SimulatedClock(self.events[0].time)
+
+    @property
+    def start(self) -> datetime:
+        return self._times[0]
+
+    @property
+    def end(self) -> datetime:
+        return self._times[-1]
+
+    def current_index(self) -> int:
+        return max(0, bisect_right(self._times, self.clock.now()) - 1)
+
+    def current(self) -> TraceEvent:
+        return self.events[self.current_index()]
+
+    def next_change(self) -> Optional[datetime]:
+        """Time of the next event after the clock, if any."""
+        index = self.current_index() + 1
+        return self._times[index] if index < len(self._times) else None
+
+    def idle_since(self) -> Optional[datetime]:
+        """Start of the current run of idle events, if the trace is idle now."""
+        index = self.current_index()
+        if not self.events[index].idle:
+            return None
+        while index > 0 and self.events[index - 1].idle:
+            index -= 1
+        return self._times[index]
+
+    @classmethod
+    def load(cls, path: Path, clock: Optional[SimulatedClock] = None) -> 'ReplayTrace':
+        """Load a trace recorded as JSON Lines of :class:`TraceEvent` dicts."""
+        with Path(path).open('r') as f:
+            return cls((TraceEvent.from_dict(json.loads(line)) for line in f if line.strip()),
+                       clock)
+
+    def save(self, path: Path) -> None:
+        with Path(path).open('w') as f:
+            for event in self.events:
+                f.write(json.dumps(event.to_dict()) + '\n')
+
+    @classmethod
+    def from_activities(cls, activities: Iterable[Activity],
+                        clock: Optional[SimulatedClock] = None) -> 'ReplayTrace':
+        """Build a trace that reproduces stored or generated activities.
+
+        Gaps between activities become idle periods.
+        """
+        events: List[TraceEvent] = []
+        last_end: Optional[datetime] = None
+        for activity in sorted(activities, key=lambda a: a.start_time):
+            if last_end and activity.start_time > last_end:
+                events.append(TraceEvent(last_end, idle=True))
+            events.append(TraceEvent(activity.start_time, activity.process_name,
+                                     activity.window_title))
+            last_end = activity.end_time or activity.start_time
+        if last_end:
+            events.append(TraceEvent(last_end, idle=True))
+        return cls(events, clock)
+
+class ReplaySystemMonitor(BaseMonitor):
+    """System monitor reporting the foreground app recorded in a trace."""
+
+    def __init__(self, trace: ReplayTrace):
+        super().__init__()
+        self.trace = trace
+
+    def get_current_activity(self) -> Optional[Dict[str, Any]]:
+        event = self.trace.current()
+        if event.process_name is None:
+            return None
+        return {
+            'process_name': event.process_name,
+            'window_title': event.window_title,
+        }
+
+    def is_active(self) -> bool:
+        return self.trace.current().process_name is not None
+
+class ReplayInputMonitor(BaseMonitor):
+    """Input monitor reporting the idle state recorded in a trace."""
+
+    def __init__(self, trace: ReplayTrace):
+        super().__init__()
+        self.trace = trace
+
+    def _get_last_input_time(self) -> float:
+        idle_since = self.trace.idle_since()
+        return (idle_since or self.trace.clock.now()).timestamp()
+
+    def get_current_activity(self) -> Optional[Dict[str, Any]]:
+        idle_since = self.trace.idle_since()
+        now = self.trace.clock.now()
+        return {
+            'last_input_time': self._get_last_input_time(),
+            'is_active': idle_since is None,
+            'idle_duration': (now - idle_since).total_seconds() if idle_since else 0,
+        }
+
+    def is_active(self) -> bool:
+        return not self.trace.current().idle
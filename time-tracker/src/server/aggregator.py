@@ -0,0 +1,217 @@
+import re
+import json
+import logging
+import threading
+from collections import defaultdict
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+from ..core.activity import Activity
+from ..core.storage import SQLiteStorage
+
+logger = logging.getLogger(__name__)
+
+USER_ID_PATTERN = re.compile(r'^[A-Za-z0-9_.-]{1,64}$')
+
+# Largest request body accepted, in bytes
+MAX_BODY_SIZE = 16 * 2**20
+
+def _minutes(milliseconds: int) -> float:
+    # Totals are summed exactly and only rounded for the response
+    return round(milliseconds / 60000, 2)
+
+class UserPartition(SQLiteStorage):
+    """One user's activities, in a database file of its own.
+
+    Each ingested batch is recorded in the same transaction as its rows, so
+    a tracker retrying a batch it never got an answer for is not counted
+    twice. Rollups are maintained by the storage's insert trigger.
+    """
+
+    def _init_db(self):
+        super()._init_db()
+        with self._connect() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS ingested_batches (
+                    batch_id TEXT PRIMARY KEY,
+                    activity_count INTEGER NOT NULL
+                )
+            ''')
+
+    def ingest(self, activities: List[Activity], batch_id: Optional[str] = None) -> int:
+        """Store a batch. Returns the number of activities accepted."""
+        with self._connect() as conn:
+            if batch_id is not None:
+                cursor = conn.execute(
+                    'INSERT OR IGNORE INTO ingested_batches (batch_id, activity_count) '
+                    'VALUES (?, ?)',
+                    (batch_id, len(activities))
+                )
+                if not cursor.rowcount:
+                    return 0
+            self._insert(conn, activities)
+        return len(activities)
+
+class Aggregator:
+    """Ingests activity batches from many users into per-user partitions.
+
+    Writers to different users never contend; writers to the same user are
+    serialized by a per-user lock rather than by SQLite's busy handler.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root).expanduser()
+        self.partition_dir = self.root / 'users'
+        self.partition_dir.mkdir(parents=True, exist_ok=True)
+        self._partitions: Dict[str, UserPartition] = {}
+        self._locks: Dict[str, threading.Lock] = defaultdict(threading.Lock)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def validate_user(user_id: str) -> str:
+        if not USER_ID_PATTERN.match(user_id):
+            raise ValueError(f"Invalid user id: {user_id!r}")
+        return user_id
+
+    def partition(self, user_id: str) -> Tuple[UserPartition, threading.Lock]:
+        """Return the user's partition and write lock, creating them if needed."""
+        self.validate_user(user_id)
+        with self._lock:
+            partition = self._partitions.get(user_id)
+            if partition is None:
+                partition = UserPartition(self.partition_dir / f'{user_id}.db')
+                self._partitions[user_id] = partition
+            return partition, self._locks[user_id]
+
+    def users(self) -> List[str]:
+        return sorted(path.stem for path in self.partition_dir.glob('*.db'))
+
+    def ingest(self, user_id: str, activities: List[Activity],
+               batch_id: Optional[str] = None) -> int:
+        partition, lock = self.partition(user_id)
+        with lock:
+            return partition.ingest(activities, batch_id)
+
+    def team_summary(self,
+                     start_day: Optional[date] = None,
+                     end_day: Optional[date] = None) -> dict:
+        """Total minutes per user and per application, read from rollups.
+
+        ``end_day`` is exclusive, as in :meth:`BaseStorage.get_rollups`.
+        """
+        users: Dict[str, int] = {}
+        applications: Dict[str, int] = defaultdict(int)
+        activity_count = 0
+        for user_id in self.users():
+            partition, _ = self.partition(user_id)
+            user_ms = 0
+            for rollup in partition.get_rollups(start_day, end_day):
+                user_ms += rollup.total_ms
+                applications[rollup.process_name or 'Unknown'] += rollup.total_ms
+                activity_count += rollup.activity_count
+            users[user_id] = user_ms
+        return {
+            'start_day': start_day.isoformat() if start_day else None,
+            'end_day': end_day.isoformat() if end_day else None,
+            'total_minutes': _minutes(sum(users.values())),
+            'activity_count': activity_count,
+            'users': {user_id: _minutes(total) for user_id, total in users.items()},
+            'applications': {
+                name: _minutes(total)
+                for name, total in sorted(applications.items(), key=lambda x: -x[1])
+            },
+        }
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    """HTTP API of :class:`AggregationServer`.
+
+    ``POST /users/<user>/activities`` with ``{"batch_id": ..., "activities": [...]}``,
+    ``GET /summary?start=YYYY-MM-DD&end=YYYY-MM-DD``, ``GET /users`` and
+    ``GET /health``.
+    """
+
+    server: 'AggregationServer'
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        try:
+            if url.path == '/health':
+                self._send(200, {'status': 'ok'})
+            elif url.path == '/users':
+                self._send(200, {'users': self.server.aggregator.users()})
+            elif url.path == '/summary':
+                query = parse_qs(url.query)
+                start = query.get('start', [None])[0]
+                end = query.get('end', [None])[0]
+                self._send(200, self.server.aggregator.team_summary(
+                    date.fromisoformat(start) if start else None,
+                    date.fromisoformat(end) if end else None
+                ))
+            else:
+                self._send(404, {'error': 'not found'})
+        except ValueError as e:
+            self._send(400, {'error': str(e)})
+
+    def do_POST(self):
+        parts = urlparse(self.path).path.strip('/').split('/')
+        if len(parts) != 3 or parts[0] != 'users' or parts[2] != 'activities':
+            self._send(404, {'error': 'not found'})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            if length > MAX_BODY_SIZE:
+                self.close_connection = True
+                self._send(413, {'error': 'batch too large'})
+                return
+            payload = json.loads(self.rfile.read(length))
+            activities = [Activity.from_dict(item) for item in payload['activities']]
+            accepted = self.server.aggregator.ingest(
+                parts[1], activities, payload.get('batch_id')
+            )
+        except (ValueError, KeyError, TypeError) as e:
+            self._send(400, {'error': f"Invalid batch: {e}"})
+            return
+        self._send(200, {'accepted': accepted, 'duplicate': bool(activities) and not accepted})
+
+    def _send(self, status: int, body: dict) -> None:
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+class AggregationServer(ThreadingHTTPServer):
+    """Threaded HTTP endpoint in front of an :class:`Aggregator`."""
+
+    daemon_threads = True
+    # Room for many trackers connecting at once
+    request_queue_size = 256
+
+    def __init__(self, aggregator: Aggregator, host: str = '127.0.0.1', port: int = 8765):
+        self.aggregator = aggregator
+        super().__init__((host, port), _RequestHandler)
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> None:
+        """Serve in a background thread."""
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        logger.info(f"Aggregation server listening on {self.url}")
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+        if self.thread:
+            self.thread.join()
@@ -0,0 +1,143 @@
+import json
+import uuid
+import logging
+import threading
+from datetime import date
+from threading import Thread, Event
+from typing import List, Optional
+from urllib.error import HTTPError, URLError
+from urllib.parse import quote, urlencode
+from urllib.request import Request, urlopen
+from ..core.activity import Activity
+from ..core.metrics import NULL_METRICS
+
+logger = logging.getLogger(__name__)
+
+class AggregatorClient:
+    """Pushes a tracker's saved activities to an aggregation server.
+
+    Activities are buffered and sent in batches. Every batch gets an id
+    before its first attempt and keeps it across retries, so the server can
+    drop a batch it already stored. A batch the server rejects with a 4xx
+    status is dropped, since resending it cannot succeed; only server
+    errors and network failures are retried. While the server is
+    unreachable at most ``max_buffer`` activities are kept, oldest dropped
+    first.
+    """
+
+    metrics = NULL_METRICS
+
+    def __init__(self,
+                 url: str,
+                 user_id: str,
+                 batch_size: int = 500,
+                 interval: float = 60.0,
+                 timeout: float = 10.0,
+                 max_buffer: int = 50000):
+        self.url = url.rstrip('/')
+        self.user_id = user_id
+        self.batch_size = batch_size
+        self.interval = interval
+        self.timeout = timeout
+        self.max_buffer = max_buffer
+        self.rejected = 0
+        self.dropped = 0
+        self._buffer: List[Activity] = []
+        self._in_flight: Optional[tuple] = None
+        self._lock = threading.Lock()
+        self.stop_event = Event()
+        self.thread: Optional[Thread] = None
+
+    def push(self, activities: List[Activity], batch_id: Optional[str] = None) -> int:
+        """Send one batch. Returns the number of activities the server accepted."""
+        body = json.dumps({
+            'batch_id': batch_id or uuid.uuid4().hex,
+            'activities': [activity.to_dict() for activity in activities],
+        }).encode('utf-8')
+        request = Request(
+            f'{self.url}/users/{quote(self.user_id)}/activities',
+            data=body,
+            headers={'Content-Type': 'application/json'},
+            method='POST'
+        )
+        with urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read())['accepted']
+
+    def summary(self, start_day: Optional[date] = None,
+                end_day: Optional[date] = None) -> dict:
+        params = {}
+        if start_day:
+            params['start'] = start_day.isoformat()
+        if end_day:
+            params['end'] = end_day.isoformat()
+        with urlopen(f'{self.url}/summary?{urlencode(params)}', timeout=self.timeout) as response:
+            return json.loads(response.read())
+
+    def record(self, activity: Activity) -> None:
+        """Buffer a saved activity for the next upload."""
+        with self._lock:
+            self._buffer.append(activity)
+            overflow = len(self._buffer) - self.max_buffer
+            if overflow > 0:
+                del self._buffer[:overflow]
+                self.dropped += overflow
+        if overflow > 0:
+            self.metrics.increment('aggregation.dropped_activities', overflow)
+            if self.dropped == overflow:
+                logger.warning("Upload buffer full, dropping the oldest activities")
+
+    def flush(self) -> int:
+        """Upload buffered activities.
+
+        Batches that fail with a server or network error are kept for the
+        next flush; batches the server rejects are dropped.
+        """
+        sent = 0
+        while True:
+            with self._lock:
+                if self._in_flight is None:
+                    if not self._buffer:
+                        return sent
+                    batch = self._buffer[:self.batch_size]
+                    del self._buffer[:self.batch_size]
+                    self._in_flight = (uuid.uuid4().hex, batch)
+                batch_id, batch = self._in_flight
+            try:
+                self.push(batch, batch_id)
+            except HTTPError as e:
+                if not 400 <= e.code < 500:
+                    logger.warning(f"Upload to {self.url} failed, will retry: {e}")
+                    return sent
+                logger.error(f"Server rejected batch {batch_id} of {len(batch)} "
+                             f"activities, dropping it: {e}")
+                self.rejected += len(batch)
+                self.metrics.increment('aggregation.rejected_batches')
+                self.metrics.increment('aggregation.rejected_activities', len(batch))
+            except (URLError, OSError) as e:
+                logger.warning(f"Upload to {self.url} failed, will retry: {e}")
+                return sent
+            else:
+                sent += len(batch)
+            with self._lock:
+                self._in_flight = None
+
+    def start(self) -> None:
+        if self.thread and self.thread.is_alive():
+            return
+        self.stop_event.clear()
+        self.thread = Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        if not self.thread:
+            return
+        self.stop_event.set()
+        self.thread.join()
+        self.flush()
+
+    def _run(self) -> None:
+        while not self.stop_event.wait(self.interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Error uploading activities: {e}", exc_info=True)
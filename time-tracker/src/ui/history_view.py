@@ -0,0 +1,128 @@
+import tkinter as tk
+from tkinter import ttk
+from typing import List
+import logging
+from ..core.activity import Activity
+from ..core.pagination import PageCache, PageFetcher
+
+logger = logging.getLogger(__name__)
+
+class HistoryView(ttk.Frame):
+    """Scrollable browser over the whole stored history.
+
+    The Treeview only ever holds as many items as fit on screen; scrolling
+    rewrites their values from a :class:`PageCache`, so browsing months of
+    history costs the same as browsing one page.
+    """
+
+    COLUMNS = (("Start", 130), ("Duration", 80), ("Application", 120), ("Title", 300))
+    POLL_MS = 50
+
+    def __init__(self, parent: tk.Misc, fetch: PageFetcher,
+                 page_size: int = 200, prefetch_pages: int = 2,
+                 visible_rows: int = 20):
+        super().__init__(parent)
+        self.cache = PageCache(fetch, page_size, prefetch_pages)
+        self.offset = 0
+        self._items: List[str] = []
+        self._poll_id = None
+
+        self.tree = ttk.Treeview(
+            self,
+            columns=[name for name, _ in self.COLUMNS],
+            show="headings",
+            selectmode="none",
+            height=visible_rows
+        )
+        for name, width in self.COLUMNS:
+            self.tree.heading(name, text=name)
+            self.tree.column(name, width=width, stretch=name == "Title")
+
+        # Scrolling is virtual: the scrollbar drives the offset, not the tree
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<MouseWheel>", self._on_wheel)
+        self.tree.bind("<Button-4>", lambda event: self.scroll_to(self.offset - 3))
+        self.tree.bind("<Button-5>", lambda event: self.scroll_to(self.offset + 3))
+        self._resize_items(visible_rows)
+        self.refresh()
+
+    @property
+    def visible_rows(self) -> int:
+        return len(self._items)
+
+    def refresh(self) -> None:
+        """Reload history from now, scrolled to the top."""
+        self.cache.reset()
+        self.offset = 0
+        self._render()
+
+    def scroll_to(self, offset: int) -> None:
+        last = self.cache.total_rows - self.visible_rows
+        self.offset = max(0, min(offset, last))
+        self._render()
+
+    def destroy(self) -> None:
+        if self._poll_id is not None:
+            self.after_cancel(self._poll_id)
+        self.cache.close()
+        super().destroy()
+
+    def _on_scrollbar(self, *args) -> None:
+        if args[0] == "moveto":
+            self.scroll_to(int(float(args[1]) * self.cache.total_rows))
+        elif args[0] == "scroll":
+            step = self.visible_rows if args[2] == "pages" else 1
+            self.scroll_to(self.offset + int(args[1]) * step)
+
+    def _on_wheel(self, event: tk.Event) -> None:
+        self.scroll_to(self.offset + (-3 if event.delta > 0 else 3))
+
+    def _on_resize(self, event: tk.Event) -> None:
+        row_height = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        # Leave room for the heading row
+        rows = max(1, event.height // row_height - 1)
+        if rows != self.visible_rows:
+            self._resize_items(rows)
+            self._render()
+
+    def _resize_items(self, rows: int) -> None:
+        while len(self._items) < rows:
+            self._items.append(self.tree.insert("", tk.END, values=()))
+        while len(self._items) > rows:
+            self.tree.delete(self._items.pop())
+
+    def _render(self) -> None:
+        """Write the rows at the current offset into the fixed set of items."""
+        rows = self.cache.rows(self.offset, self.visible_rows)
+        total = self.cache.total_rows
+        for i, item in enumerate(self._items):
+            if i < len(rows):
+                values = self._format(rows[i])
+            elif self.offset + i < total:
+                values = ("", "", "Loading…", "")
+            else:
+                values = ()
+            self.tree.item(item, values=values)
+
+        total = max(total, 1)
+        self.scrollbar.set(self.offset / total,
+                           min(1.0, (self.offset + self.visible_rows) / total))
+        if self.cache.pending and self._poll_id is None:
+            self._poll_id = self.after(self.POLL_MS, self._poll)
+
+    def _poll(self) -> None:
+        self._poll_id = None
+        self._render()
+
+    @staticmethod
+    def _format(activity: Activity) -> tuple:
+        return (
+            activity.start_time.strftime("%Y-%m-%d %H:%M"),
+            f"{activity.duration_minutes:.1f} min",
+            activity.process_name or "",
+            activity.window_title or ""
+        )
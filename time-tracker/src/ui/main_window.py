@@ -2,19 +2,27 @@ import tkinter as tk
 from tkinter import ttk
 from typing import Optional
 from datetime import datetime, timedelta
-import yaml
 import logging
 from pathlib import Path
+from ..core.config import ConfigService
 from ..core.tracker import ActivityTracker
+from ..core.async_tracker import AsyncActivityTracker
+from ..core.timeline import Timeline
+from .history_view import HistoryView
+from .timeline_view import TimelineView
 
 logger = logging.getLogger(__name__)
 
 class MainWindow:
     """Main application window."""
     
-    def __init__(self, config: dict):
+    def __init__(self, config: dict, config_service: Optional[ConfigService] = None):
         self.config = config
+        self.config_service = config_service
         self.tracker: Optional[ActivityTracker] = None
+        self.history_window: Optional[tk.Toplevel] = None
+        self.timeline: Optional[Timeline] = None
+        self.timeline_window: Optional[tk.Toplevel] = None
         
         # Create main window
         self.root = tk.Tk()
@@ -24,6 +32,8 @@ class MainWindow:
         self._setup_ui()
         self._setup_tracker()
         self._setup_update_timer()
+        if config_service:
+            config_service.subscribe(self._apply_config)
     
     def _setup_ui(self):
         """Setup the UI components."""
@@ -49,6 +59,18 @@ class MainWindow:
         )
         self.start_button.pack(side=tk.LEFT, padx=5)
         
+        ttk.Button(
+            controls_frame,
+            text="History",
+            command=self._show_history
+        ).pack(side=tk.LEFT, padx=5)
+        
+        ttk.Button(
+            controls_frame,
+            text="Timeline",
+            command=self._show_timeline
+        ).pack(side=tk.LEFT, padx=5)
+        
         # Recent Activities Frame
         activities_frame = ttk.LabelFrame(
             self.root,
@@ -84,7 +106,15 @@ class MainWindow:
     def _setup_tracker(self):
         """Initialize the activity tracker."""
         try:
-            self.tracker = ActivityTracker(self.config)
+            if self.config['monitoring'].get('event_loop') == 'asyncio':
+                self.tracker = AsyncActivityTracker(self.config)
+            else:
+                self.tracker = ActivityTracker(self.config)
+            self.timeline = Timeline(
+                self.tracker.storage,
+                max_days=self.config['ui'].get('timeline_cache_days', 62)
+            )
+            self.tracker.add_activity_listener(self.timeline.add)
         except Exception as e:
             logger.error(f"Failed to initialize tracker: {e}", exc_info=True)
             self.status_label.config(
@@ -95,12 +125,21 @@ class MainWindow:
     def _setup_update_timer(self):
         """Setup timer for periodic UI updates."""
         def update():
+            if self.config_service:
+                # Applies edits to the config file through _apply_config
+                self.config_service.check()
             self._update_current_activity()
             self._update_recent_activities()
             self.root.after(1000, update)  # Update every second
         
         self.root.after(1000, update)
     
+    def _apply_config(self, config: dict, changed: list) -> None:
+        """Use reloaded settings without restarting the tracker."""
+        self.config = config
+        if self.tracker:
+            self.tracker.apply_config(config)
+    
     def _toggle_tracking(self):
         """Toggle activity tracking on/off."""
         if not self.tracker:
@@ -116,6 +155,41 @@ class MainWindow:
             self.status_label.config(text="Not tracking")
             logger.info("Tracking stopped")
     
+    def _show_history(self):
+        """Open the history browser, or bring it to the front with fresh data."""
+        if not self.tracker:
+            return
+        if self.history_window and self.history_window.winfo_exists():
+            self.history_view.refresh()
+            self.history_window.lift()
+            return
+        
+        self.history_window = tk.Toplevel(self.root)
+        self.history_window.title("History")
+        self.history_window.geometry("700x500")
+        self.history_view = HistoryView(
+            self.history_window,
+            self.tracker.get_page,
+            page_size=self.config['ui'].get('history_page_size', 200),
+            prefetch_pages=self.config['ui'].get('history_prefetch_pages', 2)
+        )
+        self.history_view.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+    
+    def _show_timeline(self):
+        """Open the timeline, or bring it to the front."""
+        if not self.timeline:
+            return
+        if self.timeline_window and self.timeline_window.winfo_exists():
+            self.timeline_view.redraw()
+            self.timeline_window.lift()
+            return
+        
+        self.timeline_window = tk.Toplevel(self.root)
+        self.timeline_window.title("Timeline")
+        self.timeline_window.geometry("900x260")
+        self.timeline_view = TimelineView(self.timeline_window, self.timeline)
+        self.timeline_view.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+    
     def _update_current_activity(self):
         """Update the current activity display."""
         if not self.tracker or not self.tracker.current_activity:
@@ -137,29 +211,27 @@ class MainWindow:
         if not self.tracker:
             return
             
-        # Clear current items
-        for item in self.activities_tree.get_children():
-            self.activities_tree.delete(item)
-        
-        # Get recent activities
-        end_time = datetime.now()
-        start_time = end_time - timedelta(hours=24)
-        activities = self.tracker.get_activities(start_time, end_time)
-        
-        # Sort by start time, most recent first
-        activities.sort(key=lambda x: x.start_time, reverse=True)
-        
-        # Take only the most recent N activities
+        # Most recent N activities of the last 24 hours, newest first
         limit = self.config['ui']['recent_activities_count']
-        for activity in activities[:limit]:
-            self.activities_tree.insert(
-                "",
-                tk.END,
-                values=(
-                    f"{activity.duration_minutes:.1f} min",
-                    f"{activity.process_name}: {activity.window_title}"
-                )
+        start_time = datetime.now() - timedelta(hours=24)
+        rows = [
+            (
+                f"{activity.duration_minutes:.1f} min",
+                f"{activity.process_name}: {activity.window_title}"
             )
+            for activity in self.tracker.get_page(limit=limit)[:limit]
+            if activity.start_time >= start_time
+        ]
+        
+        # Rewrite existing items in place instead of rebuilding the list
+        items = list(self.activities_tree.get_children())
+        for item in items[len(rows):]:
+            self.activities_tree.delete(item)
+        for i, values in enumerate(rows):
+            if i < len(items):
+                self.activities_tree.item(items[i], values=values)
+            else:
+                self.activities_tree.insert("", tk.END, values=values)
     
     def run(self):
         """Start the main application loop."""
@@ -171,20 +243,15 @@ class MainWindow:
 
 def main():
     """Main entry point for the UI."""
+    from ..__main__ import config_path, setup_logging
+    
     try:
-        # Load configuration
-        config_path = Path(__file__).parent.parent.parent / 'config' / 'default_config.yaml'
-        with config_path.open('r') as f:
-            config = yaml.safe_load(f)
-        
-        # Setup logging
-        logging_config_path = config_path.parent / 'logging_config.yaml'
-        with logging_config_path.open('r') as f:
-            logging_config = yaml.safe_load(f)
-            logging.config.dictConfig(logging_config)
+        app_dir = Path(__file__).parent.parent.parent
+        config_service = ConfigService(config_path(app_dir))
+        setup_logging(app_dir)
         
         # Create and run main window
-        window = MainWindow(config)
+        window = MainWindow(config_service.config, config_service)
         window.run()
         
     except Exception as e:
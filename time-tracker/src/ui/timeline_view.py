@@ -0,0 +1,169 @@
+import tkinter as tk
+from tkinter import ttk
+from datetime import datetime, timedelta
+from typing import Dict, List
+import logging
+import zlib
+from ..core.timeline import Timeline
+
+logger = logging.getLogger(__name__)
+
+PALETTE = (
+    "#4e79a7", "#f28e2b", "#e15759", "#76b7b2", "#59a14f",
+    "#edc948", "#b07aa1", "#ff9da7", "#9c755f", "#bab0ac",
+)
+
+class TimelineView(ttk.Frame):
+    """Gantt-style strip of the dominant application over a day, week or month.
+
+    Segments come from a :class:`Timeline` at a resolution chosen for the
+    canvas width, and are drawn into a pool of rectangles that is reused
+    between refreshes: surplus items are hidden, never deleted.
+    """
+
+    ZOOMS = ("Day", "Week", "Month")
+    BAR_TOP, BAR_HEIGHT, LEGEND_ROWS = 24, 60, 5
+
+    def __init__(self, parent: tk.Misc, timeline: Timeline, refresh_ms: int = 5000):
+        super().__init__(parent)
+        self.timeline = timeline
+        self.refresh_ms = refresh_ms
+        self.zoom = tk.StringVar(value="Day")
+        self.start = self._period_start(datetime.now())
+        self._bars: List[int] = []
+        self._labels: List[int] = []
+        self._legend: List[int] = []
+        self._refresh_id = None
+
+        controls = ttk.Frame(self)
+        controls.pack(fill=tk.X)
+        ttk.Button(controls, text="<", width=3, command=lambda: self._step(-1)).pack(side=tk.LEFT)
+        ttk.Button(controls, text=">", width=3, command=lambda: self._step(1)).pack(side=tk.LEFT)
+        for name in self.ZOOMS:
+            ttk.Radiobutton(controls, text=name, value=name, variable=self.zoom,
+                            command=self._set_zoom).pack(side=tk.LEFT, padx=2)
+        self.range_label = ttk.Label(controls)
+        self.range_label.pack(side=tk.RIGHT)
+
+        self.canvas = tk.Canvas(self, height=self.BAR_TOP + self.BAR_HEIGHT + 20 * self.LEGEND_ROWS + 30,
+                                background="white", highlightthickness=0)
+        self.canvas.pack(fill=tk.BOTH, expand=True)
+        self.canvas.bind("<Configure>", lambda event: self.redraw())
+        self._schedule_refresh()
+
+    @property
+    def span(self) -> timedelta:
+        zoom = self.zoom.get()
+        if zoom == "Month":
+            next_month = (self.start.replace(day=28) + timedelta(days=4)).replace(day=1)
+            return next_month - self.start
+        return timedelta(days=7 if zoom == "Week" else 1)
+
+    def redraw(self) -> None:
+        """Draw the current range, reusing canvas items."""
+        width = max(1, self.canvas.winfo_width())
+        end = self.start + self.span
+        seconds = self.span.total_seconds()
+        segments = self.timeline.segments(self.start, end, max_bins=width)
+
+        totals: Dict[str, float] = {}
+        for i, segment in enumerate(segments):
+            x0 = (segment.start - self.start).total_seconds() / seconds * width
+            x1 = (segment.end - self.start).total_seconds() / seconds * width
+            # Partly tracked bins are drawn shorter
+            top = self.BAR_TOP + self.BAR_HEIGHT * (1 - min(1.0, segment.coverage))
+            self._item(self._bars, i, "rectangle")
+            self.canvas.coords(self._bars[i], x0, top, max(x1, x0 + 1), self.BAR_TOP + self.BAR_HEIGHT)
+            self.canvas.itemconfigure(self._bars[i], fill=self._color(segment.process_name),
+                                      state=tk.NORMAL)
+            totals[segment.process_name] = (
+                totals.get(segment.process_name, 0.0)
+                + (segment.end - segment.start).total_seconds() * segment.coverage
+            )
+        self._hide(self._bars, len(segments))
+
+        self._draw_ticks(width, seconds)
+        self._draw_legend(totals)
+        self.range_label.config(
+            text=f"{self.start:%Y-%m-%d} to {end - timedelta(seconds=1):%Y-%m-%d}"
+            if self.zoom.get() != "Day" else f"{self.start:%A %Y-%m-%d}"
+        )
+
+    def destroy(self) -> None:
+        if self._refresh_id is not None:
+            self.after_cancel(self._refresh_id)
+        super().destroy()
+
+    def _draw_ticks(self, width: int, seconds: float) -> None:
+        if self.zoom.get() == "Day":
+            ticks = [(self.start + timedelta(hours=h), f"{h:02d}") for h in range(0, 24, 3)]
+        else:
+            days = int(seconds // 86400)
+            every = 1 if days <= 7 else 5
+            ticks = [(self.start + timedelta(days=d), f"{self.start + timedelta(days=d):%d %b}")
+                     for d in range(0, days, every)]
+        for i, (moment, text) in enumerate(ticks):
+            x = (moment - self.start).total_seconds() / seconds * width
+            self._item(self._labels, i, "text")
+            self.canvas.coords(self._labels[i], x + 2, self.BAR_TOP - 12)
+            self.canvas.itemconfigure(self._labels[i], text=text, anchor=tk.W, state=tk.NORMAL)
+        self._hide(self._labels, len(ticks))
+
+    def _draw_legend(self, totals: Dict[str, float]) -> None:
+        top = sorted(totals.items(), key=lambda item: -item[1])[:self.LEGEND_ROWS]
+        y = self.BAR_TOP + self.BAR_HEIGHT + 16
+        for i, (process_name, tracked) in enumerate(top):
+            swatch, label = 2 * i, 2 * i + 1
+            self._item(self._legend, swatch, "rectangle")
+            self._item(self._legend, label, "text")
+            row = y + 20 * i
+            self.canvas.coords(self._legend[swatch], 6, row - 6, 18, row + 6)
+            self.canvas.itemconfigure(self._legend[swatch], fill=self._color(process_name),
+                                      state=tk.NORMAL)
+            self.canvas.coords(self._legend[label], 24, row)
+            self.canvas.itemconfigure(self._legend[label], anchor=tk.W, state=tk.NORMAL,
+                                      text=f"{process_name}  {tracked / 3600:.1f} h")
+        self._hide(self._legend, 2 * len(top))
+
+    def _item(self, pool: List[int], index: int, kind: str) -> None:
+        """Make sure ``pool[index]`` exists, creating a canvas item only if the pool is short."""
+        while len(pool) <= index:
+            if kind == "rectangle":
+                pool.append(self.canvas.create_rectangle(0, 0, 0, 0, width=0))
+            else:
+                pool.append(self.canvas.create_text(0, 0, text=""))
+
+    def _hide(self, pool: List[int], used: int) -> None:
+        for item in pool[used:]:
+            self.canvas.itemconfigure(item, state=tk.HIDDEN)
+
+    @staticmethod
+    def _color(process_name: str) -> str:
+        # Stable across runs, unlike hash()
+        return PALETTE[zlib.crc32(process_name.encode("utf-8")) % len(PALETTE)]
+
+    def _period_start(self, moment: datetime) -> datetime:
+        day = datetime(moment.year, moment.month, moment.day)
+        if self.zoom.get() == "Week":
+            return day - timedelta(days=day.weekday())
+        if self.zoom.get() == "Month":
+            return day.replace(day=1)
+        return day
+
+    def _set_zoom(self) -> None:
+        self.start = self._period_start(self.start)
+        self.redraw()
+
+    def _step(self, direction: int) -> None:
+        if self.zoom.get() == "Month":
+            month = self.start.month - 1 + direction
+            self.start = self.start.replace(year=self.start.year + month // 12, month=month % 12 + 1)
+        else:
+            self.start += direction * self.span
+        self.redraw()
+
+    def _schedule_refresh(self) -> None:
+        def refresh():
+            self.redraw()
+            self._refresh_id = self.after(self.refresh_ms, refresh)
+        self._refresh_id = self.after(self.refresh_ms, refresh)
@@ -0,0 +1,117 @@
+import queue
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class _RoutingQueueHandler(QueueHandler):
+    """Queues records along with the handlers they were meant for."""
+
+    def __init__(self, pipeline: 'LogPipeline', handlers: Iterable[logging.Handler]):
+        super().__init__(pipeline.queue)
+        self.pipeline = pipeline
+        self.targets = tuple(handlers)
+
+    def prepare(self, record: logging.LogRecord) -> tuple:
+        # Formatting, including the message itself, happens on the listener thread
+        return record, self.targets
+
+    def enqueue(self, item: tuple) -> None:
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            self.pipeline._count_drop()
+
+class _RoutingQueueListener(QueueListener):
+    def __init__(self, pipeline: 'LogPipeline'):
+        super().__init__(pipeline.queue)
+        self.pipeline = pipeline
+
+    def enqueue_sentinel(self) -> None:
+        # Wait for room rather than fail when the queue is full
+        self.queue.put(self._sentinel)
+
+    def handle(self, item: tuple) -> None:
+        record, targets = item
+        for handler in targets:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+        self.pipeline._report_drops(targets)
+
+class LogPipeline:
+    """Moves logging I/O off the calling threads.
+
+    :meth:`install` replaces the handlers of the root logger and of every
+    configured logger with one that puts records on a bounded queue; a
+    single listener thread formats them and passes them to the original
+    handlers. When the queue is full, records are dropped rather than
+    blocking the caller, and the number dropped is logged once the queue
+    drains. Messages are formatted by the listener, so log arguments should
+    not be mutated after the call.
+    """
+
+    def __init__(self, max_size: int = 10000):
+        self.queue: 'queue.Queue' = queue.Queue(max_size)
+        self.dropped = 0
+        self._reported = 0
+        self._lock = threading.Lock()
+        self._installed: List[Tuple[logging.Logger, List[logging.Handler]]] = []
+        self._listener: Optional[_RoutingQueueListener] = None
+
+    def install(self) -> None:
+        """Route every logger that has handlers through the queue."""
+        if self._listener:
+            return
+        loggers = [logging.getLogger()] + [
+            item for item in logging.root.manager.loggerDict.values()
+            if isinstance(item, logging.Logger)
+        ]
+        for target in loggers:
+            handlers = list(target.handlers)
+            if not handlers:
+                continue
+            for handler in handlers:
+                target.removeHandler(handler)
+            target.addHandler(_RoutingQueueHandler(self, handlers))
+            self._installed.append((target, handlers))
+        self._listener = _RoutingQueueListener(self)
+        self._listener.start()
+
+    def stop(self) -> None:
+        """Write out queued records and restore the original handlers."""
+        if not self._listener:
+            return
+        self._listener.stop()
+        self._listener = None
+        for target, handlers in self._installed:
+            for handler in list(target.handlers):
+                if isinstance(handler, _RoutingQueueHandler):
+                    target.removeHandler(handler)
+            for handler in handlers:
+                target.addHandler(handler)
+        self._installed = []
+        missed = self.dropped - self._reported
+        if missed:
+            self._reported = self.dropped
+            logger.warning(f"Dropped {missed} log records while the log queue was full")
+
+    def _count_drop(self) -> None:
+        with self._lock:
+            self.dropped += 1
+
+    def _report_drops(self, targets: Tuple[logging.Handler, ...]) -> None:
+        # Called on the listener thread once the queue has room again
+        if self.dropped == self._reported or not self.queue.empty():
+            return
+        with self._lock:
+            missed = self.dropped - self._reported
+            self._reported = self.dropped
+        record = logging.LogRecord(
+            logger.name, logging.WARNING, __file__, 0,
+            "Dropped %d log records while the log queue was full", (missed,), None
+        )
+        for handler in targets:
+            if record.levelno >= handler.level:
+                handler.handle(record)
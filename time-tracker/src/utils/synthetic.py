@@ -0,0 +1,41 @@
+import random
+from datetime import datetime, timedelta
+from typing import Iterator, Optional
+from ..core.activity import Activity
+
+def generate_activities(days: int = 30,
+                        switches_per_hour: float = 30.0,
+                        app_count: int = 20,
+                        titles_per_app: int = 10,
+                        active_hours: float = 8.0,
+                        start: Optional[datetime] = None,
+                        seed: int = 0) -> Iterator[Activity]:
+    """Generate a reproducible stream of synthetic, back-to-back activities.
+
+    Each day has ``active_hours`` of tracked time starting at 09:00, split
+    into segments whose lengths are exponentially distributed around
+    ``3600 / switches_per_hour`` seconds. Applications are drawn with a
+    skewed (Zipf-like) distribution so a few apps dominate, as in real use.
+    """
+    rng = random.Random(seed)
+    start = start or datetime(2024, 1, 1)
+    apps = [f"app{i:03d}" for i in range(app_count)]
+    weights = [1.0 / (rank + 1) for rank in range(app_count)]
+    mean_segment = 3600.0 / switches_per_hour
+
+    for day in range(days):
+        clock = datetime(start.year, start.month, start.day, 9) + timedelta(days=day)
+        day_end = clock + timedelta(hours=active_hours)
+        while clock < day_end:
+            app = rng.choices(apps, weights)[0]
+            title = f"{app} - document {rng.randrange(titles_per_app)}"
+            seconds = max(1.0, rng.expovariate(1.0 / mean_segment))
+            end = min(clock + timedelta(seconds=seconds), day_end)
+            yield Activity(
+                name=title,
+                start_time=clock,
+                end_time=end,
+                process_name=app,
+                window_title=title
+            )
+            clock = end
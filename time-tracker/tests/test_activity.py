@@ -78,3 +78,16 @@ def test_activity_no_end_time():
     
     assert restored.end_time is None
     assert restored.duration_minutes == 0.0
+
+def test_activity_duration_ms():
+    """Test sub-second durations are kept in whole milliseconds."""
+    start_time = datetime(2024, 5, 6, 9, 0)
+    activity = Activity(
+        name="Test Activity",
+        start_time=start_time,
+        end_time=start_time + timedelta(seconds=1, microseconds=250999)
+    )
+    
+    assert activity.duration_ms == 1250
+    assert activity.to_dict()["duration_ms"] == 1250
+    assert activity.duration_minutes == 1250 / 60000
@@ -0,0 +1,132 @@
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+from datetime import date, datetime, timedelta
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+from src.core.activity import Activity
+from src.server.aggregator import Aggregator, AggregationServer
+from src.server.client import AggregatorClient
+
+START = datetime(2024, 5, 6, 9, 0)
+
+def make_activities(app, count, minutes=10):
+    return [
+        Activity(
+            name=f"{app} {i}",
+            start_time=START + timedelta(minutes=i * minutes),
+            end_time=START + timedelta(minutes=(i + 1) * minutes),
+            process_name=app
+        )
+        for i in range(count)
+    ]
+
+@pytest.fixture
+def server(temp_dir):
+    server = AggregationServer(Aggregator(temp_dir), port=0)
+    server.start()
+    yield server
+    server.stop()
+
+def test_partitions_and_team_summary(temp_dir):
+    """Test that users get their own partitions and summaries add up."""
+    aggregator = Aggregator(temp_dir)
+    aggregator.ingest('alice', make_activities('editor', 3))
+    aggregator.ingest('bob', make_activities('browser', 2))
+    aggregator.ingest('bob', make_activities('editor', 1))
+    
+    assert aggregator.users() == ['alice', 'bob']
+    assert (temp_dir / 'users' / 'alice.db').exists()
+    
+    summary = aggregator.team_summary(START.date(), START.date() + timedelta(days=1))
+    assert summary['users'] == {'alice': 30.0, 'bob': 30.0}
+    assert summary['applications'] == {'editor': 40.0, 'browser': 20.0}
+    assert summary['activity_count'] == 6
+    assert aggregator.team_summary(date(2024, 5, 7))['total_minutes'] == 0
+
+def test_retried_batch_is_not_counted_twice(temp_dir):
+    """Test that batch ids make ingestion idempotent."""
+    aggregator = Aggregator(temp_dir)
+    batch = make_activities('editor', 4)
+    assert aggregator.ingest('alice', batch, batch_id='b1') == 4
+    assert aggregator.ingest('alice', batch, batch_id='b1') == 0
+    assert aggregator.team_summary()['activity_count'] == 4
+
+def test_invalid_user_rejected(temp_dir):
+    with pytest.raises(ValueError):
+        Aggregator(temp_dir).ingest('../alice', make_activities('editor', 1))
+
+def test_http_round_trip(server):
+    """Test pushing batches and reading the summary over HTTP."""
+    client = AggregatorClient(server.url, 'alice')
+    assert client.push(make_activities('editor', 3), batch_id='b1') == 3
+    assert client.push(make_activities('editor', 3), batch_id='b1') == 0
+    
+    summary = client.summary(START.date())
+    assert summary['users'] == {'alice': 30.0}
+    
+    request = Request(f'{server.url}/users/alice/activities', data=b'not json', method='POST')
+    with pytest.raises(HTTPError) as error:
+        urlopen(request)
+    assert error.value.code == 400
+
+def test_concurrent_trackers(server):
+    """Test many trackers pushing at once, several per user."""
+    def push(index):
+        client = AggregatorClient(server.url, f'user-{index % 10}')
+        return client.push(make_activities('editor', 5), batch_id=f'batch-{index}')
+    
+    with ThreadPoolExecutor(max_workers=40) as pool:
+        accepted = list(pool.map(push, range(40)))
+    
+    assert sum(accepted) == 200
+    summary = server.aggregator.team_summary()
+    assert len(summary['users']) == 10
+    assert summary['activity_count'] == 200
+
+def test_client_buffers_until_server_is_reachable(temp_dir):
+    """Test that failed uploads are retried with the same batch id."""
+    client = AggregatorClient('http://127.0.0.1:9', 'alice', batch_size=2, timeout=1)
+    for activity in make_activities('editor', 3):
+        client.record(activity)
+    assert client.flush() == 0
+    batch_id = client._in_flight[0]
+    
+    server = AggregationServer(Aggregator(temp_dir), port=0)
+    server.start()
+    try:
+        client.url = server.url
+        assert client.flush() == 3
+        assert server.aggregator.team_summary()['activity_count'] == 3
+        assert client.push(make_activities('editor', 2), batch_id=batch_id) == 0
+    finally:
+        server.stop()
+
+def test_client_drops_rejected_batches(server):
+    """Test that a 4xx batch is dropped while a 5xx batch is retried."""
+    from src.core.metrics import Metrics
+    client = AggregatorClient(server.url, 'not a valid id!', batch_size=2)
+    client.metrics = Metrics(enabled=True)
+    for activity in make_activities('editor', 3):
+        client.record(activity)
+    assert client.flush() == 0
+    assert client._in_flight is None and client._buffer == []
+    assert client.rejected == 3
+    assert client.metrics.stats()['counters']['aggregation.rejected_batches'] == 2
+    
+    client.user_id = 'alice'
+    client.record(make_activities('editor', 1)[0])
+    unavailable = HTTPError(server.url, 503, 'Service Unavailable', None, None)
+    with patch.object(client, 'push', side_effect=unavailable):
+        assert client.flush() == 0
+    assert client._in_flight is not None
+    assert client.flush() == 1
+
+def test_client_buffer_is_bounded():
+    """Test that only the newest activities are kept while uploads fail."""
+    client = AggregatorClient('http://127.0.0.1:9', 'alice', max_buffer=5)
+    activities = make_activities('editor', 8)
+    for activity in activities:
+        client.record(activity)
+    assert client._buffer == activities[3:]
+    assert client.dropped == 3
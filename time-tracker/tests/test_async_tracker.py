@@ -0,0 +1,115 @@
+import time
+import asyncio
+import threading
+import pytest
+from datetime import datetime
+from unittest.mock import Mock
+from src.core.clock import SimulatedClock
+from src.core.async_tracker import AsyncActivityTracker, send_ipc_command
+
+@pytest.fixture
+def monitors():
+    system_monitor = Mock()
+    system_monitor.get_current_activity.return_value = {
+        'process_name': 'editor',
+        'window_title': 'notes.txt'
+    }
+    input_monitor = Mock()
+    input_monitor.is_active.return_value = True
+    input_monitor._get_last_input_time.return_value = time.time()
+    return system_monitor, input_monitor
+
+@pytest.fixture
+def tracker(test_config, monitors):
+    test_config['monitoring']['polling_interval'] = 0.01
+    test_config['monitoring']['checkpoint_interval'] = 0.02
+    return AsyncActivityTracker(test_config, clock=SimulatedClock(datetime(2024, 5, 6, 9, 0)),
+                                system_monitor=monitors[0], input_monitor=monitors[1])
+
+def test_start_stop_saves_activity(tracker, monitors):
+    """Test that the loop tracks switches and saves on shutdown."""
+    tracker.start()
+    time.sleep(0.1)
+    assert tracker.current_activity.process_name == 'editor'
+    
+    tracker.clock.advance(300)
+    monitors[0].get_current_activity.return_value = {
+        'process_name': 'browser',
+        'window_title': 'docs'
+    }
+    time.sleep(0.1)
+    tracker.clock.advance(300)
+    tracker.stop()
+    
+    assert not tracker.tracking_thread.is_alive()
+    assert tracker.current_activity is None
+    assert [a.process_name for a in tracker.get_activities()] == ['editor', 'browser']
+
+def test_blocking_calls_run_on_executors(tracker, monitors):
+    """Test that monitors and storage are only touched off the loop thread."""
+    threads = {'monitor': set(), 'storage': set()}
+    system_monitor = monitors[0]
+    activity = system_monitor.get_current_activity.return_value
+    
+    def sample():
+        threads['monitor'].add(threading.current_thread().name)
+        return activity
+    system_monitor.get_current_activity.side_effect = sample
+    
+    save_activity = tracker.storage.save_activity
+    def save(activity):
+        threads['storage'].add(threading.current_thread().name)
+        save_activity(activity)
+    tracker.storage.save_activity = save
+    
+    tracker.start()
+    time.sleep(0.1)
+    tracker.clock.advance(300)
+    tracker.stop()
+    
+    assert threads['monitor'] and all(n.startswith('tracker-monitor') for n in threads['monitor'])
+    assert threads['storage'] and all(n.startswith('tracker-storage') for n in threads['storage'])
+
+def test_ipc_commands(tracker, temp_dir):
+    """Test querying a tracker running inside a caller's event loop."""
+    tracker.ipc_path = temp_dir / 'tracker.sock'
+    
+    async def scenario():
+        task = asyncio.create_task(tracker.run())
+        await asyncio.sleep(0.1)
+        loop = asyncio.get_running_loop()
+        status = await loop.run_in_executor(None, send_ipc_command, tracker.ipc_path, 'status')
+        summary = await loop.run_in_executor(None, send_ipc_command, tracker.ipc_path, 'summary')
+        with pytest.raises(RuntimeError):
+            await loop.run_in_executor(None, send_ipc_command, tracker.ipc_path, 'bogus')
+        tracker.request_stop()
+        await task
+        return status, summary
+    
+    status, summary = asyncio.run(scenario())
+    assert status['current']['process_name'] == 'editor'
+    assert status['idle'] is False
+    assert summary == {}
+    assert not tracker.ipc_path.exists()
+
+def test_reloaded_intervals_apply_to_running_tasks(tracker, temp_dir):
+    """Test that periodic tasks pick up intervals changed while running."""
+    tracker.checkpoint_interval = 0
+    tracker.metrics.enabled = True
+    tracker.prometheus_file = temp_dir / 'metrics.prom'
+    tracker.metrics_export_interval = 3600
+    tracker.start()
+    time.sleep(0.1)
+    tracker.clock.advance(60)
+    time.sleep(0.1)
+    assert tracker.storage.load_checkpoint() == []
+    assert not tracker.prometheus_file.exists()
+    
+    tracker.checkpoint_interval = 0.02
+    tracker.metrics_export_interval = 0.02
+    time.sleep(0.2)
+    try:
+        assert tracker.storage.load_checkpoint()[0].process_name == 'editor'
+        assert tracker.prometheus_file.exists()
+    finally:
+        tracker.stop()
@@ -0,0 +1,87 @@
+import pytest
+from datetime import datetime, timedelta
+from src.core.activity import Activity
+from src.core.categorizer import Categorizer
+from src.core.storage import JSONStorage, SQLiteStorage
+
+RULES = {
+    'Development': {
+        'processes': ['Code', 'Terminal'],
+        'bundle_ids': ['com.microsoft.VSCode'],
+        'titles': [r'\.py\b', 'GitHub'],
+    },
+    'Communication': {
+        'processes': ['Slack'],
+        'titles': ['Inbox'],
+    },
+}
+
+@pytest.fixture
+def categorizer():
+    return Categorizer(RULES, default='Other', cache_size=16)
+
+def test_exact_matches_win(categorizer):
+    """Test that process and bundle lookups take precedence over titles."""
+    assert categorizer.categorize('slack', 'main.py - review') == 'Communication'
+    assert categorizer.categorize('Electron', 'Inbox', 'com.microsoft.VSCode') == 'Development'
+
+def test_title_patterns_follow_rule_order(categorizer):
+    """Test that the first listed category wins wherever its pattern matches."""
+    assert categorizer.categorize('Safari', 'Inbox - notes.py') == 'Development'
+    assert categorizer.categorize('Safari', 'Inbox (3)') == 'Communication'
+    assert categorizer.categorize('Safari', 'github.com/org/repo') == 'Development'
+    assert categorizer.categorize('Safari', 'News') == 'Other'
+    assert categorizer.categorize(None, None) == 'Other'
+
+def test_results_are_memoized(categorizer):
+    for _ in range(5):
+        categorizer.categorize('Safari', 'Inbox')
+    stats = categorizer.cache_stats()
+    assert stats['misses'] == 1
+    assert stats['hits'] == 4
+
+def test_invalid_pattern_rejected():
+    with pytest.raises(ValueError):
+        Categorizer({'Broken': {'titles': ['(unclosed']}})
+
+def test_default_rules_file_loads():
+    categorizer = Categorizer.from_file()
+    assert categorizer.categorize('Code', 'untitled') == 'Development'
+
+@pytest.mark.parametrize('storage_class,filename', [
+    (JSONStorage, 'activities.json'),
+    (SQLiteStorage, 'activities.db'),
+])
+def test_bulk_recategorize(temp_dir, categorizer, storage_class, filename):
+    """Test re-categorizing stored history in batches."""
+    storage = storage_class(temp_dir / filename)
+    start = datetime(2024, 5, 6, 9, 0)
+    processes = ['Code', 'Slack', 'Safari'] * 5
+    storage.save_activities([
+        Activity(name='window', start_time=start + timedelta(minutes=i),
+                 end_time=start + timedelta(minutes=i + 1), process_name=process,
+                 window_title='window', category='Other')
+        for i, process in enumerate(processes)
+    ])
+    
+    assert storage.recategorize(categorizer.categorize, batch_size=4) == 10
+    assert storage.recategorize(categorizer.categorize, batch_size=4) == 0
+    categories = [activity.category for activity in storage.get_activities()]
+    assert categories == ['Development', 'Communication', 'Other'] * 5
+
+def test_tracker_assigns_categories(test_config):
+    """Test that new activities are categorized as they start."""
+    from unittest.mock import Mock
+    from src.core.tracker import ActivityTracker
+    test_config['categorization'] = {'enabled': True}
+    system_monitor = Mock()
+    system_monitor.get_current_activity.return_value = {
+        'process_name': 'Slack', 'window_title': 'general'
+    }
+    input_monitor = Mock()
+    input_monitor.is_active.return_value = True
+    tracker = ActivityTracker(test_config, system_monitor=system_monitor,
+                              input_monitor=input_monitor)
+    
+    tracker._update_activity()
+    assert tracker.current_activity.category == 'Communication'
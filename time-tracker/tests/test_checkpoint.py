@@ -0,0 +1,83 @@
+import json
+import pytest
+from datetime import datetime, timedelta
+from src.core.activity import Activity
+from src.core.checkpoint import CheckpointSlot, SLOT_SIZE, decode_checkpoint
+
+@pytest.fixture
+def slot(temp_dir):
+    """Create a checkpoint slot for testing."""
+    slot = CheckpointSlot(temp_dir / "activities.json.checkpoint", fsync=False)
+    yield slot
+    slot.close()
+
+@pytest.fixture
+def open_activity():
+    """Create an in-progress activity with a heartbeat end time."""
+    now = datetime.now()
+    return Activity(
+        name="Editor",
+        start_time=now - timedelta(minutes=5),
+        end_time=now,
+        process_name="editor",
+        window_title="Editor"
+    )
+
+def test_save_and_load(slot, open_activity):
+    """Test that the latest heartbeat is returned."""
+    assert slot.load() == []
+    
+    slot.save([open_activity])
+    later = open_activity.end_time + timedelta(seconds=5)
+    open_activity.end_time = later
+    slot.save([open_activity])
+    
+    [restored] = slot.load()
+    assert restored.process_name == "editor"
+    assert restored.end_time == later
+
+def test_file_stays_fixed_size(slot, open_activity):
+    """Test that heartbeats overwrite slots instead of appending."""
+    for _ in range(50):
+        slot.save([open_activity])
+    assert slot.filepath.stat().st_size == 2 * SLOT_SIZE
+
+def test_clear(slot, open_activity):
+    """Test that a cleared slot loads as empty."""
+    slot.save([open_activity])
+    slot.clear()
+    assert slot.load() == []
+
+def test_torn_write_falls_back_to_previous(slot, open_activity):
+    """Test that a corrupted newest slot does not lose the older one."""
+    slot.save([open_activity])
+    first_end = open_activity.end_time
+    open_activity.end_time = first_end + timedelta(seconds=5)
+    slot.save([open_activity])
+    slot.close()
+    
+    # Corrupt the slot holding the second (newest) record
+    with open(slot.filepath, 'r+b') as f:
+        f.seek(0)
+        f.write(b'\xff' * 64)
+    
+    reopened = CheckpointSlot(slot.filepath, fsync=False)
+    assert reopened.load()[0].end_time == first_end
+    reopened.close()
+
+def test_long_titles_are_truncated(slot, open_activity):
+    """Test that oversized activities still fit in one slot."""
+    open_activity.window_title = "x" * (SLOT_SIZE * 2)
+    open_activity.name = open_activity.window_title
+    slot.save([open_activity, open_activity])
+    
+    restored = slot.load()
+    assert [a.process_name for a in restored] == ["editor", "editor"]
+    assert all(a.window_title.startswith("x") for a in restored)
+
+def test_reads_single_activity_checkpoint(open_activity):
+    """Test that a checkpoint written before lists were stored still loads."""
+    payload = json.dumps(open_activity.to_dict())
+    [restored] = decode_checkpoint(payload)
+    assert restored.start_time == open_activity.start_time
+    assert decode_checkpoint('null') == []
@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta
+from src.core.activity import Activity
+from src.core.coalescer import Coalescer, coalesce
+from src.core.tracker import ActivityTracker
+from src.monitors.replay_monitor import ReplayTrace, ReplayInputMonitor, ReplaySystemMonitor
+from src.core.replay import replay_trace
+from src.utils.synthetic import generate_activities
+
+START = datetime(2024, 5, 6, 9, 0)
+
+def segments(*spec):
+    """Build back-to-back activities from ``(process, seconds)`` pairs."""
+    activities = []
+    moment = START
+    for process, seconds in spec:
+        end = moment + timedelta(seconds=seconds)
+        activities.append(Activity(name=f"{process} window", start_time=moment,
+                                   end_time=end, process_name=process))
+        moment = end
+    return activities
+
+def total_seconds(activities):
+    return sum((a.end_time - a.start_time).total_seconds() for a in activities)
+
+def test_merges_same_app_segments():
+    """Test that title changes within one app become one record."""
+    activities = segments(('editor', 30), ('editor', 120), ('editor', 40))
+    activities[1].window_title = 'main.py'
+    
+    result = coalesce(activities)
+    assert len(result) == 1
+    assert result[0].window_title == 'main.py'
+    assert result[0].end_time == activities[-1].end_time
+
+def test_folds_blips_into_neighbours():
+    """Test that alt-tab blips are absorbed while totals stay exact."""
+    activities = segments(('browser', 3), ('editor', 60), ('chat', 2), ('editor', 90),
+                          ('terminal', 4), ('browser', 45))
+    
+    result = coalesce(activities)
+    assert [a.process_name for a in result] == ['editor', 'browser']
+    assert total_seconds(result) == total_seconds(activities)
+    assert result[0].start_time == START
+
+def test_gaps_are_not_counted():
+    """Test that merging across a gap keeps the tracked duration."""
+    first, second = segments(('editor', 60), ('editor', 60))
+    second.start_time += timedelta(seconds=3)
+    second.end_time += timedelta(seconds=3)
+    
+    result = coalesce([first, second])
+    assert len(result) == 1
+    assert total_seconds(result) == 120
+    
+    second.start_time += timedelta(seconds=30)
+    assert len(coalesce([first, second])) == 2
+
+def test_sub_second_segments_sum_to_whole_milliseconds():
+    """Test that merged and folded totals are exact integer milliseconds."""
+    activities = segments(*[('editor', 0.001)] * 999 + [('chat', 0.333), ('editor', 0.667)])
+    
+    [result] = coalesce(activities, min_duration=1)
+    assert result.duration_ms == sum(a.duration_ms for a in activities) == 1999
+    
+    coalescer = Coalescer(lambda activity: None, min_duration=1)
+    for activity in activities:
+        coalescer.push(activity)
+    assert coalescer.stats()['folded_seconds'] == 0.333
+
+def test_poll_emits_after_max_delay():
+    saved = []
+    coalescer = Coalescer(saved.append, max_delay=60)
+    activity = segments(('editor', 120))[0]
+    coalescer.push(activity)
+    
+    coalescer.poll(activity.end_time + timedelta(seconds=30))
+    assert saved == []
+    coalescer.poll(activity.end_time + timedelta(seconds=60))
+    assert saved == [activity]
+    assert coalescer.stats()['output'] == 1
+
+def test_tracker_reports_reduction(test_config):
+    """Test coalescing a synthetic alt-tab-heavy day through the tracker."""
+    history = list(generate_activities(days=1, switches_per_hour=240, active_hours=1,
+                                       seed=3, start=START))
+    
+    def run(coalescing, filename):
+        config = dict(test_config, coalescing=coalescing,
+                      storage=dict(test_config['storage'], filename=filename))
+        trace = ReplayTrace.from_activities(history)
+        tracker = ActivityTracker(config, clock=trace.clock,
+                                  system_monitor=ReplaySystemMonitor(trace),
+                                  input_monitor=ReplayInputMonitor(trace))
+        replay_trace(tracker, trace)
+        return tracker
+    
+    plain = run({'enabled': False}, 'plain.json')
+    tracker = run({'enabled': True, 'max_delay': 3600}, 'coalesced.json')
+    
+    stats = tracker.stats()['coalescing']
+    assert stats['input'] == len(plain.get_activities())
+    assert stats['reduction_ratio'] > 0.2
+    saved = tracker.get_activities()
+    assert len(saved) == stats['output']
+    assert total_seconds(saved) == total_seconds(plain.get_activities())
@@ -0,0 +1,118 @@
+import lzma
+import pytest
+from datetime import datetime, timedelta
+from src.core.activity import Activity
+from src.core.compressed import CompressedStorage
+from src.core.storage import JSONStorage, create_storage
+from src.core.transfer import detect_format, open_storage
+
+START = datetime(2024, 3, 1)
+
+def make_activities(count, offset=0):
+    return [
+        Activity(name=f"task {i}", start_time=START + timedelta(minutes=10 * i),
+                 end_time=START + timedelta(minutes=10 * i + 5),
+                 process_name=f"app{i % 3}", window_title=f"doc {i}")
+        for i in range(offset, offset + count)
+    ]
+
+def names(activities):
+    return sorted(activity.name for activity in activities)
+
+@pytest.fixture
+def stores(temp_dir):
+    compressed = CompressedStorage(temp_dir / 'activities.tz', chunk_records=20)
+    reference = JSONStorage(temp_dir / 'activities.json')
+    activities = make_activities(75)
+    for i in range(0, len(activities), 7):
+        compressed.save_activities(activities[i:i + 7])
+        reference.save_activities(activities[i:i + 7])
+    reference.flush()
+    return compressed, reference
+
+def test_chunks_and_tail(stores):
+    compressed, _ = stores
+    assert len(compressed._frames) == 3
+    assert len(compressed._tail) == 15
+    reopened = CompressedStorage(compressed.filepath, chunk_records=20)
+    assert names(reopened.get_activities()) == names(make_activities(75))
+
+def test_queries_match_json(stores):
+    compressed, reference = stores
+    start, end = START + timedelta(hours=2), START + timedelta(hours=7, minutes=2)
+    assert names(compressed.get_activities(start, end)) == names(reference.get_activities(start, end))
+    assert names(compressed.get_overlapping(start, end)) == names(reference.get_overlapping(start, end))
+    assert [a.name for a in compressed.get_page(end, 12)] == [a.name for a in reference.get_page(end, 12)]
+    assert [a.name for a in compressed.search('app1 doc', start, limit=5)] == \
+        [a.name for a in reference.search('app1 doc', start, limit=5)]
+    assert compressed.get_rollups() == reference.get_rollups()
+
+def test_queries_skip_unmatched_chunks(stores):
+    compressed, _ = stores
+    compressed._chunks.clear()
+    compressed.get_activities(START, START + timedelta(hours=1))
+    assert list(compressed._chunks) == [compressed._frames[0].offset]
+
+def test_deletes_and_recategorize_keep_rollups(stores):
+    compressed, _ = stores
+    rollups = compressed.get_rollups()
+    cutoff = START + timedelta(hours=8)
+    assert compressed.delete_activities_before(cutoff, limit=30) == 30
+    assert names(compressed.get_activities()) == names(make_activities(45, offset=30))
+    assert compressed.get_rollups() == rollups
+
+    categorize = lambda process, title: 'work' if process == 'app0' else None
+    assert compressed.recategorize(categorize) == 15
+    assert {a.category for a in compressed.get_activities() if a.process_name == 'app0'} == {'work'}
+
+def test_retention_rewrites_store_once(stores):
+    from unittest.mock import patch
+    from src.core.retention import RetentionEngine, RetentionPolicy
+    compressed, _ = stores
+    engine = RetentionEngine(compressed, RetentionPolicy(raw_days=1), batch_size=4)
+    with patch.object(CompressedStorage, '_replace_store',
+                      autospec=True, side_effect=CompressedStorage._replace_store) as rewrite:
+        assert engine.run_once(now=START + timedelta(days=1, hours=8)) == 48
+    assert rewrite.call_count == 1
+    assert names(compressed.get_activities()) == names(make_activities(27, offset=48))
+
+def test_torn_frame_is_ignored_and_overwritten(temp_dir):
+    storage = CompressedStorage(temp_dir / 'activities.tz', chunk_records=10)
+    storage.save_activities(make_activities(10))
+    with storage.filepath.open('ab') as f:
+        f.write(b'TTCF\x00partial')
+    reopened = CompressedStorage(storage.filepath, chunk_records=10)
+    assert len(reopened.get_activities()) == 10
+    reopened.save_activities(make_activities(10, offset=10))
+    assert names(CompressedStorage(storage.filepath).get_activities()) == names(make_activities(20))
+
+def test_sealed_tail_is_not_read_twice(temp_dir):
+    storage = CompressedStorage(temp_dir / 'activities.tz', chunk_records=10)
+    storage.save_activities(make_activities(5))
+    stale_tail = storage.tail_path.read_bytes()
+    storage.save_activities(make_activities(5, offset=5))
+    # A crash after sealing the chunk but before the tail was replaced
+    storage.tail_path.write_bytes(stale_tail)
+    assert len(CompressedStorage(storage.filepath).get_activities()) == 10
+
+def test_lzma_codec_and_shared_store(temp_dir):
+    writer = CompressedStorage(temp_dir / 'activities.tz', codec='lzma', chunk_records=10)
+    reader = CompressedStorage(temp_dir / 'activities.tz')
+    writer.save_activities(make_activities(25))
+    assert len(reader.get_activities()) == 25
+    with writer.filepath.open('rb') as f:
+        f.seek(writer._frames[0].offset)
+        assert lzma.decompress(f.read(writer._frames[0].length))
+
+def test_unknown_codec(temp_dir):
+    with pytest.raises(ValueError):
+        CompressedStorage(temp_dir / 'activities.tz', codec='brotli')
+
+def test_configured_and_transfer(temp_dir):
+    storage = create_storage({'type': 'compressed', 'path': str(temp_dir),
+                              'filename': 'unused.json', 'chunk_records': 50})
+    assert isinstance(storage, CompressedStorage)
+    assert storage.filepath == temp_dir / 'activities.tz'
+    assert storage.chunk_records == 50
+    assert detect_format(storage.filepath) == 'compressed'
+    assert isinstance(open_storage(storage.filepath, 'compressed'), CompressedStorage)
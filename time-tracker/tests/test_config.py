@@ -0,0 +1,80 @@
+import os
+import pytest
+import yaml
+from unittest.mock import Mock
+from src.core.config import ConfigError, ConfigService, load_config
+
+def rewrite(path, config):
+    """Save ``config`` as an editor would, with a new modification time."""
+    stat = path.stat()
+    with path.open('w') as f:
+        yaml.dump(config, f)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+def test_load_validates(config_file, test_config):
+    assert load_config(config_file) == test_config
+
+    for section, key, value in [('monitoring', 'polling_interval', 0),
+                                ('monitoring', 'polling_interval', 'fast'),
+                                ('ui', 'recent_activities_count', 2.5),
+                                ('storage', 'type', 'csv')]:
+        broken = dict(test_config, **{section: dict(test_config[section], **{key: value})})
+        rewrite(config_file, broken)
+        with pytest.raises(ConfigError, match=f'{section}.{key}'):
+            load_config(config_file)
+
+    rewrite(config_file, {key: value for key, value in test_config.items() if key != 'storage'})
+    with pytest.raises(ConfigError, match='storage'):
+        load_config(config_file)
+
+def test_reload_applies_live_settings(config_file, test_config):
+    service = ConfigService(config_file, reload_interval=0.5)
+    listener = Mock()
+    service.subscribe(listener)
+    assert service.reload() == []
+
+    edited = dict(test_config,
+                  monitoring=dict(test_config['monitoring'], polling_interval=0.25),
+                  ui=dict(test_config['ui'], recent_activities_count=25),
+                  storage=dict(test_config['storage'], type='sqlite'))
+    rewrite(config_file, edited)
+    assert service.reload() == ['monitoring.polling_interval', 'ui.recent_activities_count']
+    listener.assert_called_once_with(service.config, ['monitoring.polling_interval',
+                                                      'ui.recent_activities_count'])
+    assert service.config['monitoring']['polling_interval'] == 0.25
+    assert service.config['ui']['recent_activities_count'] == 25
+    # Storage is only rebuilt on restart
+    assert service.config['storage']['type'] == 'json'
+
+def test_invalid_edit_keeps_config(config_file, test_config):
+    service = ConfigService(config_file)
+    with config_file.open('w') as f:
+        f.write('monitoring: [unclosed\n')
+    assert service.reload() == []
+    assert service.config == test_config
+
+    rewrite(config_file, dict(test_config, monitoring=dict(test_config['monitoring'],
+                                                           inactivity_threshold=60)))
+    assert service.reload() == ['monitoring.inactivity_threshold']
+
+def test_check_is_throttled(config_file, test_config):
+    service = ConfigService(config_file, reload_interval=3600)
+    rewrite(config_file, dict(test_config, ui=dict(test_config['ui'], recent_activities_count=5)))
+    assert service.check() == []
+    service._last_check -= 3600
+    assert service.check() == ['ui.recent_activities_count']
+
+def test_tracker_applies_config(test_config):
+    from src.core.tracker import ActivityTracker
+    test_config['coalescing'] = {'enabled': True}
+    tracker = ActivityTracker(test_config, system_monitor=Mock(), input_monitor=Mock())
+    storage = tracker.storage
+
+    tracker.apply_config(dict(test_config,
+                              monitoring=dict(test_config['monitoring'], polling_interval=0.5,
+                                              input_threshold=4.0),
+                              coalescing={'enabled': True, 'min_duration': 3}))
+    assert tracker.polling_interval == 0.5
+    assert tracker.input_monitor.input_threshold == 4.0
+    assert tracker.coalescer.min_duration == 3
+    assert tracker.storage is storage
@@ -0,0 +1,130 @@
+import json
+import sqlite3
+from datetime import date, datetime, timedelta
+from src.core.activity import Activity
+from src.core.interning import InternPool, StringTable
+from src.core.storage import JSONStorage, SQLiteStorage, decode_records, encode_records
+
+START = datetime(2024, 5, 6, 9, 0)
+
+def make_activities(count=40):
+    return [
+        Activity(name=f'report {i % 4}.md - Editor',
+                 start_time=START + timedelta(minutes=10 * i),
+                 end_time=START + timedelta(minutes=10 * i + 5),
+                 process_name='Editor' if i % 2 else 'Browser',
+                 window_title=f'report {i % 4}.md - Editor',
+                 category='Writing' if i % 2 else None)
+        for i in range(count)
+    ]
+
+def create_legacy_database(path, activities):
+    """Write a database in the layout used before strings were dictionary-encoded."""
+    with sqlite3.connect(str(path)) as conn:
+        conn.execute('''
+            CREATE TABLE activities (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL, start_time TEXT NOT NULL, end_time TEXT,
+                process_name TEXT, window_title TEXT, category TEXT
+            )
+        ''')
+        conn.execute('CREATE INDEX idx_activities_start_time ON activities (start_time)')
+        conn.execute('''
+            CREATE TABLE daily_rollups (
+                day TEXT NOT NULL, process_name TEXT NOT NULL,
+                total_minutes REAL NOT NULL, activity_count INTEGER NOT NULL,
+                PRIMARY KEY (day, process_name)
+            )
+        ''')
+        conn.executemany(
+            'INSERT INTO activities (name, start_time, end_time, process_name, window_title, category) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            [(a.name, a.start_time.isoformat(), a.end_time.isoformat(),
+              a.process_name, a.window_title, a.category) for a in activities]
+        )
+        # A rollup whose raw rows retention already deleted
+        conn.execute("INSERT INTO daily_rollups VALUES ('2024-01-01', 'Mail', 30.0, 3)")
+        conn.execute("INSERT INTO daily_rollups VALUES ('2024-05-06', 'Browser', 100.0, 20)")
+        conn.execute("INSERT INTO daily_rollups VALUES ('2024-05-06', 'Editor', 100.0, 20)")
+
+def test_intern_pool_shares_and_evicts():
+    pool = InternPool(max_size=2)
+    first = pool.intern(''.join(['Sa', 'fari']))
+    assert pool.intern(''.join(['Saf', 'ari'])) is first
+    assert pool.intern(None) is None
+    pool.intern('Mail')
+    pool.intern('Code')
+    assert len(pool) == 2
+    assert pool.intern('Safari') is not first
+
+def test_string_table_round_trip():
+    table = StringTable(['a', 'b'])
+    assert table.id_for('b') == 1
+    assert table.id_for('c') == 2
+    assert table.id_for(None) is None
+    assert [table.string(i) for i in range(3)] == ['a', 'b', 'c']
+
+def test_sqlite_stores_each_string_once(temp_dir):
+    storage = SQLiteStorage(temp_dir / 'activities.db')
+    activities = make_activities()
+    storage.save_activities(activities[:20])
+    for activity in activities[20:]:
+        storage.save_activity(activity)
+
+    with sqlite3.connect(str(storage.filepath)) as conn:
+        assert conn.execute('SELECT COUNT(*) FROM apps').fetchone()[0] == 2
+        assert conn.execute('SELECT COUNT(*) FROM titles').fetchone()[0] == 4
+    assert storage.get_activities() == activities
+
+    # A fresh instance resolves existing strings to the same ids
+    SQLiteStorage(storage.filepath).save_activity(activities[0])
+    with sqlite3.connect(str(storage.filepath)) as conn:
+        assert conn.execute('SELECT COUNT(*) FROM titles').fetchone()[0] == 4
+
+def test_sqlite_migrates_legacy_layout(temp_dir):
+    path = temp_dir / 'activities.db'
+    activities = make_activities()
+    create_legacy_database(path, activities)
+
+    storage = SQLiteStorage(path)
+    assert storage.get_activities() == activities
+    assert [a.window_title for a in storage.search('report 2*')] == ['report 2.md - Editor'] * 10
+    rollups = {(r.day, r.process_name): r.total_minutes for r in storage.get_rollups()}
+    assert rollups == {
+        (date(2024, 1, 1), 'Mail'): 30.0,
+        (date(2024, 5, 6), 'Browser'): 100.0,
+        (date(2024, 5, 6), 'Editor'): 100.0,
+    }
+
+    # New rows keep ids above the migrated ones and update rollups and search
+    storage.save_activity(Activity(name='inbox', start_time=START, end_time=START + timedelta(minutes=6),
+                                   process_name='Mail', window_title='inbox'))
+    with sqlite3.connect(str(path)) as conn:
+        assert conn.execute('SELECT MAX(id) FROM activities').fetchone()[0] == len(activities) + 1
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert 'activities_v1' not in tables and 'daily_rollups_v1' not in tables
+    assert [a.process_name for a in storage.search('inbox')] == ['Mail']
+    assert {r.process_name: r.total_minutes for r in storage.get_rollups(date(2024, 5, 6))}['Mail'] == 6.0
+
+def test_json_string_table_format(temp_dir):
+    storage = JSONStorage(temp_dir / 'activities.json')
+    activities = make_activities()
+    storage.save_activities(activities)
+
+    data = json.loads(storage.filepath.read_text())
+    assert data['format'] == 2
+    assert sorted(data['strings']) == sorted(
+        ['Browser', 'Editor', 'Writing'] + [f'report {i}.md - Editor' for i in range(4)]
+    )
+    assert JSONStorage(storage.filepath).get_activities() == activities
+
+def test_json_reads_legacy_list_format(temp_dir):
+    path = temp_dir / 'activities.json'
+    activities = make_activities(5)
+    path.write_text(json.dumps([a.to_dict() for a in activities], indent=2))
+
+    storage = JSONStorage(path)
+    assert storage.get_activities() == activities
+    storage.save_activity(make_activities(6)[5])
+    assert len(decode_records(json.loads(path.read_text()))) == 6
+    assert decode_records(encode_records([])) == []
@@ -0,0 +1,87 @@
+import random
+import sqlite3
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import Mock
+from src.core.activity import Activity
+from src.core.intervals import IntervalIndex
+from src.core.storage import JSONStorage, SQLiteStorage
+from src.core.tracker import ActivityTracker
+
+DAY = datetime(2024, 5, 6)
+
+@pytest.fixture(params=['json', 'sqlite'])
+def storage(request, temp_dir):
+    if request.param == 'json':
+        return JSONStorage(temp_dir / 'activities.json')
+    return SQLiteStorage(temp_dir / 'activities.db')
+
+def make_activity(start, end, process='Code'):
+    return Activity(name=process, start_time=start, end_time=end,
+                    process_name=process, window_title=process)
+
+def test_index_matches_brute_force():
+    rng = random.Random(7)
+    intervals = []
+    for _ in range(2000):
+        start = rng.randrange(10000)
+        intervals.append((start, None if rng.random() < 0.01 else start + rng.expovariate(1 / 30)))
+    # One very long interval must not hide or slow down the rest
+    intervals.append((5, 9000))
+    index = IntervalIndex.build(intervals[:1500])
+    index.extend(intervals[1500:])
+
+    for _ in range(200):
+        low = rng.randrange(10000)
+        high = low + rng.randrange(100)
+        assert index.overlapping(low, high) == [
+            i for i, (s, e) in enumerate(intervals) if s < high and (e is None or e > low)
+        ]
+        assert index.at(low) == [
+            i for i, (s, e) in enumerate(intervals) if s <= low and (e is None or e > low)
+        ]
+        assert index.within(low, high) == [
+            i for i, (s, e) in enumerate(intervals) if s >= low and (e is None or e <= high)
+        ]
+
+def test_range_queries_keep_open_activities(storage):
+    storage.save_activities([
+        Activity(name='open', start_time=DAY + timedelta(hours=9), process_name='open'),
+        make_activity(DAY + timedelta(hours=8), DAY + timedelta(hours=9), 'closed'),
+    ])
+    names = lambda activities: sorted(a.name for a in activities)
+    assert names(storage.get_activities(start_time=DAY)) == ['closed', 'open']
+    assert names(storage.get_activities(start_time=DAY + timedelta(hours=8, minutes=30))) == ['open']
+
+def test_overlap_and_point_queries(storage):
+    storage.save_activities([
+        make_activity(DAY - timedelta(hours=1), DAY + timedelta(hours=1), 'Overnight'),
+        make_activity(DAY + timedelta(hours=9), DAY + timedelta(hours=10), 'Code'),
+        make_activity(DAY + timedelta(hours=23), DAY + timedelta(hours=25), 'Late'),
+    ])
+    storage.save_activity(make_activity(DAY + timedelta(days=3), DAY + timedelta(days=3, hours=1)))
+
+    overlapping = storage.get_overlapping(DAY, DAY + timedelta(days=1))
+    assert [a.process_name for a in overlapping] == ['Overnight', 'Code', 'Late']
+    assert [a.process_name for a in storage.get_activities(DAY, DAY + timedelta(days=1))] == ['Code']
+    assert [a.process_name for a in storage.get_activities_at(DAY + timedelta(hours=9))] == ['Code']
+    assert storage.get_activities_at(DAY + timedelta(hours=10)) == []
+    assert [a.process_name for a in storage.get_activities_at(DAY + timedelta(minutes=59, seconds=59.5))] == ['Overnight']
+
+def test_sqlite_interval_index_is_backfilled(temp_dir):
+    path = temp_dir / 'activities.db'
+    SQLiteStorage(path).save_activity(make_activity(DAY, DAY + timedelta(seconds=0.5)))
+    with sqlite3.connect(str(path)) as conn:
+        conn.execute('DROP TABLE activity_intervals')
+    storage = SQLiteStorage(path)
+    assert len(storage.get_activities_at(DAY + timedelta(seconds=0.25))) == 1
+    assert storage.get_activities_at(DAY + timedelta(seconds=0.5)) == []
+
+def test_daily_summary_clips_straddling_activities(test_config):
+    tracker = ActivityTracker(test_config, system_monitor=Mock(), input_monitor=Mock())
+    tracker.storage.save_activities([
+        make_activity(DAY - timedelta(minutes=30), DAY + timedelta(minutes=30), 'Code'),
+        make_activity(DAY + timedelta(hours=12), DAY + timedelta(hours=13), 'Code'),
+        make_activity(DAY + timedelta(hours=23, minutes=45), DAY + timedelta(days=1, minutes=15), 'Mail'),
+    ])
+    assert tracker.get_daily_summary(DAY) == {'Code': 90.0, 'Mail': 15.0}
@@ -0,0 +1,119 @@
+import sqlite3
+import threading
+import multiprocessing
+import pytest
+from datetime import datetime, timedelta
+from src.core.activity import Activity
+from src.core.locking import FileLock
+from src.core.metrics import Metrics
+from src.core.storage import JSONStorage, SQLiteStorage
+
+START = datetime(2024, 1, 1, 9, 0)
+
+def make_activity(minutes, title):
+    start = START + timedelta(minutes=minutes)
+    return Activity(name=title, start_time=start, end_time=start + timedelta(seconds=30),
+                    process_name='Editor', window_title=title)
+
+def _try_lock(path, exclusive, results):
+    lock = FileLock(path, timeout=0.1)
+    try:
+        with (lock.exclusive() if exclusive else lock.shared()):
+            results.put('acquired')
+    except TimeoutError:
+        results.put('timeout')
+
+def _lock_from_child(path, exclusive):
+    results = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_try_lock, args=(path, exclusive, results))
+    process.start()
+    process.join()
+    return results.get()
+
+def test_file_lock_across_processes(temp_dir):
+    path = temp_dir / 'store.lock'
+    lock = FileLock(path)
+    with lock.shared():
+        assert _lock_from_child(path, exclusive=False) == 'acquired'
+        assert _lock_from_child(path, exclusive=True) == 'timeout'
+    with lock.exclusive():
+        # Held again without blocking
+        with lock.shared():
+            pass
+        assert _lock_from_child(path, exclusive=False) == 'timeout'
+    assert _lock_from_child(path, exclusive=True) == 'acquired'
+    lock.close()
+
+def test_file_lock_refuses_upgrade(temp_dir):
+    lock = FileLock(temp_dir / 'store.lock')
+    with lock.shared():
+        with pytest.raises(RuntimeError):
+            with lock.exclusive():
+                pass
+
+def _save_many(path, worker, count):
+    storage = JSONStorage(path)
+    for i in range(count):
+        storage.save_activity(make_activity(worker * count + i, f'w{worker} #{i}'))
+    storage.close()
+
+def test_concurrent_json_writers_lose_nothing(temp_dir):
+    path = temp_dir / 'activities.json'
+    JSONStorage(path).close()
+    processes = [multiprocessing.Process(target=_save_many, args=(path, worker, 25))
+                 for worker in range(3)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    names = sorted(a.name for a in JSONStorage(path).get_activities())
+    assert names == sorted(f'w{worker} #{i}' for worker in range(3) for i in range(25))
+
+def test_json_deletions_invalidate_other_instances(temp_dir):
+    path = temp_dir / 'activities.json'
+    writer, reader = JSONStorage(path), JSONStorage(path)
+    writer.save_activities([make_activity(i, f'old {i}') for i in range(10)])
+    assert len(reader.search('old')) == 10
+    assert len(reader.get_overlapping(START, START + timedelta(hours=1))) == 10
+
+    # Afterwards the store is longer than before, so only the generation
+    # tells the reader its indexed positions are stale
+    assert writer.delete_activities_before(START + timedelta(minutes=5)) == 5
+    writer.save_activities([make_activity(i, f'new {i}') for i in range(20, 26)])
+    assert sorted(a.name for a in reader.search('new')) == [f'new {i}' for i in range(20, 26)]
+    later = reader.get_overlapping(START + timedelta(minutes=20), START + timedelta(hours=1))
+    assert [a.name for a in later] == [f'new {i}' for i in range(20, 26)]
+
+def test_sqlite_uses_wal(temp_dir):
+    SQLiteStorage(temp_dir / 'activities.db')
+    with sqlite3.connect(str(temp_dir / 'activities.db')) as conn:
+        assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+
+def test_sqlite_retries_busy_writes(temp_dir):
+    storage = SQLiteStorage(temp_dir / 'activities.db', busy_timeout=0.01, busy_retries=20)
+    storage.metrics = Metrics(enabled=True)
+    blocker = sqlite3.connect(str(temp_dir / 'activities.db'), check_same_thread=False)
+    blocker.execute('BEGIN IMMEDIATE')
+    release = threading.Timer(0.2, blocker.rollback)
+    release.start()
+
+    storage.save_activity(make_activity(0, 'doc'))
+    release.join()
+    blocker.close()
+    assert [a.name for a in storage.get_activities()] == ['doc']
+    assert storage.metrics.stats()['counters']['storage.busy_retries'] > 0
+
+def test_sqlite_gives_up_after_retries(temp_dir):
+    storage = SQLiteStorage(temp_dir / 'activities.db', busy_timeout=0.01, busy_retries=1)
+    storage.metrics = Metrics(enabled=True)
+    blocker = sqlite3.connect(str(temp_dir / 'activities.db'))
+    blocker.execute('BEGIN IMMEDIATE')
+    try:
+        with pytest.raises(sqlite3.OperationalError):
+            storage.save_activity(make_activity(0, 'doc'))
+    finally:
+        blocker.rollback()
+        blocker.close()
+    counters = storage.metrics.stats()['counters']
+    assert counters['storage.busy_retries'] == 1
+    assert counters['storage.busy_failures'] == 1
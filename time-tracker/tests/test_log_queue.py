@@ -0,0 +1,61 @@
+import logging
+import threading
+import pytest
+from src.utils.log_queue import LogPipeline
+
+class _ListHandler(logging.Handler):
+    def __init__(self, level=logging.NOTSET, block=None):
+        super().__init__(level)
+        self.messages = []
+        self.threads = set()
+        self.block = block
+
+    def emit(self, record):
+        if self.block:
+            self.block.wait()
+        self.messages.append(record.getMessage())
+        self.threads.add(threading.current_thread().name)
+
+@pytest.fixture
+def test_logger():
+    logger = logging.getLogger('tests.log_queue')
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    yield logger
+    logger.handlers.clear()
+    logger.propagate = True
+
+def test_records_reach_original_handlers_off_thread(test_logger):
+    everything, warnings = _ListHandler(), _ListHandler(logging.WARNING)
+    test_logger.addHandler(everything)
+    test_logger.addHandler(warnings)
+
+    pipeline = LogPipeline()
+    pipeline.install()
+    test_logger.debug("started %s", 'editor')
+    test_logger.warning("slow save")
+    pipeline.stop()
+
+    assert everything.messages == ['started editor', 'slow save']
+    assert warnings.messages == ['slow save']
+    assert threading.current_thread().name not in everything.threads
+    # Handlers are put back
+    assert test_logger.handlers[-2:] == [everything, warnings]
+    assert all(type(h).__name__ != '_RoutingQueueHandler' for h in test_logger.handlers)
+
+def test_full_queue_drops_and_reports(test_logger):
+    release = threading.Event()
+    handler = _ListHandler(block=release)
+    test_logger.addHandler(handler)
+
+    pipeline = LogPipeline(max_size=2)
+    pipeline.install()
+    for i in range(10):
+        test_logger.info("record %d", i)
+    assert pipeline.dropped > 0
+    release.set()
+    pipeline.stop()
+
+    kept = [m for m in handler.messages if m.startswith('record')]
+    assert len(kept) + pipeline.dropped == 10
+    assert f"Dropped {pipeline.dropped} log records while the log queue was full" in handler.messages
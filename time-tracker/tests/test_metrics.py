@@ -0,0 +1,86 @@
+import pytest
+import threading
+import time
+from src.core.metrics import Metrics, Histogram
+from src.core.profiling import SamplingProfiler
+
+def test_disabled_metrics_record_nothing():
+    """Test that a disabled registry ignores every call."""
+    metrics = Metrics(enabled=False)
+    with metrics.timer('tick'):
+        pass
+    metrics.increment('count')
+    metrics.set_gauge('depth', 3)
+    metrics.record_cache('cache', True)
+    
+    stats = metrics.stats()
+    assert stats['latency'] == {}
+    assert stats['counters'] == {}
+    assert stats['gauges'] == {}
+    assert stats['cache_hit_rates'] == {}
+
+def test_histogram_quantiles():
+    """Test bucket-based quantile estimation."""
+    histogram = Histogram(buckets=(0.001, 0.01, 0.1))
+    for _ in range(90):
+        histogram.observe(0.0005)
+    for _ in range(10):
+        histogram.observe(0.05)
+    
+    assert histogram.count == 100
+    assert histogram.quantile(0.5) == 0.001
+    assert histogram.quantile(0.99) == 0.1
+
+def test_stats_snapshot():
+    """Test timers, counters, gauges and cache hit rates."""
+    metrics = Metrics(enabled=True)
+    with metrics.timer('tick.sample'):
+        time.sleep(0.001)
+    metrics.increment('activities.started', 2)
+    metrics.set_gauge('storage.pending_writes', 4)
+    metrics.record_cache('json_read', True)
+    metrics.record_cache('json_read', True)
+    metrics.record_cache('json_read', False)
+    
+    stats = metrics.stats()
+    assert stats['latency']['tick.sample']['count'] == 1
+    assert stats['latency']['tick.sample']['mean_ms'] >= 1.0
+    assert stats['counters'] == {'activities.started': 2}
+    assert stats['gauges'] == {'storage.pending_writes': 4}
+    assert stats['cache_hit_rates']['json_read']['hit_rate'] == pytest.approx(0.6667)
+
+def test_prometheus_dump(temp_dir):
+    """Test the Prometheus text exposition output."""
+    metrics = Metrics(enabled=True)
+    metrics.observe('tick.total', 0.002)
+    metrics.increment('activities.started')
+    metrics.record_cache('json_read', False)
+    
+    path = temp_dir / 'metrics.prom'
+    metrics.write_prometheus(path)
+    text = path.read_text()
+    
+    assert '# TYPE timetracker_tick_total_seconds histogram' in text
+    assert 'timetracker_tick_total_seconds_bucket{le="+Inf"} 1' in text
+    assert 'timetracker_activities_started_total 1' in text
+    assert 'timetracker_json_read_lookups_total{result="miss"} 1' in text
+
+def test_sampling_profiler():
+    """Test that the sampling profiler captures a busy thread's stack."""
+    done = threading.Event()
+    
+    def busy_loop():
+        while not done.is_set():
+            sum(range(1000))
+    
+    worker = threading.Thread(target=busy_loop)
+    worker.start()
+    profiler = SamplingProfiler(worker.ident, interval=0.001)
+    profiler.start()
+    time.sleep(0.1)
+    profiler.stop()
+    done.set()
+    worker.join()
+    
+    assert sum(profiler.samples.values()) > 0
+    assert any('busy_loop' in leaf for leaf, _ in profiler.top())
@@ -0,0 +1,80 @@
+import pytest
+from datetime import datetime, timedelta
+from src.core.activity import Activity
+from src.core.pagination import PageCache
+from src.core.storage import JSONStorage, SQLiteStorage
+from src.utils.synthetic import generate_activities
+
+START = datetime(2024, 5, 6, 9, 0)
+
+@pytest.fixture(params=['json', 'sqlite'])
+def storage(request, temp_dir):
+    if request.param == 'json':
+        return JSONStorage(temp_dir / 'activities.json')
+    return SQLiteStorage(temp_dir / 'activities.db')
+
+def make_activity(minutes, title):
+    start = START + timedelta(minutes=minutes)
+    return Activity(name=title, start_time=start, end_time=start + timedelta(minutes=1),
+                    process_name='Editor', window_title=title)
+
+def test_get_page_keyset(storage):
+    """Pages are newest first, start strictly before the cursor and keep ties together."""
+    storage.save_activities([make_activity(i, f'doc {i}') for i in range(5)])
+    storage.save_activities([make_activity(2, 'tie a'), make_activity(2, 'tie b')])
+
+    first = storage.get_page(limit=3)
+    assert [a.window_title for a in first][:2] == ['doc 4', 'doc 3']
+    # All three activities starting at minute 2 come with the page
+    assert sorted(a.window_title for a in first[2:]) == ['doc 2', 'tie a', 'tie b']
+
+    second = storage.get_page(first[-1].start_time, limit=3)
+    assert [a.window_title for a in second] == ['doc 1', 'doc 0']
+    assert storage.get_page(second[-1].start_time, limit=3) == []
+
+def test_page_cache_walks_history(temp_dir):
+    storage = SQLiteStorage(temp_dir / 'activities.db')
+    activities = list(generate_activities(days=3, start=START))
+    storage.save_activities(activities)
+    newest_first = sorted(activities, key=lambda a: a.start_time, reverse=True)
+
+    calls = []
+    def fetch(before, limit):
+        calls.append(before)
+        return storage.get_page(before, limit)
+
+    cache = PageCache(fetch, page_size=50, prefetch_pages=2, max_pages=5)
+    cache.reset(START + timedelta(days=30))
+    assert cache.rows(0, 20) == []  # Loading in the background
+    cache.join()
+    assert cache.rows(0, 20) == newest_first[:20]
+    assert len(calls) == 3  # The visible page and two prefetched
+
+    # Scroll to the end, one screen at a time
+    offset, seen = 0, []
+    while offset < cache.total_rows:
+        rows = cache.rows(offset, 20)
+        cache.join()
+        rows = cache.rows(offset, 20)
+        seen.extend(rows)
+        offset += 20
+    assert seen == newest_first
+    assert cache.complete and cache.total_rows == len(activities)
+    assert len(cache._pages) <= 5
+
+    # Evicted pages are fetched again from their cursor
+    cache.rows(0, 20)
+    cache.join()
+    assert cache.rows(0, 20) == newest_first[:20]
+    cache.close()
+
+def test_page_cache_anchor_hides_newer_activities(temp_dir):
+    storage = SQLiteStorage(temp_dir / 'activities.db')
+    storage.save_activities([make_activity(i, f'doc {i}') for i in range(3)])
+    cache = PageCache(storage.get_page, page_size=10)
+    cache.reset(START + timedelta(minutes=10))
+    storage.save_activity(make_activity(20, 'later'))
+    cache.rows(0, 10)
+    cache.join()
+    assert [a.window_title for a in cache.rows(0, 10)] == ['doc 2', 'doc 1', 'doc 0']
+    cache.close()
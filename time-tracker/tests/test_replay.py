@@ -0,0 +1,83 @@
+import pytest
+from datetime import datetime, timedelta
+from src.core.clock import SimulatedClock
+from src.core.tracker import ActivityTracker
+from src.core.replay import replay_trace
+from src.monitors.replay_monitor import (
+    ReplayTrace, TraceEvent, ReplaySystemMonitor, ReplayInputMonitor
+)
+from src.utils.synthetic import generate_activities
+
+START = datetime(2024, 3, 4, 9, 0)
+
+def make_tracker(config, trace):
+    return ActivityTracker(
+        config,
+        clock=trace.clock,
+        system_monitor=ReplaySystemMonitor(trace),
+        input_monitor=ReplayInputMonitor(trace)
+    )
+
+def test_simulated_clock():
+    """Test that sleeping advances simulated time instantly."""
+    clock = SimulatedClock(START)
+    clock.sleep(90)
+    assert clock.now() == START + timedelta(seconds=90)
+    assert clock.monotonic() == 90
+    clock.advance_to(START)  # never goes backwards
+    assert clock.now() == START + timedelta(seconds=90)
+
+def test_replay_monitors_follow_clock():
+    """Test that the replay monitors report the event at the clock time."""
+    trace = ReplayTrace([
+        TraceEvent(START, 'editor', 'main.py'),
+        TraceEvent(START + timedelta(minutes=5), idle=True),
+    ])
+    system, inputs = ReplaySystemMonitor(trace), ReplayInputMonitor(trace)
+    assert system.get_current_activity()['process_name'] == 'editor'
+    assert inputs.is_active()
+    
+    trace.clock.advance(400)
+    assert not inputs.is_active()
+    assert inputs.get_current_activity()['idle_duration'] == 100
+    assert trace.next_change() is None
+
+def test_replay_reproduces_activities(test_config):
+    """Test replaying a generated history through the real tracker logic."""
+    generated = list(generate_activities(days=3, switches_per_hour=20, seed=1))
+    trace = ReplayTrace.from_activities(generated)
+    tracker = make_tracker(test_config, trace)
+    
+    result = replay_trace(tracker, trace)
+    
+    # Consecutive segments with the same window are one activity to the tracker
+    expected = [
+        a for previous, a in zip([None] + generated, generated)
+        if previous is None or a.start_time.date() != previous.start_time.date() or
+        (a.process_name, a.window_title) != (previous.process_name, previous.window_title)
+    ]
+    saved = tracker.get_activities()
+    assert [a.window_title for a in saved] == [a.window_title for a in expected]
+    assert saved[0].start_time == generated[0].start_time
+    # Last activity of each day runs on until the inactivity threshold
+    assert saved[-1].end_time == generated[-1].end_time + timedelta(
+        seconds=tracker.inactivity_threshold
+    )
+    assert result.simulated_seconds > 2 * 86400
+    assert result.ticks < 3 * len(generated)
+
+def test_fast_forward_matches_every_tick(test_config, temp_dir):
+    """Test that skipping idle ticks gives the same result as ticking."""
+    generated = list(generate_activities(days=1, switches_per_hour=60, active_hours=1, seed=2))
+    
+    results = []
+    for fast in (True, False):
+        config = dict(test_config, storage=dict(test_config['storage'],
+                                                 filename=f'replay_{fast}.json'))
+        trace = ReplayTrace.from_activities(generated)
+        tracker = make_tracker(config, trace)
+        replay_trace(tracker, trace, fast_forward=fast)
+        results.append([(a.process_name, a.start_time, a.end_time)
+                        for a in tracker.get_activities()])
+    
+    assert results[0] == results[1]
@@ -0,0 +1,74 @@
+import pytest
+from datetime import date, datetime, time, timedelta
+from src.core.activity import Activity
+from src.core.reports import (ReportGenerator, ReportScheduler, month_partitions,
+                              period_range)
+from src.core.storage import SQLiteStorage
+from src.utils.synthetic import generate_activities
+
+def make_activity(start, minutes, process):
+    return Activity(name=process, start_time=start, end_time=start + timedelta(minutes=minutes),
+                    process_name=process, window_title=process)
+
+@pytest.fixture
+def storage(temp_dir):
+    storage = SQLiteStorage(temp_dir / 'activities.db')
+    storage.save_activities([
+        make_activity(datetime(2024, 5, 6, 9), 90, 'Code'),
+        make_activity(datetime(2024, 5, 6, 11), 30, 'Safari'),
+        make_activity(datetime(2024, 5, 8, 9), 60, 'Code'),
+    ])
+    return storage
+
+def test_periods():
+    assert period_range('weekly', date(2024, 5, 8)) == (date(2024, 5, 6), date(2024, 5, 13))
+    assert period_range('monthly', date(2024, 12, 31)) == (date(2024, 12, 1), date(2025, 1, 1))
+    assert month_partitions(date(2024, 1, 15), date(2024, 3, 2)) == [
+        (date(2024, 1, 15), date(2024, 2, 1)),
+        (date(2024, 2, 1), date(2024, 3, 1)),
+        (date(2024, 3, 1), date(2024, 3, 2)),
+    ]
+
+def test_daily_report_from_rollups(storage):
+    generator = ReportGenerator(storage)
+    text = ''.join(generator.render('Daily', date(2024, 5, 6), date(2024, 5, 7)))
+    assert 'Code' in text and '1h 30m' in text and '75.0%' in text
+    assert 'Total: 2h 00m across 2 activities' in text
+
+def test_weekly_markdown_lists_every_day(storage):
+    generator = ReportGenerator(storage, report_format='markdown', group_by_application=False)
+    lines = list(generator.render('Weekly', *period_range('weekly', date(2024, 5, 6))))
+    text = ''.join(lines)
+    assert text.startswith('# Weekly')
+    assert '| Tue 2024-05-07 | 0h 00m | 0.0% |' in text
+    assert '| Application |' not in text
+    assert text.endswith('Total: 3h 00m across 3 activities\n')
+
+def test_multi_month_report_in_worker_processes(temp_dir):
+    config = {'type': 'sqlite', 'path': str(temp_dir)}
+    storage = SQLiteStorage(temp_dir / 'activities.db')
+    storage.save_activities(generate_activities(days=70, start=datetime(2024, 1, 20)))
+    start, end = date(2024, 1, 1), date(2024, 4, 1)
+
+    parallel = ReportGenerator(storage, storage_config=config, workers=3)
+    sections = list(parallel.sections(start, end))
+    assert [section.start.month for section in sections] == [1, 2, 3]
+    inline = ReportGenerator(storage, workers=1)
+    assert ''.join(parallel.render('R', start, end)) == ''.join(inline.render('R', start, end))
+    assert sum(section.activity_count for section in sections) == len(storage.get_activities()) > 0
+
+def test_scheduler_writes_due_reports_once(storage, temp_dir):
+    scheduler = ReportScheduler(ReportGenerator(storage), temp_dir / 'reports',
+                                report_time=time(18, 0))
+    # Sunday 2024-05-12, before the report time: Saturday's daily report is due
+    assert [p.name for p in scheduler.run_pending(datetime(2024, 5, 12, 9))] == ['daily-2024-05-11.txt']
+    assert scheduler.run_pending(datetime(2024, 5, 12, 17)) == []
+    written = scheduler.run_pending(datetime(2024, 5, 12, 18, 30))
+    assert [p.name for p in written] == ['daily-2024-05-12.txt', 'weekly-2024-W19.txt']
+    assert 'Total: 3h 00m' in written[1].read_text()
+
+    # Restarts pick up where the last run left off
+    restarted = ReportScheduler(ReportGenerator(storage), temp_dir / 'reports',
+                                report_time=time(18, 0))
+    assert restarted.run_pending(datetime(2024, 5, 12, 23)) == []
+    assert [p.name for p in restarted.run_pending(datetime(2024, 5, 31, 19))][-1] == 'monthly-2024-05.txt'
@@ -0,0 +1,96 @@
+import pytest
+from datetime import datetime, timedelta
+from src.core.activity import Activity
+from src.core.search import InvertedIndex, parse_query
+from src.core.storage import JSONStorage, SQLiteStorage
+
+START = datetime(2024, 5, 6, 9, 0)
+
+WINDOWS = [
+    ('Code', 'tracker.py - productivity'),
+    ('Safari', 'Python docs - asyncio'),
+    ('Slack', 'general | Team'),
+    ('Code', 'storage.py - productivity'),
+    ('Safari', 'Pytest documentation'),
+]
+
+def make_activities(offset_days=0):
+    return [
+        Activity(name=title,
+                 start_time=START + timedelta(days=offset_days, minutes=10 * i),
+                 end_time=START + timedelta(days=offset_days, minutes=10 * i + 5),
+                 process_name=process, window_title=title)
+        for i, (process, title) in enumerate(WINDOWS)
+    ]
+
+@pytest.fixture(params=['json', 'sqlite'])
+def storage(request, temp_dir):
+    if request.param == 'json':
+        return JSONStorage(temp_dir / 'activities.json')
+    return SQLiteStorage(temp_dir / 'activities.db')
+
+def titles(activities):
+    return [activity.window_title for activity in activities]
+
+def test_parse_query():
+    assert parse_query('Py* tracker.py') == [('py', True), ('tracker', False), ('py', False)]
+    assert parse_query('  -- ') == []
+
+def test_inverted_index_prefix_lookup():
+    index = InvertedIndex.build([
+        {'process_name': 'Code', 'window_title': 'main.py'},
+        {'process_name': 'Safari', 'window_title': 'Python docs'},
+    ])
+    assert index.search(parse_query('py*')) == {0, 1}
+    assert index.search(parse_query('py')) == {0}
+    assert index.search(parse_query('safari doc*')) == {1}
+    assert InvertedIndex.from_dict(index.to_dict()).search(parse_query('main')) == {0}
+
+def test_search_terms_and_prefixes(storage):
+    """Test exact, prefix and multi-word queries, newest first."""
+    storage.save_activities(make_activities())
+    
+    assert titles(storage.search('productivity')) == [
+        'storage.py - productivity', 'tracker.py - productivity'
+    ]
+    assert titles(storage.search('py*')) == [
+        'Pytest documentation', 'storage.py - productivity',
+        'Python docs - asyncio', 'tracker.py - productivity'
+    ]
+    assert titles(storage.search('safari doc*')) == ['Pytest documentation', 'Python docs - asyncio']
+    assert titles(storage.search('SLACK team')) == ['general | Team']
+    assert storage.search('nothing') == []
+    assert len(storage.search('py*', limit=2)) == 2
+
+def test_search_time_range(storage):
+    storage.save_activities(make_activities())
+    storage.save_activities(make_activities(offset_days=1))
+    
+    day_two = START + timedelta(days=1)
+    results = storage.search('productivity', start_time=day_two)
+    assert len(results) == 2
+    assert all(activity.start_time >= day_two for activity in results)
+    assert len(storage.search('productivity', end_time=day_two)) == 2
+
+def test_index_follows_saves_and_deletes(storage):
+    """Test that the index is updated incrementally and after retention."""
+    storage.save_activities(make_activities())
+    assert len(storage.search('asyncio')) == 1
+    
+    storage.save_activity(Activity(name='asyncio tasks', start_time=START + timedelta(days=2),
+                                   end_time=START + timedelta(days=2, minutes=1),
+                                   process_name='Safari', window_title='asyncio tasks'))
+    assert len(storage.search('asyncio')) == 2
+    
+    storage.delete_activities_before(START + timedelta(days=1), limit=100)
+    assert titles(storage.search('asyncio')) == ['asyncio tasks']
+
+def test_stale_sidecar_is_caught_up(temp_dir):
+    """Test reopening a JSON store whose index lags behind the file."""
+    storage = JSONStorage(temp_dir / 'activities.json')
+    storage.save_activities(make_activities())
+    storage.close()
+    storage.save_activities(make_activities(offset_days=1))
+    
+    reopened = JSONStorage(temp_dir / 'activities.json')
+    assert len(reopened.search('productivity')) == 4
@@ -1,8 +1,12 @@
 import pytest
-from datetime import datetime, timedelta
+import json
+import sqlite3
+from unittest.mock import patch
+from datetime import date, datetime, timedelta
 from pathlib import Path
 from src.core.activity import Activity
-from src.core.storage import JSONStorage, SQLiteStorage
+from src.core.compressed import CompressedStorage
+from src.core.storage import JSONStorage, SQLiteStorage, decode_records
 
 @pytest.fixture
 def json_storage(temp_dir):
@@ -83,6 +87,72 @@ class TestJSONStorage:
         assert len(remaining) == 1
         assert remaining[0].name == "Activity 2"
 
+    def test_crash_during_write_keeps_history(self, json_storage, test_activities):
+        """Test that a crash mid-write leaves the previous file intact."""
+        json_storage.save_activity(test_activities[0])
+        
+        def partial_dump(obj, f, **kwargs):
+            f.write('[{"name": "trunc')
+            raise OSError("simulated crash")
+        
+        with patch('src.core.storage.json.dump', side_effect=partial_dump):
+            with pytest.raises(OSError):
+                json_storage.save_activity(test_activities[1])
+        
+        stored = decode_records(json.loads(json_storage.filepath.read_text()))
+        assert len(stored) == 1
+        assert stored[0]['name'] == "Activity 1"
+        assert list(json_storage.filepath.parent.glob('*.tmp')) == []
+    
+    def test_interval_policy_group_commits(self, temp_dir, test_activities):
+        """Test that the interval policy batches saves into one commit."""
+        storage = JSONStorage(
+            temp_dir / "grouped.json",
+            durability='interval',
+            fsync_interval=3600
+        )
+        for activity in test_activities:
+            storage.save_activity(activity)
+        
+        # Buffered saves are visible to readers but not yet on disk
+        assert len(storage.get_activities()) == 2
+        assert decode_records(json.loads(storage.filepath.read_text())) == []
+        
+        storage.flush()
+        assert len(decode_records(json.loads(storage.filepath.read_text()))) == 2
+    
+    def test_read_cache(self, json_storage, test_activities):
+        """Test that unchanged files are not re-parsed."""
+        from src.core.metrics import Metrics
+        json_storage.metrics = Metrics(enabled=True)
+        json_storage.save_activity(test_activities[0])
+        json_storage.get_activities()
+        json_storage.get_activities()
+        
+        # Another writer replacing the file invalidates the cache
+        JSONStorage(json_storage.filepath).save_activity(test_activities[1])
+        assert len(json_storage.get_activities()) == 2
+        
+        stats = json_storage.metrics.stats()
+        assert stats['cache_hit_rates']['json_read'] == {
+            'hits': 3, 'misses': 1, 'hit_rate': 0.75
+        }
+        assert stats['latency']['storage.get_activities']['count'] == 3
+    
+    def test_invalid_durability_policy(self, temp_dir):
+        """Test that unknown durability policies are rejected."""
+        with pytest.raises(ValueError):
+            JSONStorage(temp_dir / "bad.json", durability='sometimes')
+
+    def test_converts_minute_rollup_sidecar(self, json_storage, test_activities):
+        """Test reading a rollup sidecar written in float minutes."""
+        json_storage.rollups_path.write_text(json.dumps({'2024-01-01': {'Mail': [1.5, 2]}}))
+        json_storage.save_activity(test_activities[0])
+        
+        rollups = {(r.day, r.process_name): r.total_ms for r in json_storage.get_rollups()}
+        assert rollups[(date(2024, 1, 1), 'Mail')] == 90000
+        assert rollups[(test_activities[0].start_time.date(), 'process1')] == 3600000
+    
 class TestSQLiteStorage:
     """Test SQLite storage implementation."""
     
@@ -129,6 +199,37 @@ class TestSQLiteStorage:
         assert len(remaining) == 1
         assert remaining[0].name == "Activity 2"
     
+    def test_checkpoint_roundtrip(self, sqlite_storage, test_activities):
+        """Test storing and clearing the in-progress checkpoint."""
+        assert sqlite_storage.load_checkpoint() == []
+        
+        sqlite_storage.save_checkpoint([test_activities[0]])
+        sqlite_storage.save_checkpoint(test_activities)
+        restored = sqlite_storage.load_checkpoint()
+        assert [a.name for a in restored] == ["Activity 1", "Activity 2"]
+        
+        sqlite_storage.clear_checkpoint()
+        assert sqlite_storage.load_checkpoint() == []
+
+    def test_connections_are_closed(self, sqlite_storage, test_activities):
+        """Test that no connection is left for the garbage collector to close."""
+        opened = []
+        real_connect = sqlite3.connect
+        def connect(*args, **kwargs):
+            opened.append(real_connect(*args, **kwargs))
+            return opened[-1]
+
+        with patch('src.core.storage.sqlite3.connect', side_effect=connect):
+            sqlite_storage.save_activities(test_activities)
+            sqlite_storage.save_checkpoint([test_activities[0]])
+            assert len(sqlite_storage.get_page(limit=1)) == 1
+            assert sum(len(batch) for batch in sqlite_storage.iter_activities()) == 2
+
+        assert opened
+        for conn in opened:
+            with pytest.raises(sqlite3.ProgrammingError):
+                conn.execute('SELECT 1')
+
     def test_database_creation(self, temp_dir):
         """Test database and table creation."""
         db_path = temp_dir / "new_db.sqlite"
@@ -151,3 +252,65 @@ class TestSQLiteStorage:
         
         assert len(retrieved) == 1
         assert retrieved[0].name == activity.name
+
+    def test_incremental_vacuum_enabled(self, temp_dir):
+        """Test that new and older databases use incremental auto-vacuum."""
+        SQLiteStorage(temp_dir / "new.db")
+        older = temp_dir / "older.db"
+        with sqlite3.connect(str(older)) as conn:
+            conn.execute('PRAGMA journal_mode = WAL')
+            conn.execute('CREATE TABLE unrelated (x)')
+        SQLiteStorage(older)
+
+        for path in (temp_dir / "new.db", older):
+            conn = sqlite3.connect(str(path))
+            try:
+                assert conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2
+                assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+            finally:
+                conn.close()
+
+    def test_converts_minute_rollups(self, sqlite_storage, test_activities):
+        """Test migrating rollups and rows saved before durations were stored."""
+        sqlite_storage.save_activity(test_activities[0])
+        with sqlite3.connect(str(sqlite_storage.filepath)) as conn:
+            # The previous layout: no stored duration, rollups in REAL minutes
+            conn.execute('DROP TRIGGER activities_rollup')
+            conn.execute('ALTER TABLE activities DROP COLUMN duration_ms')
+            conn.execute('DROP TABLE daily_rollups')
+            conn.execute('''
+                CREATE TABLE daily_rollups (
+                    day TEXT NOT NULL, app_id INTEGER NOT NULL, total_minutes REAL NOT NULL,
+                    activity_count INTEGER NOT NULL, PRIMARY KEY (day, app_id)
+                )
+            ''')
+            conn.execute("INSERT INTO daily_rollups VALUES ('2024-01-01', 0, 1.5, 2)")
+        
+        storage = SQLiteStorage(sqlite_storage.filepath)
+        storage.save_activity(test_activities[1])
+        rollups = {(r.day, r.process_name): r.total_ms for r in storage.get_rollups()}
+        assert rollups[(date(2024, 1, 1), '')] == 90000
+        assert rollups[(test_activities[1].start_time.date(), 'process2')] == 1800000
+        with sqlite3.connect(str(storage.filepath)) as conn:
+            durations = [row[0] for row in conn.execute('SELECT duration_ms FROM activities ORDER BY id')]
+        assert durations == [3600000, 1800000]
+
+@pytest.mark.parametrize('backend', ['json', 'sqlite', 'compressed'])
+def test_short_activities_sum_exactly(temp_dir, backend):
+    """Sub-second activities count in full rather than rounding to nothing."""
+    storage = {
+        'json': lambda: JSONStorage(temp_dir / 'activities.json'),
+        'sqlite': lambda: SQLiteStorage(temp_dir / 'activities.db'),
+        'compressed': lambda: CompressedStorage(temp_dir / 'activities.tz', chunk_records=100),
+    }[backend]()
+    start = datetime(2024, 5, 6, 9, 0)
+    storage.save_activities([
+        Activity(name='tab', start_time=start + timedelta(seconds=i),
+                 end_time=start + timedelta(seconds=i, milliseconds=250), process_name='Browser')
+        for i in range(600)
+    ])
+    storage.flush()
+    
+    [rollup] = storage.get_rollups()
+    assert (rollup.total_ms, rollup.activity_count) == (150000, 600)
+    assert rollup.total_minutes == 2.5
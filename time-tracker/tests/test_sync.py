@@ -0,0 +1,85 @@
+import pytest
+from datetime import datetime, timedelta
+from src.core.activity import Activity
+from src.core.storage import JSONStorage
+from src.core.sync import SyncManager
+
+START = datetime(2024, 5, 6, 9, 0)
+
+def make_activities(app, count, offset=0):
+    return [
+        Activity(
+            name=f"{app} {i}",
+            start_time=START + timedelta(minutes=offset + i * 10),
+            end_time=START + timedelta(minutes=offset + i * 10 + 5),
+            process_name=app
+        )
+        for i in range(count)
+    ]
+
+@pytest.fixture
+def devices(temp_dir):
+    """Two devices sharing one directory."""
+    shared = temp_dir / "shared"
+    laptop = SyncManager(temp_dir / "laptop", shared, device_id="laptop")
+    desktop = SyncManager(temp_dir / "desktop", shared, device_id="desktop")
+    return laptop, desktop
+
+def test_merge_between_devices(devices):
+    """Test that each device sees the other's activities after syncing."""
+    laptop, desktop = devices
+    laptop.record_many(make_activities("editor", 3))
+    desktop.record_many(make_activities("browser", 2, offset=5))
+    
+    laptop.sync()
+    desktop.sync()
+    laptop.sync()
+    
+    for device in devices:
+        merged = device.get_activities()
+        assert [a.process_name for a in merged] == [
+            "editor", "browser", "editor", "browser", "editor"
+        ]
+        assert device.devices() == {"laptop": 3, "desktop": 2}
+
+def test_sync_is_incremental_and_idempotent(devices):
+    """Test that only new records are shipped and repeats change nothing."""
+    laptop, desktop = devices
+    laptop.record_many(make_activities("editor", 3))
+    assert laptop.sync().pushed == 3
+    assert desktop.sync().pulled == 3
+    
+    assert laptop.sync().pushed == 0
+    assert desktop.sync().pulled == 0
+    
+    laptop.record(make_activities("terminal", 1, offset=100)[0])
+    assert laptop.sync().pushed == 1
+    assert desktop.sync().pulled == 1
+    assert len(desktop.get_activities()) == 4
+
+def test_partial_record_is_deferred(devices):
+    """Test that a half-synced trailing line is picked up once complete."""
+    laptop, desktop = devices
+    laptop.record_many(make_activities("editor", 2))
+    laptop.sync()
+    
+    shared_log = laptop.shared_log.path
+    content = shared_log.read_bytes()
+    shared_log.write_bytes(content[:-20])
+    assert desktop.sync().pulled == 1
+    
+    shared_log.write_bytes(content)
+    assert desktop.sync().pulled == 1
+    assert len(desktop.get_activities(device_id="laptop")) == 2
+
+def test_seed_from_existing_history(devices, temp_dir):
+    """Test publishing history recorded before sync was enabled."""
+    laptop, desktop = devices
+    storage = JSONStorage(temp_dir / "activities.json")
+    storage.save_activities(make_activities("editor", 4))
+    
+    assert laptop.seed_from(storage) == 4
+    assert laptop.seed_from(storage) == 0
+    laptop.sync()
+    desktop.sync()
+    assert len(desktop.get_activities(start_time=START + timedelta(minutes=15))) == 2
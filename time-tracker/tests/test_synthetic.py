@@ -0,0 +1,25 @@
+import pytest
+from datetime import timedelta
+from src.utils.synthetic import generate_activities
+
+def test_generation_is_reproducible():
+    """Test that the same seed yields the same history."""
+    first = list(generate_activities(days=2, seed=42))
+    second = list(generate_activities(days=2, seed=42))
+    assert first == second
+    assert first != list(generate_activities(days=2, seed=7))
+
+def test_shape_follows_parameters():
+    """Test day span, contiguity and application cardinality."""
+    activities = list(generate_activities(
+        days=3, switches_per_hour=60, app_count=5, active_hours=2
+    ))
+    
+    assert len({a.start_time.date() for a in activities}) == 3
+    assert {a.process_name for a in activities} <= {f"app{i:03d}" for i in range(5)}
+    
+    tracked = sum((a.end_time - a.start_time for a in activities), timedelta())
+    assert tracked == timedelta(hours=6)
+    for previous, current in zip(activities, activities[1:]):
+        if previous.start_time.date() == current.start_time.date():
+            assert current.start_time == previous.end_time
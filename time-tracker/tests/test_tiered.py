@@ -0,0 +1,92 @@
+import pytest
+from datetime import datetime, timedelta
+from src.core.activity import Activity
+from src.core.clock import SimulatedClock
+from src.core.storage import JSONStorage, SQLiteStorage, create_storage
+from src.core.tiered import TieredStorage
+
+TODAY = datetime(2024, 5, 6)
+
+@pytest.fixture(params=['json', 'sqlite'])
+def durable(request, temp_dir):
+    if request.param == 'json':
+        return JSONStorage(temp_dir / 'activities.json')
+    return SQLiteStorage(temp_dir / 'activities.db')
+
+def make_activity(start, minutes, title):
+    return Activity(name=title, start_time=start, end_time=start + timedelta(minutes=minutes),
+                    process_name='Editor', window_title=title)
+
+def names(activities):
+    return sorted(activity.name for activity in activities)
+
+def history():
+    return [
+        make_activity(TODAY - timedelta(hours=5), 30, 'yesterday'),
+        make_activity(TODAY - timedelta(minutes=10), 20, 'midnight'),
+        make_activity(TODAY + timedelta(hours=9), 30, 'morning'),
+    ]
+
+def _fail(*args, **kwargs):
+    raise AssertionError("durable tier touched")
+
+@pytest.mark.parametrize('write_behind', [False, True])
+def test_reads_merge_tiers(durable, write_behind):
+    durable.save_activities(history()[:2])
+    clock = SimulatedClock(TODAY + timedelta(hours=10))
+    storage = TieredStorage(durable, write_behind=write_behind, clock=clock)
+    storage.save_activity(history()[2])
+    storage.save_activity(make_activity(TODAY - timedelta(hours=3), 10, 'late save'))
+
+    everything = ['late save', 'midnight', 'morning', 'yesterday']
+    assert names(storage.get_activities()) == everything
+    assert names(storage.get_activities(TODAY - timedelta(hours=4))) == ['late save', 'midnight', 'morning']
+    assert names(storage.get_activities(end_time=TODAY)) == ['late save', 'yesterday']
+    assert names(storage.get_overlapping(TODAY - timedelta(days=1), TODAY + timedelta(days=1))) == everything
+    assert [a.name for a in storage.get_page(limit=2)] == ['morning', 'midnight']
+    assert names(storage.search('late')) == ['late save']
+    assert sum(r.activity_count for r in storage.get_rollups()) == 4
+
+    storage.flush()
+    assert names(durable.get_activities()) == everything
+    storage.close()
+
+def test_today_never_touches_disk(durable, monkeypatch):
+    durable.save_activities(history())
+    storage = TieredStorage(durable, clock=SimulatedClock(TODAY + timedelta(hours=10)))
+    for name in ('get_activities', 'get_overlapping', 'get_page'):
+        monkeypatch.setattr(durable, name, _fail)
+
+    today = storage.get_overlapping(TODAY, TODAY + timedelta(days=1))
+    assert [a.name for a in today] == ['midnight', 'morning']
+    assert names(storage.get_activities(TODAY)) == ['morning']
+    assert [a.name for a in storage.get_page(limit=1)] == ['morning']
+    assert [a.name for a in storage.get_activities_at(TODAY + timedelta(hours=9, minutes=5))] == ['morning']
+
+def test_midnight_rolls_the_hot_tier(durable, monkeypatch):
+    clock = SimulatedClock(TODAY + timedelta(hours=23))
+    storage = TieredStorage(durable, write_behind=True, clock=clock)
+    storage.save_activities(history())
+    storage.save_activity(make_activity(TODAY + timedelta(hours=23, minutes=50), 20, 'straddler'))
+
+    clock.advance(3600)
+    tomorrow = TODAY + timedelta(days=1)
+    assert storage.hot_start == tomorrow
+    assert [a.name for a in storage._hot] == ['straddler']
+    # Everything before midnight was written when the day rolled over
+    assert names(durable.get_activities()) == ['midnight', 'morning', 'straddler', 'yesterday']
+
+    monkeypatch.setattr(durable, 'get_overlapping', _fail)
+    assert [a.name for a in storage.get_overlapping(tomorrow, tomorrow + timedelta(days=1))] == ['straddler']
+    monkeypatch.undo()
+    assert names(storage.get_activities(TODAY)) == ['morning', 'straddler']
+    storage.close()
+
+def test_create_storage_wraps_in_hot_tier(temp_dir):
+    storage = create_storage({
+        'type': 'sqlite', 'path': str(temp_dir),
+        'hot_tier': {'enabled': True, 'write_behind': True}
+    })
+    assert isinstance(storage, TieredStorage)
+    assert isinstance(storage.durable, SQLiteStorage)
+    storage.close()
@@ -0,0 +1,104 @@
+import pytest
+from datetime import datetime, timedelta
+from src.core.activity import Activity
+from src.core.storage import JSONStorage, SQLiteStorage
+from src.core.timeline import Timeline
+
+DAY = datetime(2024, 5, 6)
+
+@pytest.fixture(params=['json', 'sqlite'])
+def storage(request, temp_dir):
+    if request.param == 'json':
+        return JSONStorage(temp_dir / 'activities.json')
+    return SQLiteStorage(temp_dir / 'activities.db')
+
+def make_activity(start, minutes, process_name):
+    return Activity(name=process_name, start_time=start,
+                    end_time=start + timedelta(minutes=minutes),
+                    process_name=process_name, window_title=process_name)
+
+def test_resolution_for():
+    assert Timeline.resolution_for(86400, 1440) == 60
+    assert Timeline.resolution_for(86400, 800) == 900
+    assert Timeline.resolution_for(30 * 86400, 800) == 3600
+    assert Timeline.resolution_for(31 * 86400, 200) == 86400
+    assert Timeline.resolution_for(365 * 86400, 800) == 86400
+
+def test_month_view_uses_daily_bins(storage):
+    storage.save_activities([
+        make_activity(DAY + timedelta(days=day, hours=9), 120, 'Editor' if day < 15 else 'Browser')
+        for day in range(31)
+    ] + [make_activity(DAY + timedelta(days=3, hours=12), 180, 'Browser')])
+    timeline = Timeline(storage)
+
+    segments = timeline.segments(DAY, DAY + timedelta(days=31), max_bins=200)
+    assert [((s.start - DAY).days, (s.end - DAY).days, s.process_name) for s in segments] == [
+        (0, 3, 'Editor'), (3, 4, 'Browser'), (4, 15, 'Editor'), (15, 31, 'Browser')
+    ]
+    assert segments[1].coverage == pytest.approx(5 / 24)
+
+def test_segments_merge_dominant_bins(storage):
+    storage.save_activities([
+        make_activity(DAY + timedelta(hours=9), 40, 'Editor'),
+        make_activity(DAY + timedelta(hours=9, minutes=40), 20, 'Browser'),
+        make_activity(DAY + timedelta(hours=10), 60, 'Browser'),
+    ])
+    timeline = Timeline(storage)
+
+    hourly = timeline.segments(DAY, DAY + timedelta(days=1), max_bins=24)
+    assert [(s.start.hour, s.end.hour, s.process_name) for s in hourly] == [
+        (9, 10, 'Editor'), (10, 11, 'Browser')
+    ]
+    assert all(s.coverage == pytest.approx(1.0) for s in hourly)
+
+    fine = timeline.segments(DAY, DAY + timedelta(days=1), max_bins=1440)
+    assert [(s.process_name, (s.end - s.start).seconds // 60) for s in fine] == [
+        ('Editor', 40), ('Browser', 80)
+    ]
+
+def test_segments_fit_max_bins(storage):
+    storage.save_activities([
+        make_activity(DAY + timedelta(minutes=2 * i), 1, 'Editor' if i % 2 else 'Browser')
+        for i in range(720)
+    ])
+    timeline = Timeline(storage)
+    segments = timeline.segments(DAY, DAY + timedelta(days=1), max_bins=100)
+    assert 0 < len(segments) <= 100
+    # Each hour is half tracked
+    assert all(s.coverage == pytest.approx(0.5) for s in segments)
+
+def test_add_updates_loaded_days_once(storage):
+    timeline = Timeline(storage)
+    first = make_activity(DAY + timedelta(hours=9), 30, 'Editor')
+    storage.save_activity(first)
+    timeline.segments(DAY, DAY + timedelta(days=1), max_bins=24)
+
+    # Already counted by the load
+    timeline.add(first)
+    later = make_activity(DAY + timedelta(hours=9, minutes=30), 60, 'Browser')
+    storage.save_activity(later)
+    timeline.add(later)
+    segments = timeline.segments(DAY, DAY + timedelta(days=1), max_bins=24)
+    assert [(s.start.hour, s.process_name) for s in segments] == [(9, 'Editor'), (10, 'Browser')]
+    assert segments[0].coverage == pytest.approx(1.0)
+    assert segments[1].coverage == pytest.approx(0.5)
+
+def test_add_ignores_days_not_loaded(storage):
+    timeline = Timeline(storage)
+    activity = make_activity(DAY + timedelta(hours=23, minutes=30), 60, 'Editor')
+    timeline.add(activity)
+    assert timeline._days == {}
+
+    # Split at midnight once the days are loaded from storage
+    storage.save_activity(activity)
+    segments = timeline.segments(DAY, DAY + timedelta(days=2), max_bins=48)
+    assert [(s.start, s.end) for s in segments] == [
+        (DAY + timedelta(hours=23), DAY + timedelta(days=1, hours=1))
+    ]
+    assert segments[0].coverage == pytest.approx(0.5)
+
+def test_days_are_evicted(storage):
+    timeline = Timeline(storage, max_days=3)
+    timeline.segments(DAY, DAY + timedelta(days=7), max_bins=200)
+    assert len(timeline._days) == 3
+    assert max(timeline._days) == (DAY + timedelta(days=6)).date()
@@ -181,3 +181,89 @@ class TestActivityTracker:
         assert 'process2' in summary
         assert summary['process1'] == 60.0  # 1 hour activity
         assert summary['process2'] == 30.0  # 30 minutes activity
+
+    def test_checkpoint_recovery(self, test_config, mock_monitors):
+        """Test that an interrupted activity is recovered on startup."""
+        crashed = ActivityTracker(test_config)
+        crashed.checkpoint_interval = 0.01
+        crashed._update_activity()
+        crashed.current_activity.start_time -= timedelta(minutes=10)
+        time.sleep(0.02)
+        crashed._checkpoint_current_activity()
+        
+        # Simulate a crash: the activity is never ended
+        recovered = ActivityTracker(test_config)
+        activities = recovered.get_activities()
+        assert len(activities) == 1
+        assert activities[0].process_name == 'test_app'
+        assert recovered.storage.load_checkpoint() == []
+
+    @pytest.mark.parametrize('buffered_by', ['coalescer', 'storage'])
+    def test_checkpoint_kept_until_durable(self, test_config, mock_monitors, buffered_by):
+        """Test that an ended activity not yet on disk survives a crash."""
+        system_monitor, _ = mock_monitors
+        if buffered_by == 'coalescer':
+            test_config['coalescing'] = {'enabled': True, 'min_duration': 0, 'max_delay': 3600}
+        else:
+            test_config['storage']['durability'] = 'interval'
+            test_config['storage']['fsync_interval'] = 3600
+        crashed = ActivityTracker(test_config)
+        crashed.checkpoint_interval = 0.01
+        crashed._update_activity()
+        crashed.current_activity.start_time -= timedelta(minutes=10)
+        time.sleep(0.02)
+        crashed._checkpoint_current_activity()
+        
+        # Switching apps ends the first activity, which is not durable yet
+        system_monitor.get_current_activity.return_value = {
+            'process_name': 'other_app', 'window_title': 'Other Window'
+        }
+        crashed._update_activity()
+        assert crashed.storage.load_checkpoint()[0].process_name == 'test_app'
+        
+        # Simulate a crash: neither the held record nor the buffer is written
+        recovered = ActivityTracker(test_config)
+        assert [a.process_name for a in recovered.get_activities()] == ['test_app']
+        assert recovered.storage.load_checkpoint() == []
+
+    def test_checkpoint_overflow_does_not_stop_tracking(self, test_config, mock_monitors, caplog):
+        """Test that unsaved activities outgrowing the checkpoint are trimmed."""
+        system_monitor, _ = mock_monitors
+        tracker = ActivityTracker(test_config)
+        tracker.checkpoint_interval = 0.01
+        # Writes that never become durable, e.g. a failing write-behind tier
+        tracker.storage.has_pending_writes = lambda: True
+        tracker.storage.flush = lambda: None
+        
+        for i in range(40):
+            system_monitor.get_current_activity.return_value = {
+                'process_name': f'app{i}', 'window_title': 'x' * 60
+            }
+            tracker._update_activity()
+            tracker.current_activity.start_time -= timedelta(minutes=1)
+        tracker._end_current_activity()
+        
+        checkpointed = [a.process_name for a in tracker.storage.load_checkpoint()]
+        assert 0 < len(checkpointed) < 40
+        assert checkpointed[-1] == 'app39'
+        assert 'do not fit in the checkpoint' in caplog.text
+        assert len(tracker.get_activities()) == 40
+
+    def test_stats(self, test_config, mock_monitors):
+        """Test per-tick latency metrics and the profiler toggle."""
+        test_config['metrics'] = {'enabled': True}
+        tracker = ActivityTracker(test_config)
+        tracker.polling_interval = 0.01
+        
+        tracker.start()
+        tracker.start_profiler('cprofile')
+        time.sleep(0.1)
+        report = tracker.stop_profiler()
+        tracker.stop()
+        
+        stats = tracker.stats()
+        assert stats['enabled']
+        assert stats['latency']['tick.sample']['count'] > 0
+        assert stats['latency']['tick.total']['count'] > 0
+        assert stats['counters']['activities.started'] == 1
+        assert '_update_activity' in report
@@ -0,0 +1,120 @@
+import pytest
+from unittest.mock import patch
+from datetime import datetime, timedelta
+from src.core.activity import Activity
+from src.core.storage import JSONStorage, SQLiteStorage
+from src.core.transfer import transfer, read_batches
+
+@pytest.fixture
+def json_store(temp_dir):
+    """Create a JSON store holding a day of activities."""
+    storage = JSONStorage(temp_dir / "activities.json")
+    start = datetime(2024, 1, 1, 9, 0)
+    storage.save_activities([
+        Activity(
+            name=f"Window {i}",
+            start_time=start + timedelta(minutes=i),
+            end_time=start + timedelta(minutes=i + 1),
+            process_name=f"app{i % 3}",
+            window_title=f"Window {i}",
+            category="Work" if i % 2 else None
+        )
+        for i in range(25)
+    ])
+    return storage
+
+def test_json_to_sqlite(json_store, temp_dir):
+    """Test migrating a JSON store into SQLite."""
+    destination = temp_dir / "activities.db"
+    stats = transfer(json_store.filepath, destination, batch_size=10)
+    
+    assert stats.rows == 25
+    migrated = SQLiteStorage(destination).get_activities()
+    assert [a.name for a in migrated] == [a.name for a in json_store.get_activities()]
+    assert migrated[1].category == "Work"
+    assert migrated[0].category is None
+
+@pytest.mark.parametrize("suffix", [".csv", ".jsonl", ".tcol"])
+def test_file_roundtrip(json_store, temp_dir, suffix):
+    """Test exporting to each file format and importing it back."""
+    exported = temp_dir / f"export{suffix}"
+    transfer(json_store.filepath, exported, batch_size=7)
+    
+    destination = temp_dir / "roundtrip.db"
+    transfer(exported, destination)
+    
+    original = json_store.get_activities()
+    restored = SQLiteStorage(destination).get_activities()
+    assert len(restored) == len(original)
+    for a, b in zip(original, restored):
+        assert (a.name, a.start_time, a.end_time, a.process_name, a.category) == \
+               (b.name, b.start_time, b.end_time, b.process_name, b.category)
+
+def test_time_range_filter(json_store, temp_dir):
+    """Test that exports honour the time range."""
+    exported = temp_dir / "morning.jsonl"
+    stats = transfer(
+        json_store.filepath, exported,
+        start_time=datetime(2024, 1, 1, 9, 10),
+        end_time=datetime(2024, 1, 1, 9, 20)
+    )
+    assert stats.rows == 10
+    batches = list(read_batches(exported))
+    assert batches[0][0].name == "Window 10"
+
+def test_resume_after_interruption(json_store, temp_dir):
+    """Test that a failed import resumes after the last committed batch."""
+    destination = temp_dir / "activities.db"
+    original_save = SQLiteStorage.save_activities
+    calls = []
+    
+    def flaky_save(self, activities):
+        calls.append(len(activities))
+        if len(calls) == 2:
+            raise RuntimeError("interrupted")
+        original_save(self, activities)
+    
+    with patch.object(SQLiteStorage, 'save_activities', flaky_save):
+        with pytest.raises(RuntimeError):
+            transfer(json_store.filepath, destination, batch_size=10)
+    
+    stats = transfer(json_store.filepath, destination, batch_size=10, resume=True)
+    assert stats.skipped == 10
+    assert stats.rows == 15
+    assert len(SQLiteStorage(destination).get_activities()) == 25
+    assert not (temp_dir / "activities.db.transfer-state").exists()
+
+@pytest.mark.parametrize("name", ["activities.db", "export.jsonl", "export.csv"])
+def test_crash_before_offset_saved(json_store, temp_dir, name):
+    """Test that a batch written but not recorded is not imported twice."""
+    from src.core import transfer as transfer_module
+    destination = temp_dir / name
+    original_save = transfer_module._save_resume_offset
+    calls = []
+    
+    def crash_after_write(*args):
+        calls.append(args)
+        if len(calls) == 2:
+            raise RuntimeError("killed")
+        original_save(*args)
+    
+    with patch.object(transfer_module, '_save_resume_offset', crash_after_write):
+        with pytest.raises(RuntimeError):
+            transfer(json_store.filepath, destination, batch_size=10)
+    
+    stats = transfer(json_store.filepath, destination, batch_size=10, resume=True)
+    assert stats.skipped == 10
+    restored = [a for batch in read_batches(destination) for a in batch]
+    assert [a.name for a in restored] == [a.name for a in json_store.get_activities()]
+
+def test_source_storage_is_closed(json_store):
+    """Test that reading a store closes it once the batches are consumed."""
+    with patch.object(JSONStorage, 'close') as close:
+        assert sum(len(batch) for batch in read_batches(json_store.filepath)) == 25
+    close.assert_called_once()
+
+def test_missing_source(temp_dir):
+    """Test that a missing source is reported instead of created."""
+    with pytest.raises(FileNotFoundError):
+        transfer(temp_dir / "missing.json", temp_dir / "out.csv")
+    assert not (temp_dir / "missing.json").exists()